@@ -0,0 +1,167 @@
+"""
+ASGI level benchmark of the event ingestion path
+
+Drives ``SlackEventApp`` through its ASGI interface, without network nor test
+client, with synthetic signed payloads of several sizes and handler counts.
+For each scenario it reports requests/sec, p50/p99 ack latency (until the
+response is sent) and total latency (until handlers are done), and the peak
+memory allocated per request, as JSON.
+
+    python -m benchmarks.asgi --output before.json
+    python -m benchmarks.asgi --compare before.json
+    python -m benchmarks.asgi --raw-asgi --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from slackevent_responder import SlackEventApp
+from slackevent_responder.replay import call, percentile
+
+from .payloads import SIGNING_SECRET, make_requests
+
+
+PATH = "/slack/events"
+
+
+def default_app(handlers, sync=False, **app_kwargs):
+    app = SlackEventApp(slack_signing_secret=SIGNING_SECRET, **app_kwargs)
+    for _ in range(handlers):
+        if sync:
+
+            def handler(event):
+                pass
+
+        else:
+
+            async def handler(event):
+                pass
+
+        app.on("message", handler)
+    return app
+
+
+async def run_scenario(app, requests, concurrency=1, path=PATH):
+    """
+    Send ``requests`` to ``app`` and return throughput and latency figures
+    """
+    # warm up caches, thread pools and code paths
+    for headers, body in requests[: min(50, len(requests))]:
+        await call(app, path, headers, body)
+
+    results = []
+    queue = iter(requests)
+
+    async def client():
+        for headers, body in queue:
+            results.append(await call(app, path, headers, body))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    statuses = sorted({status for status, _, _, _ in results})
+    ack = [a for _, a, _, _ in results]
+    total = [t for _, _, t, _ in results]
+
+    # allocation pass, separate as tracing slows everything down
+    sample = requests[: min(200, len(requests))]
+    peaks = []
+    for headers, body in sample:
+        # traced from zero for each request, reset_peak() needs Python 3.9
+        tracemalloc.start()
+        try:
+            await call(app, path, headers, body)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "requests": len(results),
+        "statuses": statuses,
+        "requests_per_sec": len(results) / elapsed,
+        "ack_p50_ms": percentile(ack, 50) * 1000,
+        "ack_p99_ms": percentile(ack, 99) * 1000,
+        "total_p50_ms": percentile(total, 50) * 1000,
+        "total_p99_ms": percentile(total, 99) * 1000,
+        "peak_alloc_bytes_per_request": sum(peaks) / len(peaks),
+    }
+
+
+def metadata():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": int(time.time()),
+    }
+
+
+def compare(baseline, current):
+    rows = {r["scenario"]: r for r in baseline["results"]}
+    print(f"{'scenario':<32} {'req/s':>16} {'ack p99 ms':>20}")
+    for result in current["results"]:
+        before = rows.get(result["scenario"])
+        if before is None:
+            continue
+        print(
+            f"{result['scenario']:<32} "
+            f"{result['requests_per_sec']:>8.0f} ({result['requests_per_sec'] / before['requests_per_sec']:>5.2f}x) "
+            f"{result['ack_p99_ms']:>10.3f} ({result['ack_p99_ms'] / before['ack_p99_ms']:>5.2f}x)"
+        )
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--sizes", default="1024,16384,131072")
+    parser.add_argument("--handlers", default="0,1,3")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--sync", action="store_true", help="use sync handlers")
+    parser.add_argument(
+        "--raw-asgi", action="store_true", help="use the raw ASGI endpoint"
+    )
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results to compare against")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = {"meta": metadata(), "results": []}
+    for size in [int(s) for s in args.sizes.split(",")]:
+        requests = make_requests(args.requests, size)
+        for handlers in [int(h) for h in args.handlers.split(",")]:
+            app = default_app(handlers, sync=args.sync, raw_asgi=args.raw_asgi)
+            result = asyncio.run(run_scenario(app, requests, args.concurrency))
+            result["scenario"] = f"size={size},handlers={handlers}"
+            report["results"].append(result)
+            asyncio.run(app.shutdown())
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
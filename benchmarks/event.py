@@ -0,0 +1,113 @@
+"""
+Benchmark of the payload handed to event handlers
+
+Compares, per in-flight event with three handlers, the memory held by the
+previous dispatch (the payload dict bound into one starlette
+``BackgroundTask`` per handler) and by the current one (a ``SlackEvent``
+bound into a single dispatcher task), and the time three handlers spend
+reading the channel of a ``reaction_added`` event.
+
+    python -m benchmarks.event
+"""
+import json
+import timeit
+import tracemalloc
+
+from starlette.background import BackgroundTasks
+
+from slackevent_responder import Dispatcher, SlackEvent
+
+
+EVENTS = 10000
+HANDLERS = 3
+PAYLOAD = {
+    "team_id": "T0JFD6M53",
+    "api_app_id": "A28SCUES3",
+    "event": {
+        "type": "reaction_added",
+        "user": "U27FFLNF4",
+        "item": {
+            "type": "message",
+            "channel": "D2AQCJCQ2",
+            "ts": "1477958101.000004",
+        },
+        "reaction": "grinning",
+        "item_user": "U299ATJ2X",
+        "event_ts": "1477958240.864741",
+    },
+    "type": "event_callback",
+    "event_id": "Ev0PV52K21",
+    "event_time": 1477958240,
+}
+
+
+def handler(event_data):
+    pass
+
+
+def legacy_in_flight(payloads):
+    in_flight = []
+    for event_data in payloads:
+        tasks = BackgroundTasks()
+        for _ in range(HANDLERS):
+            tasks.add_task(handler, event_data)
+        in_flight.append(tasks)
+    return in_flight
+
+
+def current_in_flight(payloads):
+    dispatcher = Dispatcher()
+    handlers = [handler] * HANDLERS
+    return [
+        dispatcher.dispatch("reaction_added", handlers, SlackEvent(event_data))
+        for event_data in payloads
+    ]
+
+
+def measure_memory(build):
+    body = json.dumps(PAYLOAD)
+    payloads = [json.loads(body) for _ in range(EVENTS)]
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    in_flight = build(payloads)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del in_flight
+    return (after - before) / EVENTS
+
+
+def legacy_access(event_data):
+    for _ in range(HANDLERS):
+        event_data["event"]["item"]["channel"]
+
+
+def current_access(event):
+    for _ in range(HANDLERS):
+        event.channel
+
+
+def main():
+    legacy_bytes = measure_memory(legacy_in_flight)
+    current_bytes = measure_memory(current_in_flight)
+    print(
+        f"bytes per in-flight event: legacy {legacy_bytes:.0f}, current {current_bytes:.0f}"
+    )
+
+    number = 200000
+    legacy = min(
+        timeit.repeat(lambda: legacy_access(PAYLOAD), number=number, repeat=5)
+    )
+    # a fresh SlackEvent per event, as handlers of one event share it
+    current = min(
+        timeit.repeat(
+            lambda: current_access(SlackEvent(PAYLOAD)), number=number, repeat=5
+        )
+    )
+    print(
+        f"channel lookup by {HANDLERS} handlers (ns): "
+        f"legacy {legacy / number * 1e9:.0f}, current {current / number * 1e9:.0f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
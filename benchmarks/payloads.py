@@ -0,0 +1,64 @@
+"""
+Synthetic, correctly signed Events API requests for benchmarks
+"""
+import json
+import random
+import string
+
+from slackevent_responder.replay import sign
+
+
+SIGNING_SECRET = "0123456789abcdef0123456789abcdef"
+
+
+def make_event(size, event_type="message", seq=0, team_id="T0JFD6M53"):
+    """
+    Return an ``event_callback`` payload whose JSON encoding is about
+    ``size`` bytes, padded with message blocks
+    """
+    event = {
+        "type": event_type,
+        "channel": "C0G9QF9GZ",
+        "user": "U2147483697",
+        "text": "Live long and prospect.",
+        "ts": f"1355517523.{seq:06d}",
+        "event_ts": f"1355517523.{seq:06d}",
+        "channel_type": "channel",
+        "blocks": [],
+    }
+    payload = {
+        "token": "XXYYZZ",
+        "team_id": team_id,
+        "api_app_id": "AXXXXXXXXX",
+        "event": event,
+        "type": "event_callback",
+        "event_id": f"Ev{seq:010d}",
+        "event_time": 1355517523,
+        "authed_users": ["UXXXXXXX1"],
+    }
+    rand = random.Random(seq)
+    while len(json.dumps(payload)) < size:
+        text = "".join(
+            rand.choice(string.ascii_letters + " ") for _ in range(200)
+        )
+        event["blocks"].append(
+            {
+                "type": "section",
+                "block_id": f"b{len(event['blocks'])}",
+                "text": {"type": "mrkdwn", "text": text},
+            }
+        )
+    return payload
+
+
+def make_requests(
+    count, size, event_type="message", signing_secret=SIGNING_SECRET
+):
+    """
+    Return ``count`` (headers, body) pairs with distinct event IDs
+    """
+    requests = []
+    for seq in range(count):
+        body = json.dumps(make_event(size, event_type, seq)).encode()
+        requests.append((sign(signing_secret, body), body))
+    return requests
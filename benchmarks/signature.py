@@ -0,0 +1,73 @@
+"""
+Microbenchmark of request signature verification
+
+Compares the previous ``str`` based path of ``SlackEventApp.endpoint``
+(decode the body, format it, re-encode it and build a fresh HMAC) with
+``SignatureVerifier`` working on the raw body bytes.
+
+    python -m benchmarks.signature
+"""
+import hashlib
+import hmac
+import timeit
+
+from slackevent_responder import SignatureVerifier
+
+
+SIGNING_SECRET = "0123456789abcdef0123456789abcdef"
+TIMESTAMP = "1531420618"
+PAYLOAD_SIZES = [1024, 16 * 1024, 256 * 1024]
+
+
+def legacy_verify(signing_secret, timestamp, body_bytes, signature):
+    request_body = body_bytes.decode()
+    req = f"v0:{timestamp}:{request_body}"
+    hexdigest = hmac.new(
+        signing_secret.encode(), req.encode(), hashlib.sha256
+    ).hexdigest()
+    return hmac.compare_digest(f"v0={hexdigest}", signature)
+
+
+def main():
+    verifier = SignatureVerifier(SIGNING_SECRET)
+    print(
+        f"{'size':>8} {'legacy (us)':>12} {'verifier (us)':>14} {'speedup':>8}"
+    )
+    for size in PAYLOAD_SIZES:
+        body = b'{"text": "' + b"x" * (size - 12) + b'"}'
+        signature = (
+            "v0="
+            + hmac.new(
+                SIGNING_SECRET.encode(),
+                b"v0:" + TIMESTAMP.encode() + b":" + body,
+                hashlib.sha256,
+            ).hexdigest()
+        )
+        assert legacy_verify(SIGNING_SECRET, TIMESTAMP, body, signature)
+        assert verifier.verify(TIMESTAMP, body, signature)
+
+        number = max(100, 2 * 1024 * 1024 // size)
+        legacy = min(
+            timeit.repeat(
+                lambda: legacy_verify(
+                    SIGNING_SECRET, TIMESTAMP, body, signature
+                ),
+                number=number,
+                repeat=5,
+            )
+        )
+        new = min(
+            timeit.repeat(
+                lambda: verifier.verify(TIMESTAMP, body, signature),
+                number=number,
+                repeat=5,
+            )
+        )
+        print(
+            f"{size:>8} {legacy / number * 1e6:>12.2f} "
+            f"{new / number * 1e6:>14.2f} {legacy / new:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Throughput cost of the event log
+
+Runs the ASGI benchmark scenario without event log, and with an ``EventLog``
+in a temporary directory at each ``synchronous`` level, with several
+concurrent clients so that commits get grouped.
+
+    python -m benchmarks.wal
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+
+from slackevent_responder import EventLog
+
+from .asgi import default_app, metadata, run_scenario
+from .payloads import make_requests
+
+
+async def run(event_log, requests, concurrency):
+    app = default_app(handlers=1, event_log=event_log)
+    result = await run_scenario(app, requests, concurrency)
+    if event_log is not None:
+        result["commits"] = event_log.commits
+        result["events_per_commit"] = event_log.appended / event_log.commits
+    await app.shutdown()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--size", type=int, default=4096)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args(argv)
+
+    requests = make_requests(args.requests, args.size)
+    report = {"meta": metadata(), "results": []}
+    for synchronous in (None, "OFF", "NORMAL", "FULL"):
+        with tempfile.TemporaryDirectory() as directory:
+            event_log = None
+            if synchronous is not None:
+                event_log = EventLog(
+                    os.path.join(directory, "events.db"),
+                    synchronous=synchronous,
+                )
+            result = asyncio.run(run(event_log, requests, args.concurrency))
+        result["scenario"] = f"event_log={synchronous or 'none'}"
+        report["results"].append(result)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
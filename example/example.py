@@ -22,11 +22,11 @@ app = Starlette(debug=True, routes=[Mount("/", slack_events_app)])
 
 
 # Example responder to greetings
-@slack_events_app.on("message")
+@slack_events_app.on("message", subtype=None)
 def handle_message(event_data):
     message = event_data["event"]
     # If the incoming message contains "hi", then respond with a "Hello" message
-    if message.get("subtype") is None and "hi" in message.get("text"):
+    if "hi" in message.get("text"):
         channel = message["channel"]
         message = "Hello <@%s>! :tada:" % message["user"]
         slack_client.chat_postMessage(channel=channel, text=message)
@@ -1,4 +1,54 @@
+from slackevent_responder.admission import DROP, REJECT, AdmissionController
 from slackevent_responder.application import SlackEventApp
+from slackevent_responder.batching import EventBatcher
+from slackevent_responder.cache import LookupCache
+from slackevent_responder.dedup import DedupCache
+from slackevent_responder.dispatcher import Dispatcher
+from slackevent_responder.envelope import EventEnvelope
+from slackevent_responder.event import SlackEvent
+from slackevent_responder.exceptions import (
+    HandlerTimeout,
+    SlackEventAppException,
+)
+from slackevent_responder.executor import HandlerExecutor
+from slackevent_responder.metrics import Metrics, NullMetrics
+from slackevent_responder.ordering import KeyedExecutor
+from slackevent_responder.recorder import TrafficRecorder
+from slackevent_responder.routing import ANY, HandlerFilter
+from slackevent_responder.scheduler import PriorityScheduler
+from slackevent_responder.signature import SignatureVerifier
+from slackevent_responder.socket_mode import SocketModeClient
+from slackevent_responder.tracing import NullTracer, Span, Tracer
+from slackevent_responder.wal import EventLog
+from slackevent_responder.workers import ProcessWorkerPool
 
 
-__all__ = ["SlackEventApp"]
+__all__ = [
+    "SlackEventApp",
+    "SlackEvent",
+    "AdmissionController",
+    "DedupCache",
+    "Dispatcher",
+    "EventBatcher",
+    "EventEnvelope",
+    "EventLog",
+    "HandlerExecutor",
+    "HandlerFilter",
+    "HandlerTimeout",
+    "KeyedExecutor",
+    "LookupCache",
+    "Metrics",
+    "NullMetrics",
+    "NullTracer",
+    "PriorityScheduler",
+    "ProcessWorkerPool",
+    "SignatureVerifier",
+    "SlackEventAppException",
+    "SocketModeClient",
+    "Span",
+    "Tracer",
+    "TrafficRecorder",
+    "ANY",
+    "DROP",
+    "REJECT",
+]
@@ -0,0 +1,97 @@
+from collections import Counter
+from typing import Any, Dict, Hashable, Mapping, Optional, Union
+
+from starlette.background import BackgroundTask
+
+
+REJECT = "reject"
+DROP = "drop"
+
+
+class AdmissionController:
+    """
+    Sheds incoming events once the handler backlog grows past a high-water mark
+
+    The backlog is the number of events, and the size of their payloads,
+    that were acked but whose handlers haven't finished yet. Above
+    ``max_pending_events`` or ``max_pending_bytes`` an event is shed by the
+    policy for its type: ``REJECT`` answers with ``status_code`` so that Slack
+    retries the delivery later, ``DROP`` acks the event and discards it.
+    """
+
+    def __init__(
+        self,
+        max_pending_events: Optional[int] = None,
+        max_pending_bytes: Optional[int] = None,
+        policy: str = REJECT,
+        event_policies: Optional[Mapping[Hashable, str]] = None,
+        status_code: int = 503,
+    ):
+        event_policies = dict(event_policies or {})
+        for p in (policy, *event_policies.values()):
+            if p not in (REJECT, DROP):
+                raise ValueError(f"Unknown admission policy: {p!r}")
+
+        self.max_pending_events = max_pending_events
+        self.max_pending_bytes = max_pending_bytes
+        self.policy = policy
+        self.event_policies = event_policies
+        self.status_code = status_code
+
+        self.pending_events = 0
+        self.pending_bytes = 0
+        self.admitted: "Counter[Hashable]" = Counter()
+        self.rejected: "Counter[Hashable]" = Counter()
+        self.dropped: "Counter[Hashable]" = Counter()
+
+    @property
+    def overloaded(self) -> bool:
+        return (
+            self.max_pending_events is not None
+            and self.pending_events >= self.max_pending_events
+        ) or (
+            self.max_pending_bytes is not None
+            and self.pending_bytes >= self.max_pending_bytes
+        )
+
+    def admit(self, event: Hashable, size: int) -> Optional[str]:
+        """
+        Account for an incoming event, or return the policy it's shed by
+        """
+        if self.overloaded:
+            policy = self.event_policies.get(event, self.policy)
+            if policy == DROP:
+                self.dropped[event] += 1
+            else:
+                self.rejected[event] += 1
+            return policy
+
+        self.pending_events += 1
+        self.pending_bytes += size
+        self.admitted[event] += 1
+        return None
+
+    def release(self, size: int) -> None:
+        self.pending_events -= 1
+        self.pending_bytes -= size
+
+    def track(self, task: BackgroundTask, size: int) -> BackgroundTask:
+        """
+        Wrap the handlers of an admitted event to release it once they finish
+        """
+        return BackgroundTask(self._run, task, size)
+
+    async def _run(self, task: BackgroundTask, size: int) -> None:
+        try:
+            await task()
+        finally:
+            self.release(size)
+
+    def stats(self) -> Dict[str, Union[int, Dict[Any, int]]]:
+        return {
+            "pending_events": self.pending_events,
+            "pending_bytes": self.pending_bytes,
+            "admitted": dict(self.admitted),
+            "rejected": dict(self.rejected),
+            "dropped": dict(self.dropped),
+        }
@@ -1,41 +1,369 @@
 import asyncio
-import hashlib
-import hmac
+import functools
 import json
 import platform
+import re
 import sys
-from collections import OrderedDict, defaultdict
+from collections import OrderedDict
 from time import time
-from typing import Any, Callable, Dict, Hashable, List, Union
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Collection,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 
-from starlette.background import BackgroundTasks
-from starlette.requests import Request
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect, Request
 from starlette.responses import Response
 from starlette.routing import Route, Router
+from starlette.types import Receive, Scope, Send
 
+from .admission import DROP, REJECT, AdmissionController
+from .batching import EventBatcher
+from .cache import LookupCache
+from .dedup import DedupCache
+from .dispatcher import Dispatcher
+from .envelope import EventEnvelope, JSONLoads, default_json_loads
+from .event import SlackEvent
+from .exceptions import SlackEventAppException
+from .metrics import MetricFamily, Metrics, NullMetrics, handler_name
+from .ordering import KeyedExecutor, KeyFunc, key_func
+from .middleware import AFTER, AROUND, BEFORE, DispatchPlan, Middleware
+from .recorder import TrafficRecorder
+from .routing import HandlerFilter, HandlerIndex
+from .signature import SignatureVerifier, Verification
+from .tracing import NULL_SPAN, NullTracer, Span, Tracer
 from .version import __version__
+from .wal import EventLog
+
+
+# The app a request to the shared endpoint is for, looked up in its raw body
+_API_APP_ID = re.compile(rb'"api_app_id"\s*:\s*"([^"\\]+)"')
+
+# (status code, content, media type, handlers to run once it's sent), the
+# reply of the endpoint on Starlette and on raw ASGI alike. Acks are the
+# replies without media type.
+Reply = Tuple[int, str, Optional[str], Optional[BackgroundTask]]
+# case insensitive lookup of a request header
+HeaderGetter = Callable[[str], Optional[str]]
+
+
+def _ack(tasks: Optional[BackgroundTask] = None) -> Reply:
+    return 200, "", None, tasks
+
+
+async def _receive_body(receive: Receive) -> AsyncIterator[bytes]:
+    # like Request.stream()
+    while True:
+        message = await receive()
+        if message["type"] == "http.request":
+            yield message.get("body", b"")
+            if not message.get("more_body", False):
+                return
+        elif message["type"] == "http.disconnect":
+            raise ClientDisconnect()
+
+
+class _ReplyResponse(Response):
+    """
+    Response whose background tasks run even when it can't be sent: the
+    event they handle was admitted, deduplicated and logged already, and
+    running them releases it
+    """
+
+    def __init__(
+        self,
+        content: str,
+        status_code: int = 200,
+        media_type: Optional[str] = None,
+        tasks: Optional[BackgroundTask] = None,
+    ):
+        super().__init__(content, status_code, media_type=media_type)
+        self.tasks = tasks
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            if self.tasks is not None:
+                await self.tasks()
 
 
 class SlackEventApp(Router):
     def __init__(
         self,
-        slack_signing_secret: str,
+        slack_signing_secret: Union[str, Sequence[str]],
         slack_event_path: str = "/slack/events",
+        dedup_cache: Optional[DedupCache] = None,
+        dispatcher: Optional[Dispatcher] = None,
+        admission: Optional[AdmissionController] = None,
+        json_loads: Optional[JSONLoads] = None,
+        lazy_parse: bool = False,
+        metrics: Optional[Metrics] = None,
+        metrics_path: Optional[str] = None,
+        event_log: Optional[EventLog] = None,
+        drain_timeout: Optional[float] = 10.0,
+        max_body_size: Optional[int] = None,
+        apps: Optional[Mapping[str, Union[str, Sequence[str]]]] = None,
+        recorder: Optional[TrafficRecorder] = None,
+        tracer: Optional[Tracer] = None,
+        raw_asgi: bool = False,
+        cache: Optional[LookupCache] = None,
         **kwargs: Any,
     ):
         self.slack_event_path = slack_event_path
-        self._slack_signing_secret = slack_signing_secret
+        self.signature_verifier = SignatureVerifier(slack_signing_secret)
+        # verifiers of the hosted Slack apps by api_app_id, replaced rather
+        # than mutated so that requests never see a half updated mapping
+        self._app_verifiers: Dict[str, SignatureVerifier] = {}
+        for api_app_id, secrets in (apps or {}).items():
+            self.add_app(api_app_id, secrets)
+        self.dedup_cache = dedup_cache
+        self.dispatcher = dispatcher if dispatcher is not None else Dispatcher()
+        self.admission = admission
+        self.json_loads = (
+            json_loads if json_loads is not None else default_json_loads()
+        )
+        self.lazy_parse = lazy_parse
+        # shared with the dispatcher, which may have been given them instead
+        dispatcher = self.dispatcher
+        self.metrics = metrics if metrics is not None else dispatcher.metrics
+        if isinstance(dispatcher.metrics, NullMetrics):
+            dispatcher.metrics = self.metrics
+        elif dispatcher.metrics is not self.metrics:
+            raise ValueError("The dispatcher has other metrics than the app")
+        self.metrics.add_collector(self._collect_metrics)
+        self.tracer = tracer if tracer is not None else dispatcher.tracer
+        if isinstance(dispatcher.tracer, NullTracer):
+            dispatcher.tracer = self.tracer
+        elif dispatcher.tracer is not self.tracer:
+            raise ValueError("The dispatcher has another tracer than the app")
+        self.dispatcher.error_handler = self.emit_error
+        self.event_log = event_log
+        self.drain_timeout = drain_timeout
+        self.max_body_size = max_body_size
+        self.recorder = recorder
+        self.cache = cache
+        self.draining = False
+        self.abandoned: List[Any] = []
+        # tasks running the handlers of received events, and their event
+        self._running: Dict["asyncio.Task[Any]", Any] = {}
+        # tasks started in the background, referenced until they're done
+        self._background: Set["asyncio.Task[Any]"] = set()
+        self._filters: Dict[
+            Tuple[Hashable, Callable[..., Any]], HandlerFilter
+        ] = {}
+        self._batchers: Dict[
+            Tuple[Hashable, Callable[..., Any]], EventBatcher
+        ] = {}
+        self._keyed: Dict[
+            Tuple[Hashable, Callable[..., Any]], KeyedExecutor
+        ] = {}
         self._handlers: Dict[
             Hashable, Dict[Callable[..., Any], Callable[..., Any]]
-        ] = defaultdict(OrderedDict)
+        ] = {}
+        self._middleware: Tuple[Middleware, ...] = ()
+        self._plans: Dict[Hashable, DispatchPlan] = {}
+        self._routing_names = self._compile_routing_names()
         self._package_info = self._get_package_info()
+        self.raw_asgi = raw_asgi
+        self._app_path_prefix = slack_event_path.rstrip("/") + "/"
+        self._ack_headers = [
+            (b"content-length", b"0"),
+            (b"x-slack-powered-by", self._package_info.encode("latin-1")),
+        ]
+
+        routes = [
+            Route(slack_event_path, self.endpoint, methods=["GET", "POST"]),
+            Route(
+                slack_event_path.rstrip("/") + "/{api_app_id}",
+                self.endpoint,
+                methods=["GET", "POST"],
+            ),
+        ]
+        if metrics_path is not None:
+            routes.append(
+                Route(metrics_path, self.metrics_endpoint, methods=["GET"])
+            )
 
         super().__init__(
-            routes=[
-                Route(slack_event_path, self.endpoint, methods=["GET", "POST"])
-            ]
+            routes=routes,
+            on_startup=[self.startup],
+            on_shutdown=[self.shutdown],
         )
 
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        # With raw_asgi, events skip routing and the Starlette request and
+        # response objects
+        if (
+            self.raw_asgi
+            and scope["type"] == "http"
+            and scope["method"] == "POST"
+        ):
+            path = scope["path"]
+            if path == self.slack_event_path:
+                await self._raw_endpoint(scope, receive, send, None)
+                return
+            if path.startswith(self._app_path_prefix):
+                api_app_id = path.replace(self._app_path_prefix, "", 1)
+                if api_app_id and "/" not in api_app_id:
+                    await self._raw_endpoint(scope, receive, send, api_app_id)
+                    return
+        await super().__call__(scope, receive, send)
+
+    # startup and shutdown are called on ASGI lifespan events, or by the
+    # application mounting this router since Mount doesn't forward them.
+
+    async def startup(self) -> None:
+        await self.warm()
+        if self.event_log is not None:
+            await self.replay()
+
+    async def shutdown(self) -> None:
+        self.abandoned = await self.drain(self.drain_timeout)
+        if self.abandoned:
+            await self.emit_error(
+                SlackEventAppException(
+                    "Abandoned the handlers of {} events at shutdown: {}".format(
+                        len(self.abandoned),
+                        ", ".join(
+                            str(getattr(event, "event_id", None) or event)
+                            for event in self.abandoned
+                        ),
+                    )
+                )
+            )
+        # Release the handler threads, waiting for those still running
+        # unless they were given up on already
+        await run_in_threadpool(self.dispatcher.shutdown, not self.abandoned)
+        if self.event_log is not None:
+            await self.event_log.close()
+        if self.recorder is not None:
+            await self.recorder.close()
+
+    async def warm(self) -> None:
+        """
+        Start the threads and processes handlers run on, ahead of the first
+        event
+        """
+        await self.dispatcher.warm()
+
+    async def drain(self, timeout: Optional[float] = None) -> List[Any]:
+        """
+        Stop accepting events, and wait up to ``timeout`` seconds for the
+        handlers of those already received
+
+        Handlers still running then are cancelled, and their events are
+        returned. Those events stay in the event log, to be replayed.
+        """
+        self.draining = True
+        # Hand the events still waiting in a batch to their handlers
+        for batcher in self._batchers.values():
+            self._spawn(batcher.flush())
+        pending = set(self._background)
+        pending.update(self._running)
+        if pending:
+            _, pending = await asyncio.wait(pending, timeout=timeout)
+        abandoned = [
+            event for task, event in self._running.items() if task in pending
+        ]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+        return abandoned
+
+    async def replay(self) -> int:
+        """
+        Start the handlers of the events left unfinished in the event log,
+        like those of received events, and return how many there were
+        """
+        assert self.event_log is not None
+        unfinished = await self.event_log.unfinished()
+        for log_id, body in unfinished:
+            self._spawn(self._replay_event(log_id, body))
+        return len(unfinished)
+
+    def _spawn(self, coro: Awaitable[Any]) -> None:
+        # The event loop only keeps weak references to tasks
+        task = asyncio.ensure_future(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _replay_event(self, log_id: int, body: bytes) -> None:
+        assert self.event_log is not None
+        try:
+            envelope = EventEnvelope(body, self.json_loads)
+            event_type = envelope.event_type
+        except Exception as e:
+            self.event_log.mark_done(log_id)
+            await self.emit_error(e)
+            return
+        if event_type is None:
+            self.event_log.mark_done(log_id)
+            return
+        if self.dedup_cache is not None and envelope.event_id:
+            self.dedup_cache.seen(envelope.event_id)
+        event = self._slack_event(envelope)
+        tasks = self.event_log.track(
+            self._tasks_from_event(event_type, event), log_id
+        )
+        # tracked for drain() to wait for them, and left in the log when
+        # they are abandoned
+        try:
+            await self._track(tasks, event)()
+        except Exception as e:
+            await self.emit_error(e)
+
+    def _slack_event(self, envelope: EventEnvelope) -> SlackEvent:
+        # The body is only worth keeping along the payload to be pickled to
+        # worker processes
+        if self.dispatcher.process_pool is None:
+            return SlackEvent(envelope.data)
+        return SlackEvent(envelope.data, envelope.body)
+
+    def _track(
+        self, tasks: BackgroundTask, event: Any, span: Span = NULL_SPAN
+    ) -> BackgroundTask:
+        """
+        Wrap the handlers of a received event, for shutdown to wait for them
+        and for their spans to be children of the ``span`` of its request
+        """
+        return BackgroundTask(self._run_tracked, tasks, event, span)
+
+    async def _run_tracked(
+        self, tasks: BackgroundTask, event: Any, span: Span
+    ) -> None:
+        task = asyncio.current_task()
+        assert task is not None
+        self._running[task] = event
+        token = span.activate()
+        try:
+            await tasks()
+        finally:
+            span.deactivate(token)
+            del self._running[task]
+
+    async def emit_error(self, e: BaseException) -> None:
+        await self._tasks_from_event("error", e)()
+
     def _get_package_info(self) -> str:
         client_name = __name__.split(".")[0]
         client_version = __version__
@@ -56,41 +384,176 @@ class SlackEventApp(Router):
 
         return " ".join(ua_string)
 
+    def add_app(
+        self, api_app_id: str, signing_secret: Union[str, Sequence[str]]
+    ) -> None:
+        """
+        Host the Slack app ``api_app_id``, whose requests are signed with
+        ``signing_secret``
+
+        Its requests are verified with its own secrets, found by the
+        ``api_app_id`` of their body or by the path they're sent to, like
+        ``/slack/events/A0123``. Adding an app again adds its secrets, for
+        rotation. Register its handlers with the ``app`` filter.
+        """
+        verifier = self._app_verifiers.get(api_app_id)
+        if verifier is None:
+            verifier = SignatureVerifier(signing_secret)
+            self._app_verifiers = {**self._app_verifiers, api_app_id: verifier}
+        elif isinstance(signing_secret, str):
+            verifier.add_secret(signing_secret)
+        else:
+            for secret in signing_secret:
+                verifier.add_secret(secret)
+
+    def remove_app(self, api_app_id: str) -> None:
+        """
+        Stop accepting the requests of the Slack app ``api_app_id``
+        """
+        app_verifiers = dict(self._app_verifiers)
+        del app_verifiers[api_app_id]
+        self._app_verifiers = app_verifiers
+
     def verify_signature(
-        self, timestamp: str, request_body: str, signature: str
+        self,
+        timestamp: Union[str, bytes],
+        request_body: Union[str, bytes],
+        signature: Union[str, bytes],
     ) -> bool:
         # Verify the request signature of the request sent from Slack
-        # Generate a new hash using the app's signing secret and request data
-        req = f"v0:{timestamp}:{request_body}"
+        # against every active signing secret of the app
+        return self.signature_verifier.verify(
+            timestamp, request_body, signature
+        )
+
+    async def endpoint(self, request: Request) -> Response:
+        reply = await self._handle(
+            request.method,
+            request.scope["path"],
+            request.path_params.get("api_app_id"),
+            request.headers.get,
+            request.stream(),
+        )
+        return self._response(*reply)
+
+    async def _raw_endpoint(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        api_app_id: Optional[str],
+    ) -> None:
+        """
+        ``endpoint()`` on the raw ASGI interface, without the Starlette
+        request and response of acked events
+        """
+        # ASGI header names are lowercase bytes
+        headers = dict(scope["headers"])
 
-        hexdigest = hmac.new(
-            self._slack_signing_secret.encode(), req.encode(), hashlib.sha256
-        ).hexdigest()
-        request_hash = f"v0={hexdigest}"
+        def header(name: str) -> Optional[str]:
+            value = headers.get(name.encode())
+            return value.decode("latin-1") if value is not None else None
 
-        return hmac.compare_digest(request_hash, signature)
+        status, content, media_type, tasks = await self._handle(
+            "POST", scope["path"], api_app_id, header, _receive_body(receive)
+        )
+        if media_type is not None:
+            response = self._response(status, content, media_type, tasks)
+            await response(scope, receive, send)
+            return
 
-    async def endpoint(self, request: Request) -> Response:
-        # If requested method is not POST, return 404.
-        if request.method != "POST":
-            return Response(
-                content="These are not the slackbots you're looking for.",
-                media_type="text/plain",
-                status_code=404,
+        # new messages from the precomputed headers every time, as ASGI
+        # middleware may modify the messages they pass on
+        try:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 200,
+                    "headers": list(self._ack_headers),
+                }
             )
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            # like _ReplyResponse, even when the ack can't be sent
+            if tasks is not None:
+                await tasks()
+
+    async def _handle(
+        self,
+        method: str,
+        path: str,
+        api_app_id: Optional[str],
+        header: HeaderGetter,
+        body: AsyncIterator[bytes],
+    ) -> Reply:
+        if not self.tracer.enabled:
+            return await self._reply(
+                method, api_app_id, header, body, NULL_SPAN
+            )
+
+        # The span of the request ends once it's acked, its handlers get
+        # their own spans
+        span = self.tracer.start_span("slack.request", {"http.path": path})
+        retry_num = header("x-slack-retry-num")
+        if retry_num is not None and retry_num.isdigit():
+            span.set_attribute("slack.retry_num", int(retry_num))
+            span.set_attribute(
+                "slack.retry_reason", header("x-slack-retry-reason")
+            )
+        try:
+            reply = await self._reply(method, api_app_id, header, body, span)
+        except Exception as e:
+            span.record_error(e)
+            span.end()
+            raise
+        span.set_attribute("http.status_code", reply[0])
+        span.end()
+        return reply
+
+    async def _reply(
+        self,
+        method: str,
+        api_app_id: Optional[str],
+        header: HeaderGetter,
+        body: AsyncIterator[bytes],
+        span: Span,
+    ) -> Reply:
+        # If requested method is not POST, or the path is for an unknown
+        # app, return 404.
+        if method != "POST" or (
+            api_app_id is not None and api_app_id not in self._app_verifiers
+        ):
+            return (
+                404,
+                "These are not the slackbots you're looking for.",
+                "text/plain",
+                None,
+            )
+
+        # Let Slack deliver the event again, to another instance
+        if self.draining:
+            return (
+                503,
+                "Shutting down",
+                "text/plain",
+                None,
+            )
+
+        metrics = self.metrics
+        started = metrics.start()
 
         # Each request must comes with request timestamp
-        request_timestamp = request.headers.get("X-Slack-Request-Timestamp")
+        request_timestamp = header("x-slack-request-timestamp")
         if request_timestamp is None:
             slack_exception = SlackEventAppException(
                 "Request doesn't contain timestamp header"
             )
             tasks = self._tasks_from_event("error", slack_exception)
-            return Response(
-                content="Request doesn't contain timestamp header",
-                media_type="text/plain",
-                status_code=403,
-                background=tasks,
+            return (
+                403,
+                "Request doesn't contain timestamp header",
+                "text/plain",
+                tasks,
             )
 
         # Emit an error if the timestamp is out of range
@@ -99,70 +562,506 @@ class SlackEventApp(Router):
                 "Invalid timestamp in request header"
             )
             tasks = self._tasks_from_event("error", slack_exception)
-            return Response(
-                content="Invalid timestamp in request header",
-                media_type="text/plain",
-                status_code=403,
-                background=tasks,
-            )
-
-        # Verify the request signature using the app's signing secret
-        # emit an error if the signature can't be verified
-        request_signature = request.headers.get("X-Slack-Signature", "")
-        request_body_bytes = await request.body()
-        request_body = request_body_bytes.decode()
-        if not self.verify_signature(
-            request_timestamp, request_body, request_signature
-        ):
+            return (
+                403,
+                "Invalid timestamp in request header",
+                "text/plain",
+                tasks,
+            )
+
+        # Verify the request signature using the app's signing secret while
+        # the body is read, rejecting it as soon as it's over max_body_size
+        # emit an error if the signature can't be verified. When hosting
+        # several apps, the secret of requests to the shared path is only
+        # known once their body is read.
+        request_signature = header("x-slack-signature") or ""
+        verification: Optional[Verification] = None
+        if api_app_id is not None:
+            verification = self._app_verifiers[api_app_id].start(
+                request_timestamp
+            )
+        elif not self._app_verifiers:
+            verification = self.signature_verifier.start(request_timestamp)
+        request_body_bytes = await self._read_body(
+            body, header("content-length"), verification
+        )
+        if request_body_bytes is None:
+            slack_exception = SlackEventAppException("Request body too large")
+            tasks = self._tasks_from_event("error", slack_exception)
+            return (
+                413,
+                "Request body too large",
+                "text/plain",
+                tasks,
+            )
+        started = metrics.stage("read_body", started)
+        traced = span.stage("read_body")
+        if verification is not None:
+            verified = verification.verify(request_signature)
+        else:
+            api_app_id, verified = self._verify_app_signature(
+                request_timestamp, request_body_bytes, request_signature
+            )
+        if not verified:
             slack_exception = SlackEventAppException(
                 "Invalid request signature"
             )
             tasks = self._tasks_from_event("error", slack_exception)
-            return Response(
-                content="Invalid request signature",
-                media_type="text/plain",
-                status_code=403,
-                background=tasks,
+            return (
+                403,
+                "Invalid request signature",
+                "text/plain",
+                tasks,
+            )
+
+        started = metrics.stage("verify", started)
+        traced = span.stage("verify", traced)
+
+        envelope = EventEnvelope(request_body_bytes, self.json_loads)
+        return await self._receive(envelope, api_app_id, span, started, traced)
+
+    async def receive(
+        self,
+        body: Optional[bytes],
+        data: Any = None,
+        span: Span = NULL_SPAN,
+        size: Optional[int] = None,
+    ) -> Reply:
+        """
+        Process the verified ``body`` of an event delivered by another
+        transport than the endpoint, decoded already into ``data`` if given
+
+        The body may be None when ``data`` is given, to be encoded only if
+        it's needed, by the recorder, the event log or worker processes;
+        ``size`` is then the length of the payload as it was received.
+
+        Returns the reply the endpoint would send: events are accepted when
+        the status is 200, and the tasks then run their handlers, or else
+        the ``error`` handlers.
+        """
+        if self.draining:
+            return (
+                503,
+                "Shutting down",
+                "text/plain",
+                None,
             )
+        envelope = EventEnvelope(body, self.json_loads, data, size)
+        return await self._receive(
+            envelope, None, span, self.metrics.start(), None
+        )
+
+    async def _receive(
+        self,
+        envelope: EventEnvelope,
+        api_app_id: Optional[str],
+        span: Span,
+        started: float,
+        traced: Optional[float],
+    ) -> Reply:
+        # Record, parse, admit, deduplicate, log and dispatch a verified
+        # event, for every transport
+        metrics = self.metrics
+        if self.recorder is not None:
+            self.recorder.record(envelope.body)
+
+        # Skip parsing bodies no registered handler can be interested in
+        if (
+            self.lazy_parse
+            and not envelope.parsed
+            and not envelope.mentions(self._get_routing_names())
+        ):
+            return _ack()
 
         # Parse the request payload into JSON
-        event_data = json.loads(request_body)
+        try:
+            event_data = envelope.data
+        except ValueError:
+            slack_exception = SlackEventAppException("Invalid request body")
+            tasks = self._tasks_from_event("error", slack_exception)
+            return (
+                400,
+                "Invalid request body",
+                "text/plain",
+                tasks,
+            )
+        started = metrics.stage("parse", started)
+        traced = span.stage("parse", traced)
+
+        # Don't let an app's secret, or the default one, sign the events of
+        # another hosted app
+        body_app_id = event_data.get("api_app_id")
+        if (
+            body_app_id is not None
+            and body_app_id != api_app_id
+            and (api_app_id is not None or body_app_id in self._app_verifiers)
+        ):
+            slack_exception = SlackEventAppException(
+                "Invalid request signature"
+            )
+            tasks = self._tasks_from_event("error", slack_exception)
+            return (
+                403,
+                "Invalid request signature",
+                "text/plain",
+                tasks,
+            )
 
         # Echo the URL verification challenge code back to Slack
         if "challenge" in event_data:
-            event_type = "challenge"
-            tasks = self._tasks_from_event(event_type, event_data)
-            return Response(
-                content=event_data["challenge"],
-                media_type="application/json",
-                status_code=200,
-                background=tasks,
+            tasks = self._tasks_from_event("challenge", SlackEvent(event_data))
+            return (
+                200,
+                event_data["challenge"],
+                "application/json",
+                tasks,
             )
 
         # Parse the Event payload and schedule handlers to background tasks
-        if "event" in event_data and "type" in event_data["event"]:
-            event_type = event_data["event"]["type"]
-            tasks = self._tasks_from_event(event_type, event_data)
-            response = Response(content="", status_code=200, background=tasks)
-            response.headers["X-Slack-Powered-By"] = self._package_info
-            return response
+        event_type = envelope.event_type
+        if event_type is not None:
+            payload_size = envelope.size
+            span.set_attribute("slack.event_type", event_type)
+            span.set_attribute("slack.event_id", envelope.event_id)
+
+            # Shed the event if handlers are too far behind
+            if self.admission is not None:
+                policy = self.admission.admit(event_type, payload_size)
+                if policy == DROP:
+                    return _ack()
+                if policy == REJECT:
+                    return (
+                        self.admission.status_code,
+                        "Too many pending events",
+                        "text/plain",
+                        None,
+                    )
+
+            # Ack retried deliveries of an already dispatched event right away
+            event_id = envelope.event_id
+            if (
+                self.dedup_cache is not None
+                and event_id is not None
+                and self.dedup_cache.seen(event_id)
+            ):
+                if self.admission is not None:
+                    self.admission.release(payload_size)
+                return _ack()
+
+            event = self._slack_event(envelope)
+            tasks = self._tasks_from_event(event_type, event)
+
+            # Persist the event before acking it, for replay after a crash
+            if self.event_log is not None:
+                try:
+                    log_id = await self.event_log.append(envelope.body)
+                except Exception as e:
+                    if self.admission is not None:
+                        self.admission.release(payload_size)
+                    # Slack retries the event, which must not be acked as
+                    # a duplicate then
+                    if self.dedup_cache is not None and event_id is not None:
+                        self.dedup_cache.forget(event_id)
+                    span.record_error(e)
+                    return (
+                        500,
+                        "Failed to persist event",
+                        "text/plain",
+                        self._tasks_from_event("error", e),
+                    )
+                tasks = self.event_log.track(tasks, log_id)
+
+            if self.admission is not None:
+                tasks = self.admission.track(tasks, payload_size)
+            tasks = self._track(tasks, event, span)
+            metrics.stage("dispatch", started)
+            span.stage("dispatch", traced)
+            return _ack(tasks)
 
         slack_exception = SlackEventAppException("No event in request body")
         tasks = self._tasks_from_event("error", slack_exception)
+        return (
+            403,
+            "No event in request body",
+            "text/plain",
+            tasks,
+        )
+
+    def _verify_app_signature(
+        self, timestamp: str, request_body: bytes, signature: str,
+    ) -> Tuple[Optional[str], bool]:
+        """
+        Verify a request to the shared path with the secrets of the apps
+        named by the ``api_app_id`` values of its body, and return the app
+        whose secret matched
+
+        The body isn't parsed yet, so nested values count too; the parsed
+        body's own ``api_app_id`` is checked against the app afterwards.
+        Requests of no hosted app are verified with the default secrets.
+        Those naming no app, like URL verification requests, are checked
+        against the secrets of every app.
+        """
+        named = False
+        for match in _API_APP_ID.finditer(request_body):
+            named = True
+            api_app_id = match.group(1).decode()
+            verifier = self._app_verifiers.get(api_app_id)
+            if verifier is not None and verifier.verify(
+                timestamp, request_body, signature
+            ):
+                return api_app_id, True
+        if not named and any(
+            verifier.verify(timestamp, request_body, signature)
+            for verifier in self._app_verifiers.values()
+        ):
+            return None, True
+        return (
+            None,
+            self.signature_verifier.verify(timestamp, request_body, signature),
+        )
+
+    async def _read_body(
+        self,
+        body: AsyncIterator[bytes],
+        content_length: Optional[str],
+        verification: Optional[Verification],
+    ) -> Optional[bytes]:
+        # Return None once the body is known to be over max_body_size
+        max_body_size = self.max_body_size
+        if max_body_size is not None and content_length is not None:
+            if content_length.isdigit() and int(content_length) > max_body_size:
+                return None
+
+        chunks = []
+        size = 0
+        async for chunk in body:
+            if not chunk:
+                continue
+            size += len(chunk)
+            if max_body_size is not None and size > max_body_size:
+                return None
+            if verification is not None:
+                verification.update(chunk)
+            chunks.append(chunk)
+        # assembled once, and not copied at all when received in one chunk
+        if len(chunks) == 1:
+            return chunks[0]
+        return b"".join(chunks)
+
+    async def metrics_endpoint(self, request: Request) -> Response:
         return Response(
-            content="No event in request body",
-            media_type="text/plain",
-            status_code=403,
-            background=tasks,
+            content=self.metrics.render(),
+            media_type="text/plain; version=0.0.4",
         )
 
+    def _collect_metrics(self) -> Iterable[MetricFamily]:
+        # Export the counters kept by the other components of the app
+        dispatcher = self.dispatcher
+        yield (
+            "slackevent_dispatcher_queued",
+            "gauge",
+            "Handler calls waiting for a concurrency slot",
+            [
+                ("slackevent_dispatcher_queued", {"event": event}, count)
+                for event, count in dispatcher.queued_by_event.items()
+            ],
+        )
+        yield (
+            "slackevent_dispatcher_in_flight",
+            "gauge",
+            "Handler calls running",
+            [
+                ("slackevent_dispatcher_in_flight", {"event": event}, count)
+                for event, count in dispatcher.in_flight_by_event.items()
+            ],
+        )
+        yield (
+            "slackevent_handler_timeouts_total",
+            "counter",
+            "Handler calls which exceeded their timeout",
+            [
+                ("slackevent_handler_timeouts_total", {"event": event}, count)
+                for event, count in dispatcher.timeouts.items()
+            ],
+        )
+        scheduler = dispatcher.scheduler
+        if scheduler is not None:
+            yield (
+                "slackevent_scheduler_queued",
+                "gauge",
+                "Handler calls waiting for a slot, by priority class",
+                [
+                    (
+                        "slackevent_scheduler_queued",
+                        {"priority": priority},
+                        count,
+                    )
+                    for priority, count in scheduler.queued_by_priority.items()
+                ],
+            )
+            yield (
+                "slackevent_scheduler_queue_delay_seconds",
+                "histogram",
+                "Time handler calls waited for a slot, by priority class",
+                [
+                    sample
+                    for priority, histogram in sorted(
+                        scheduler.queue_delays.items()
+                    )
+                    for sample in histogram.samples(
+                        "slackevent_scheduler_queue_delay_seconds",
+                        {"priority": priority},
+                    )
+                ],
+            )
+        executors = self.dispatcher.executor_stats()
+        for name in ("saturation", "pending", "wait_time_max"):
+            metric = f"slackevent_executor_{name}"
+            yield (
+                metric,
+                "gauge",
+                f"Sync handler thread pool {name.replace('_', ' ')}",
+                [
+                    (metric, {"executor": executor}, stats[name])
+                    for executor, stats in executors.items()
+                ],
+            )
+        if self._batchers:
+            yield (
+                "slackevent_batch_size",
+                "histogram",
+                "Number of events in the batches passed to batch handlers",
+                [
+                    sample
+                    for (event, f), batcher in self._batchers.items()
+                    for sample in batcher.sizes.samples(
+                        "slackevent_batch_size",
+                        {"event": event, "handler": handler_name(f)},
+                    )
+                ],
+            )
+        if self._keyed:
+            yield (
+                "slackevent_ordered_queue_length",
+                "gauge",
+                "Calls running or waiting in each shard of ordered handlers",
+                [
+                    (
+                        "slackevent_ordered_queue_length",
+                        {
+                            "event": event,
+                            "handler": handler_name(f),
+                            "key": key,
+                        },
+                        length,
+                    )
+                    for (event, f), keyed in self._keyed.items()
+                    for key, length in keyed.queue_lengths().items()
+                ],
+            )
+        if self.dedup_cache is not None:
+            for name, value in self.dedup_cache.stats().items():
+                metric = f"slackevent_dedup_{name}"
+                yield (
+                    metric,
+                    "gauge" if name == "size" else "counter",
+                    f"Event dedup cache {name}",
+                    [(metric, {}, value)],
+                )
+        if self.cache is not None:
+            cache = self.cache
+            for name, counter in (
+                ("hits", cache.hits),
+                ("misses", cache.misses),
+            ):
+                metric = f"slackevent_cache_{name}_total"
+                yield (
+                    metric,
+                    "counter",
+                    f"Lookup cache {name}",
+                    [
+                        (metric, {"namespace": namespace}, count)
+                        for namespace, count in counter.items()
+                    ],
+                )
+            for name in ("size", "evictions", "invalidated"):
+                metric = f"slackevent_cache_{name}"
+                yield (
+                    metric,
+                    "gauge" if name == "size" else "counter",
+                    f"Lookup cache {name}",
+                    [(metric, {}, cache.stats()[name])],
+                )
+        if self.admission is not None:
+            admission = self.admission
+            for name in ("pending_events", "pending_bytes"):
+                metric = f"slackevent_admission_{name}"
+                yield (
+                    metric,
+                    "gauge",
+                    f"Admitted events' {name.replace('_', ' ')}",
+                    [(metric, {}, getattr(admission, name))],
+                )
+            yield (
+                "slackevent_admission_shed_total",
+                "counter",
+                "Events shed by admission control",
+                [
+                    (
+                        "slackevent_admission_shed_total",
+                        {"event": event, "policy": policy},
+                        count,
+                    )
+                    for policy, counter in (
+                        (REJECT, admission.rejected),
+                        (DROP, admission.dropped),
+                    )
+                    for event, count in counter.items()
+                ],
+            )
+
+    def _response(
+        self,
+        status_code: int,
+        content: str,
+        media_type: Optional[str],
+        tasks: Optional[BackgroundTask],
+    ) -> Response:
+        if media_type is None:
+            return self._ack_response(tasks)
+        return _ReplyResponse(content, status_code, media_type, tasks)
+
+    def _ack_response(self, tasks: Optional[BackgroundTask] = None) -> Response:
+        response = _ReplyResponse("", 200, tasks=tasks)
+        response.headers["X-Slack-Powered-By"] = self._package_info
+        return response
+
     def on(
-        self, event: Hashable, f: Callable[..., Any] = None
+        self,
+        event: Hashable,
+        f: Callable[..., Any] = None,
+        key: Union[None, str, KeyFunc] = None,
+        timeout: Optional[float] = None,
+        **filters: Any,
     ) -> Union[
         Callable[..., Any], Callable[[Callable[..., Any]], Callable[..., Any]]
     ]:
+        # filters are the keyword arguments of HandlerFilter, e.g.
+        # @app.on("message", subtype=None, channel="C024BE91L")
+        # With a key, calls for events of the same key run one at a time in
+        # arrival order, e.g. @app.on("message", key="channel")
+        # timeout overrides the dispatcher's timeouts for this handler
+        handler_filter = HandlerFilter(**filters)
+
         def _on(f: Callable[..., Any]) -> Callable[..., Any]:
-            self._add_handler(event, f, f)
+            dispatcher = self.dispatcher
+            self._add_handler(event, f, f, handler_filter, timeout)
+            if key is not None:
+                keyed = KeyedExecutor(
+                    dispatcher.event_executors.get(event, dispatcher.executor)
+                )
+                self._keyed[event, f] = keyed
+                dispatcher.handler_keys[event, f] = (keyed, key_func(key))
             return f
 
         if f is None:
@@ -171,26 +1070,34 @@ class SlackEventApp(Router):
             return _on(f)
 
     def once(
-        self, event: Hashable, f: Callable[..., Any] = None
+        self,
+        event: Hashable,
+        f: Callable[..., Any] = None,
+        timeout: Optional[float] = None,
+        **filters: Any,
     ) -> Union[
         Callable[..., Any], Callable[[Callable[..., Any]], Callable[..., Any]]
     ]:
+        handler_filter = HandlerFilter(**filters)
+
         def _wrapper(f: Callable[..., Any]) -> Callable[..., Any]:
             if asyncio.iscoroutinefunction(f):
 
+                @functools.wraps(f)
                 async def asyncg(*args: Any, **kwargs: Any) -> Any:
                     self.remove_handler(event, f)
                     return await f(*args, **kwargs)
 
-                self._add_handler(event, f, asyncg)
+                self._add_handler(event, f, asyncg, handler_filter, timeout)
                 return f
             else:
 
+                @functools.wraps(f)
                 def g(*args: Any, **kwargs: Any) -> Any:
                     self.remove_handler(event, f)
                     return f(*args, **kwargs)
 
-                self._add_handler(event, f, g)
+                self._add_handler(event, f, g, handler_filter, timeout)
                 return f
 
         if f is None:
@@ -198,40 +1105,217 @@ class SlackEventApp(Router):
         else:
             return _wrapper(f)
 
+    def on_batch(
+        self,
+        event: Hashable,
+        f: Callable[..., Any] = None,
+        max_size: int = 100,
+        max_wait: float = 1.0,
+        **filters: Any,
+    ) -> Union[
+        Callable[..., Any], Callable[[Callable[..., Any]], Callable[..., Any]]
+    ]:
+        # f is called with a list of up to max_size events, e.g.
+        # @app.on_batch("reaction_added", max_size=50, max_wait=0.5)
+        handler_filter = HandlerFilter(**filters)
+
+        def _on_batch(f: Callable[..., Any]) -> Callable[..., Any]:
+            batcher = EventBatcher(
+                f,
+                max_size,
+                max_wait,
+                self.dispatcher.event_executors.get(
+                    event, self.dispatcher.executor
+                ),
+            )
+
+            @functools.wraps(f)
+            async def add(event_data: Any) -> None:
+                await batcher.add(event_data)
+
+            self._add_handler(event, f, add, handler_filter)
+            self._batchers[event, f] = batcher
+            # events wait for their batch without holding a slot, nor being
+            # timed out by the dispatcher
+            self.dispatcher.slotless_handlers.add((event, add))
+            return f
+
+        if f is None:
+            return _on_batch
+        else:
+            return _on_batch(f)
+
+    def before(
+        self,
+        f: Optional[Callable[..., Any]] = None,
+        events: Optional[Collection[Hashable]] = None,
+    ) -> Union[
+        Callable[..., Any], Callable[[Callable[..., Any]], Callable[..., Any]]
+    ]:
+        # f(event_type, *args) may return False to skip the handlers
+        return self._add_middleware(BEFORE, f, events)
+
+    def after(
+        self,
+        f: Optional[Callable[..., Any]] = None,
+        events: Optional[Collection[Hashable]] = None,
+    ) -> Union[
+        Callable[..., Any], Callable[[Callable[..., Any]], Callable[..., Any]]
+    ]:
+        # f(event_type, *args) runs once the handlers succeeded
+        return self._add_middleware(AFTER, f, events)
+
+    def around(
+        self,
+        f: Optional[Callable[..., Any]] = None,
+        events: Optional[Collection[Hashable]] = None,
+    ) -> Union[
+        Callable[..., Any], Callable[[Callable[..., Any]], Callable[..., Any]]
+    ]:
+        # f(event_type, call_next, *args) runs the handlers with call_next()
+        return self._add_middleware(AROUND, f, events)
+
+    def _add_middleware(
+        self,
+        kind: str,
+        f: Optional[Callable[..., Any]],
+        events: Optional[Collection[Hashable]],
+    ) -> Union[
+        Callable[..., Any], Callable[[Callable[..., Any]], Callable[..., Any]]
+    ]:
+        def _add(f: Callable[..., Any]) -> Callable[..., Any]:
+            self._middleware = (*self._middleware, Middleware(kind, f, events))
+            self._compile()
+            return f
+
+        if f is None:
+            return _add
+        else:
+            return _add(f)
+
+    def remove_middleware(self, f: Callable[..., Any]) -> None:
+        self._middleware = tuple(m for m in self._middleware if m.hook != f)
+        self._compile()
+
     def _add_handler(
+        self,
+        event: Hashable,
+        k: Callable[..., Any],
+        v: Callable[..., Any],
+        handler_filter: Optional[HandlerFilter] = None,
+        timeout: Optional[float] = None,
+    ) -> None:
+        handlers = self._handlers.setdefault(event, OrderedDict())
+        previous = handlers.get(k)
+        if previous is not None:
+            self._forget_handler(event, k, previous)
+        handlers[k] = v
+        if timeout is not None:
+            self.dispatcher.handler_timeouts[event, v] = timeout
+        if handler_filter is not None and not handler_filter.is_empty:
+            self._filters[event, k] = handler_filter
+        self._compile(event)
+
+    def _forget_handler(
         self, event: Hashable, k: Callable[..., Any], v: Callable[..., Any]
     ) -> None:
-        self._handlers[event][k] = v
+        # Drop what was registered along handler k, called as v, so that
+        # removed handlers leave no state behind, nor metrics
+        dispatcher = self.dispatcher
+        dispatcher.handler_timeouts.pop((event, v), None)
+        dispatcher.handler_keys.pop((event, v), None)
+        dispatcher.slotless_handlers.discard((event, v))
+        self._filters.pop((event, k), None)
+        self._batchers.pop((event, k), None)
+        self._keyed.pop((event, k), None)
+
+    def _compile(self, event: Hashable = None) -> None:
+        # Rebuild the dispatch plans of event, or of every event, into a new
+        # dict swapped in as a whole: requests read the plans without
+        # locking, and never see a partly updated registry.
+        if event is not None:
+            plans = dict(self._plans)
+            events: Iterable[Hashable] = (event,)
+        else:
+            plans = {}
+            events = list(self._handlers)
+        for event in events:
+            handlers = self._handlers.get(event)
+            if handlers:
+                plans[event] = DispatchPlan(
+                    HandlerIndex(
+                        [
+                            (v, self._filters.get((event, k)))
+                            for k, v in handlers.items()
+                        ]
+                    ),
+                    self.dispatcher.run,
+                    [m for m in self._middleware if m.applies(event)],
+                )
+            else:
+                # don't keep entries for event types without handlers
+                self._handlers.pop(event, None)
+                plans.pop(event, None)
+        self._plans = plans
+        self._routing_names = self._compile_routing_names()
+
+    def _compile_routing_names(self) -> Tuple[bytes, ...]:
+        # JSON encoded event types which have a handler, plus the URL
+        # verification request type, which is always answered
+        names = {"url_verification"}
+        if self.cache is not None:
+            # parsed for their invalidations even without handlers
+            names.update(self.cache.invalidations)
+        for event in self._plans:
+            if isinstance(event, str):
+                names.add(event)
+        return tuple(json.dumps(name).encode() for name in sorted(names))
+
+    def _get_routing_names(self) -> Tuple[bytes, ...]:
+        return self._routing_names
 
     def _tasks_from_event(
         self, event: Hashable, *args: Any, **kwargs: Any
-    ) -> BackgroundTasks:
-        tasks = BackgroundTasks()
-        for f in list(self._handlers[event].values()):
-            tasks.add_task(f, *args, **kwargs)
-
-        return tasks
+    ) -> BackgroundTask:
+        cache = self.cache
+        if cache is not None and event in cache.invalidations:
+            # before the handlers of the event can look the entries up
+            cache.invalidate_event(str(event), args[0])
+        plan = self._plans.get(event)
+        if plan is None:
+            return _NO_TASKS
+        handlers = plan.match(args)
+        if not handlers:
+            return _NO_TASKS
+        return BackgroundTask(plan.run, event, handlers, *args, **kwargs)
 
     def remove_handler(self, event: Hashable, f: Callable[..., Any]) -> None:
-        self._handlers[event].pop(f)
+        v = self._handlers.get(event, {}).pop(f)
+        self._forget_handler(event, f, v)
+        self._compile(event)
 
     def remove_all_handlers(self, event: Hashable = None) -> None:
         if event is not None:
-            self._handlers[event] = {}
+            for f, v in self._handlers.pop(event, {}).items():
+                self._forget_handler(event, f, v)
+            self._compile(event)
         else:
-            self._handlers = defaultdict(OrderedDict)
+            self._handlers = {}
+            self._filters.clear()
+            self._batchers.clear()
+            self._keyed.clear()
+            self.dispatcher.handler_timeouts.clear()
+            self.dispatcher.handler_keys.clear()
+            self.dispatcher.slotless_handlers.clear()
+            self._compile()
 
     def handlers(self, event: Hashable) -> List[Callable[..., Any]]:
-        return list(self._handlers[event].keys())
+        return list(self._handlers.get(event, {}))
 
 
-class SlackEventAppException(Exception):
-    """
-    Base exception for all errors raised by the SlackEventHandler library
-    """
+async def _no_handlers() -> None:
+    pass
+
 
-    def __init__(self, msg: str = None):
-        if msg is None:
-            # default error message
-            msg = "An error occurred in the SlackEventHandler library"
-        super().__init__(msg)
+# shared by all events without handlers, it holds no state
+_NO_TASKS = BackgroundTask(_no_handlers)
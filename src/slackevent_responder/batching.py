@@ -0,0 +1,120 @@
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from .executor import HandlerExecutor
+from .metrics import Histogram
+
+
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class EventBatcher:
+    """
+    Groups events into lists passed to a batch handler
+
+    A batch is flushed once it holds ``max_size`` events, or ``max_wait``
+    seconds after its first event. ``add()`` returns once the batch of the
+    event has been handled, so that the event log and admission control
+    account for batched events until then. When the batch handler fails,
+    the exception is raised once per batch, by the ``add()`` of its first
+    event.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[List[Any]], Any],
+        max_size: int = 100,
+        max_wait: float = 1.0,
+        executor: Optional[HandlerExecutor] = None,
+    ):
+        if max_size <= 0:
+            raise ValueError("max_size must be greater than 0")
+        self.callback = callback
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self.executor = executor
+
+        self._batch: List[Any] = []
+        self._done: Optional["asyncio.Future[None]"] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: Set["asyncio.Task[None]"] = set()
+
+        self.sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.events = 0
+        self.batches = 0
+        self.failed = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._batch)
+
+    async def add(self, event: Any) -> None:
+        if self._done is None:
+            loop = asyncio.get_event_loop()
+            self._done = loop.create_future()
+            self._timer = loop.call_later(self.max_wait, self._flush_soon)
+        done = self._done
+        first = not self._batch
+        self._batch.append(event)
+        self.events += 1
+        if len(self._batch) >= self.max_size:
+            self._flush_soon()
+
+        # shielded, the batch still runs if this event's task is cancelled
+        try:
+            await asyncio.shield(done)
+        except Exception:
+            if first:
+                raise
+
+    async def flush(self) -> None:
+        """
+        Flush the pending batch, and wait for the batches being flushed
+        """
+        if self._done is not None:
+            await self._run(*self._take())
+        while self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def _flush_soon(self) -> None:
+        # the batch is taken right away, later events go to the next one
+        task = asyncio.ensure_future(self._run(*self._take()))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    def _take(self) -> Tuple[List[Any], "asyncio.Future[None]"]:
+        assert self._done is not None
+        batch, done = self._batch, self._done
+        self._batch, self._done = [], None
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch, done
+
+    async def _run(
+        self, batch: List[Any], done: "asyncio.Future[None]"
+    ) -> None:
+        self.batches += 1
+        self.sizes.observe(len(batch))
+        try:
+            if asyncio.iscoroutinefunction(self.callback):
+                await self.callback(batch)
+            elif self.executor is not None:
+                await self.executor.run(self.callback, batch)
+            else:
+                await run_in_threadpool(self.callback, batch)
+        except Exception as e:
+            self.failed += 1
+            done.set_exception(e)
+        else:
+            done.set_result(None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "events": self.events,
+            "batches": self.batches,
+            "failed": self.failed,
+            "pending": self.pending,
+        }
@@ -0,0 +1,274 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from starlette.concurrency import run_in_threadpool
+
+
+# Keys of the entries an event makes stale
+KeysFunc = Callable[[Any], Iterable[Hashable]]
+
+
+def _user_keys(event: Any) -> Iterable[Hashable]:
+    user = event.event.get("user")
+    if isinstance(user, dict):
+        user = user.get("id")
+    return [("users.info", user)] if user else []
+
+
+def _channel_keys(event: Any) -> Iterable[Hashable]:
+    channel = event.event.get("channel")
+    if isinstance(channel, dict):
+        channel = channel.get("id")
+    return [("conversations.info", channel)] if channel else []
+
+
+def _bot_keys(event: Any) -> Iterable[Hashable]:
+    bot = event.event.get("bot")
+    bot_id = bot.get("id") if isinstance(bot, dict) else None
+    return [("bots.info", bot_id)] if bot_id else []
+
+
+DEFAULT_INVALIDATIONS: Dict[str, KeysFunc] = {
+    "user_change": _user_keys,
+    "user_profile_changed": _user_keys,
+    "channel_rename": _channel_keys,
+    "channel_archive": _channel_keys,
+    "channel_unarchive": _channel_keys,
+    "channel_deleted": _channel_keys,
+    "group_rename": _channel_keys,
+    "group_archive": _channel_keys,
+    "group_unarchive": _channel_keys,
+    "group_deleted": _channel_keys,
+    "bot_changed": _bot_keys,
+}
+
+
+# returned by lookups which found their entry
+_DONE: "concurrent.futures.Future[Any]" = concurrent.futures.Future()
+
+
+def _namespace(key: Hashable) -> str:
+    # hit rates are counted by the first item of tuple keys
+    if isinstance(key, tuple) and key:
+        return str(key[0])
+    return ""
+
+
+class LookupCache:
+    """
+    Cache of Web API lookups shared by the handlers of an app
+
+    ``get()`` from async handlers and ``get_sync()`` from sync ones return
+    the cached value of ``key``, or else call ``loader`` to get it.
+    Concurrent misses of a key, from the event loop and handler threads
+    alike, share a single call of ``loader``; failures aren't cached.
+    Entries expire ``ttl`` seconds after they were loaded, and are evicted
+    in LRU order past ``max_size``.
+
+    Keys are tuples of a Web API method and an ID, like
+    ``("users.info", "U0123")``, for the events of ``invalidations`` to
+    drop the entries they make stale, and for hit rates to be counted by
+    method. ``DEFAULT_INVALIDATIONS`` covers users, channels and bots.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        ttl: float = 5 * 60,
+        invalidations: Optional[Mapping[str, KeysFunc]] = None,
+    ):
+        if max_size <= 0:
+            raise ValueError("max_size must be a positive integer")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.invalidations = {**DEFAULT_INVALIDATIONS, **(invalidations or {})}
+
+        # handler threads and the event loop share the cache
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = (
+            OrderedDict()
+        )
+        self._loads: Dict[Hashable, "concurrent.futures.Future[Any]"] = {}
+        # async loads, referenced until they're done as the event loop only
+        # keeps weak references to tasks
+        self._tasks: Set["asyncio.Task[Any]"] = set()
+
+        self.hits: "Counter[str]" = Counter()
+        self.misses: "Counter[str]" = Counter()
+        self.evictions = 0
+        self.invalidated = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(
+        self,
+        key: Hashable,
+        loader: Callable[..., Any],
+        *args: Any,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        Cached value of ``key``, loaded by ``loader(*args, **kwargs)``,
+        a sync function run in a thread or a coroutine function
+        """
+        found, value, future, owner = self._lookup(key)
+        if found:
+            return value
+        if owner:
+            # loaded in a task of its own, cancelling a handler waiting for
+            # it doesn't cancel the load shared with other handlers
+            task = asyncio.ensure_future(
+                self._load_async(key, future, loader, args, kwargs)
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def get_sync(
+        self,
+        key: Hashable,
+        loader: Callable[..., Any],
+        *args: Any,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        ``get()`` for sync handlers, which block on concurrent loads of
+        ``key``; ``loader`` must be a sync function
+        """
+        found, value, future, owner = self._lookup(key)
+        if found:
+            return value
+        if owner:
+            try:
+                result = loader(*args, **kwargs)
+            except BaseException as e:
+                self._fail(key, future, e)
+                raise
+            self._store(key, future, result)
+            return result
+        return future.result()
+
+    def _lookup(
+        self, key: Hashable
+    ) -> Tuple[bool, Any, "concurrent.futures.Future[Any]", bool]:
+        # (found, value, load to wait for, whether the caller must run it)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits[_namespace(key)] += 1
+                    return True, value, _DONE, False
+                del self._entries[key]
+                self.evictions += 1
+            self.misses[_namespace(key)] += 1
+            future = self._loads.get(key)
+            if future is not None:
+                return False, None, future, False
+            future = self._loads[key] = concurrent.futures.Future()
+            return False, None, future, True
+
+    async def _load_async(
+        self,
+        key: Hashable,
+        future: "concurrent.futures.Future[Any]",
+        loader: Callable[..., Any],
+        args: Tuple[Any, ...],
+        kwargs: Dict[str, Any],
+    ) -> None:
+        try:
+            if asyncio.iscoroutinefunction(loader):
+                result = await loader(*args, **kwargs)
+            else:
+                result = await run_in_threadpool(loader, *args, **kwargs)
+        except BaseException as e:
+            self._fail(key, future, e)
+            if not isinstance(e, Exception):
+                raise
+        else:
+            self._store(key, future, result)
+
+    def _store(
+        self,
+        key: Hashable,
+        future: "concurrent.futures.Future[Any]",
+        value: Any,
+    ) -> None:
+        with self._lock:
+            # not cached when invalidated while it was loading
+            if self._loads.get(key) is future:
+                del self._loads[key]
+                self._entries[key] = (time.monotonic() + self.ttl, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        future.set_result(value)
+
+    def _fail(
+        self,
+        key: Hashable,
+        future: "concurrent.futures.Future[Any]",
+        e: BaseException,
+    ) -> None:
+        with self._lock:
+            if self._loads.get(key) is future:
+                del self._loads[key]
+        future.set_exception(e)
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        Drop the entry of ``key``, and don't cache the value being loaded
+        for it, if any
+        """
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.invalidated += 1
+            self._loads.pop(key, None)
+
+    def invalidate_event(self, event_type: str, event: Any) -> None:
+        """
+        Drop the entries made stale by ``event``, by its rule in
+        ``invalidations``
+        """
+        keys = self.invalidations.get(event_type)
+        if keys is not None:
+            for key in keys(event):
+                self.invalidate(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._loads.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        hits = sum(self.hits.values())
+        total = hits + sum(self.misses.values())
+        return hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "size": len(self._entries),
+            "hits": sum(self.hits.values()),
+            "misses": sum(self.misses.values()),
+            "evictions": self.evictions,
+            "invalidated": self.invalidated,
+            "hit_rate": self.hit_rate,
+        }
@@ -0,0 +1,85 @@
+import time
+from collections import OrderedDict
+from typing import Dict
+
+
+class DedupCache:
+    """
+    Bounded cache of recently seen Slack ``event_id`` values
+
+    Slack retries deliveries it considers failed (see ``X-Slack-Retry-Num``),
+    so the same event may reach the endpoint several times. Entries are
+    evicted in LRU order once ``max_size`` is reached, and expire ``ttl``
+    seconds after they were first seen.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 60 * 60):
+        if max_size <= 0:
+            raise ValueError("max_size must be a positive integer")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, event_id: object) -> bool:
+        if not isinstance(event_id, str):
+            return False
+        expires_at = self._entries.get(event_id)
+        return expires_at is not None and expires_at > time.monotonic()
+
+    def seen(self, event_id: str) -> bool:
+        """
+        Return True if ``event_id`` was already seen, otherwise record it
+        """
+        now = time.monotonic()
+        expires_at = self._entries.get(event_id)
+        if expires_at is not None:
+            if expires_at > now:
+                self._entries.move_to_end(event_id)
+                self.hits += 1
+                return True
+            # expired entry, drop it and treat as a new event
+            del self._entries[event_id]
+            self.evictions += 1
+
+        self.misses += 1
+        self._expire(now)
+        self._entries[event_id] = now + self.ttl
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return False
+
+    def forget(self, event_id: str) -> None:
+        """
+        Drop ``event_id``, for a retried delivery of it to be dispatched
+        """
+        self._entries.pop(event_id, None)
+
+    def _expire(self, now: float) -> None:
+        # Entries are kept roughly in insertion order, so expired entries
+        # accumulate at the head and can be dropped without a full scan.
+        entries = self._entries
+        while entries:
+            event_id, expires_at = next(iter(entries.items()))
+            if expires_at > now:
+                break
+            del entries[event_id]
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
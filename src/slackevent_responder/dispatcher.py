@@ -0,0 +1,371 @@
+import asyncio
+import sys
+import threading
+import traceback
+from collections import Counter
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+from starlette.background import BackgroundTask
+
+from .exceptions import HandlerTimeout
+from .executor import HandlerExecutor
+from .metrics import Metrics, NullMetrics, handler_name
+from .ordering import KeyedExecutor, KeyFunc
+from .scheduler import PriorityScheduler
+from .tracing import NULL_SPAN, NullTracer, Tracer
+from .workers import ProcessWorkerPool
+
+
+class Dispatcher:
+    """
+    Runs the handlers of an event concurrently
+
+    ``concurrency`` bounds the number of handlers running at once across all
+    events, and ``event_concurrency`` bounds it per event type. Handlers
+    waiting for a free slot are counted as queued until they start.
+
+    Synchronous handlers run on ``executor``, or on the entry of
+    ``event_executors`` for their event type when there is one. With a
+    ``process_pool``, handlers of every event but ``"error"`` run in worker
+    processes instead, and their exceptions are passed to ``error_handler``.
+
+    A ``scheduler`` bounds the number of running handlers across all events
+    like ``concurrency`` does, but starts queued handlers by the priority
+    of their event type.
+
+    Handlers get a timeout from ``handler_timeouts``, ``event_timeouts`` or
+    ``timeout``, in that order. Async handlers are cancelled once it
+    expires, while sync handlers and those in worker processes are only
+    reported, as they can't be interrupted. Either way, a ``HandlerTimeout``
+    is passed to ``error_handler``.
+
+    With a ``tracer``, each handler call gets a span, child of the span of
+    the request of its event, and current while the handler runs.
+    """
+
+    def __init__(
+        self,
+        concurrency: Optional[int] = None,
+        event_concurrency: Optional[Mapping[Hashable, int]] = None,
+        executor: Optional[HandlerExecutor] = None,
+        event_executors: Optional[Mapping[Hashable, HandlerExecutor]] = None,
+        metrics: Optional[Metrics] = None,
+        process_pool: Optional[ProcessWorkerPool] = None,
+        scheduler: Optional[PriorityScheduler] = None,
+        timeout: Optional[float] = None,
+        event_timeouts: Optional[Mapping[Hashable, float]] = None,
+        tracer: Optional[Tracer] = None,
+    ):
+        if concurrency is not None and scheduler is not None:
+            raise ValueError("concurrency is set by the scheduler")
+        self.concurrency = concurrency
+        self.event_concurrency = dict(event_concurrency or {})
+        self.executor = executor if executor is not None else HandlerExecutor()
+        self.event_executors = dict(event_executors or {})
+        self.metrics = metrics if metrics is not None else NullMetrics()
+        self.process_pool = process_pool
+        self.scheduler = scheduler
+        self.timeout = timeout
+        self.event_timeouts = dict(event_timeouts or {})
+        self.tracer = tracer if tracer is not None else NullTracer()
+        # set by SlackEventApp for handlers registered with a timeout, or
+        # None for those not to be timed
+        self.handler_timeouts: Dict[
+            Tuple[Hashable, Callable[..., Any]], Optional[float]
+        ] = {}
+        # set by SlackEventApp for handlers whose calls run one at a time
+        # per key, with the executor ordering them and the key function
+        self.handler_keys: Dict[
+            Tuple[Hashable, Callable[..., Any]], Tuple[KeyedExecutor, KeyFunc]
+        ] = {}
+        # set by SlackEventApp for handlers that only hand events over, like
+        # those of batches, which take no slot and aren't timed
+        self.slotless_handlers: Set[Tuple[Hashable, Callable[..., Any]]] = set()
+        # set by SlackEventApp to emit the error event
+        self.error_handler: Optional[
+            Callable[[BaseException], Awaitable[None]]
+        ] = None
+
+        # Semaphores are created lazily so that they bind to the running loop
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._event_semaphores: Dict[Hashable, asyncio.Semaphore] = {}
+
+        self._queued: "Counter[Hashable]" = Counter()
+        self._in_flight: "Counter[Hashable]" = Counter()
+        self.timeouts: "Counter[Hashable]" = Counter()
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(self._queued.values())
+
+    @property
+    def in_flight(self) -> int:
+        return sum(self._in_flight.values())
+
+    @property
+    def queued_by_event(self) -> Dict[Hashable, int]:
+        return +self._queued
+
+    @property
+    def in_flight_by_event(self) -> Dict[Hashable, int]:
+        return +self._in_flight
+
+    def stats(self) -> Dict[str, Union[int, Dict[Hashable, int]]]:
+        return {
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "queued_by_event": self.queued_by_event,
+            "in_flight_by_event": self.in_flight_by_event,
+        }
+
+    def executor_stats(self) -> Dict[str, Dict[str, Union[int, float]]]:
+        stats = {"default": self.executor.stats()}
+        for event, executor in self.event_executors.items():
+            stats[str(event)] = executor.stats()
+        return stats
+
+    async def warm(self) -> None:
+        """
+        Start the threads and processes handlers run on
+        """
+        executors = {self.executor, *self.event_executors.values()}
+        await asyncio.gather(*(executor.warm() for executor in executors))
+        if self.process_pool is not None:
+            await self.process_pool.warm()
+
+    def shutdown(self, wait: bool = True) -> None:
+        for executor in {self.executor, *self.event_executors.values()}:
+            executor.shutdown(wait=wait)
+        if self.process_pool is not None:
+            self.process_pool.shutdown(wait=wait)
+
+    def dispatch(
+        self,
+        event: Hashable,
+        handlers: Sequence[Callable[..., Any]],
+        *args: Any,
+        **kwargs: Any,
+    ) -> BackgroundTask:
+        return BackgroundTask(self.run, event, handlers, *args, **kwargs)
+
+    async def run(
+        self,
+        event: Hashable,
+        handlers: Sequence[Callable[..., Any]],
+        *args: Any,
+        **kwargs: Any,
+    ) -> None:
+        if not handlers:
+            return
+        if len(handlers) == 1:
+            await self._run_handler(event, handlers[0], args, kwargs)
+            return
+
+        results = await asyncio.gather(
+            *(self._run_handler(event, f, args, kwargs) for f in handlers),
+            return_exceptions=True,
+        )
+        # Every handler gets to run, then the first failure is propagated
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+    async def _run_handler(
+        self,
+        event: Hashable,
+        f: Callable[..., Any],
+        args: Sequence[Any],
+        kwargs: Dict[str, Any],
+    ) -> None:
+        keyed = self.handler_keys.get((event, f))
+        if keyed is None:
+            await self._run_in_slot(event, f, args, kwargs)
+            return
+        # The call waits for its key before taking a slot, for calls of
+        # other keys not to wait behind it
+        executor, get_key = keyed
+        await executor.run(
+            get_key(args[0]), self._run_in_slot, event, f, args, kwargs
+        )
+
+    async def _run_in_slot(
+        self,
+        event: Hashable,
+        f: Callable[..., Any],
+        args: Sequence[Any],
+        kwargs: Dict[str, Any],
+    ) -> None:
+        slotless = (event, f) in self.slotless_handlers
+        semaphores = () if slotless else self._semaphores_for(event)
+        scheduler = None if slotless else self.scheduler
+        acquired = []
+        self._queued[event] += 1
+        try:
+            for semaphore in semaphores:
+                await semaphore.acquire()
+                acquired.append(semaphore)
+            if scheduler is not None:
+                await scheduler.acquire(event)
+        except BaseException:
+            for semaphore in acquired:
+                semaphore.release()
+            raise
+        finally:
+            self._queued[event] -= 1
+
+        self._in_flight[event] += 1
+        started = self.metrics.start()
+        span = (
+            self.tracer.start_span(
+                "slack.handler",
+                {
+                    "slack.event_type": str(event),
+                    "slack.handler": handler_name(f),
+                },
+            )
+            if self.tracer.enabled
+            else NULL_SPAN
+        )
+        # copied into the context of handler threads by the executor
+        token = span.activate()
+        pool = self.process_pool
+        timeout = None if slotless else self.timeout_for(event, f)
+        try:
+            if pool is not None and event != "error" and pool.accepts(f):
+                try:
+                    await self._watch(
+                        event, f, timeout, pool.run(f, *args, **kwargs)
+                    )
+                except Exception as e:
+                    if self.error_handler is None:
+                        raise
+                    span.record_error(e)
+                    self.metrics.observe_handler(event, f, started, error=True)
+                    await self.error_handler(e)
+                    return
+            else:
+                await self.call(event, f, timeout, *args, **kwargs)
+        except HandlerTimeout as e:
+            span.record_error(e)
+            self.metrics.observe_handler(event, f, started, error=True)
+            self.timeouts[event] += 1
+            if self.error_handler is None or event == "error":
+                raise
+            await self.error_handler(e)
+        except Exception as e:
+            span.record_error(e)
+            self.metrics.observe_handler(event, f, started, error=True)
+            raise
+        else:
+            self.metrics.observe_handler(event, f, started)
+        finally:
+            span.deactivate(token)
+            span.end()
+            self._in_flight[event] -= 1
+            if scheduler is not None:
+                scheduler.release()
+            for semaphore in acquired:
+                semaphore.release()
+
+    async def call(
+        self,
+        event: Hashable,
+        f: Callable[..., Any],
+        timeout: Optional[float],
+        *args: Any,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        Call handler ``f`` of ``event`` on the event loop or in a thread,
+        within ``timeout``
+
+        Raises ``HandlerTimeout`` when an async handler is cancelled, while
+        sync handlers past their timeout are reported and waited for.
+        """
+        if asyncio.iscoroutinefunction(f):
+            if timeout is None:
+                return await f(*args, **kwargs)
+            try:
+                return await asyncio.wait_for(f(*args, **kwargs), timeout)
+            except asyncio.TimeoutError:
+                raise HandlerTimeout(event, f, timeout) from None
+
+        executor = self.event_executors.get(event, self.executor)
+        if timeout is None:
+            return await executor.run(f, *args, **kwargs)
+        threads: List[int] = []
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            threads.append(threading.get_ident())
+            return f(*args, **kwargs)
+
+        return await self._watch(
+            event, f, timeout, executor.run(call, *args, **kwargs), threads
+        )
+
+    def timeout_for(
+        self, event: Hashable, f: Callable[..., Any]
+    ) -> Optional[float]:
+        # None registered for f means no timeout, rather than the defaults
+        if (event, f) in self.handler_timeouts:
+            return self.handler_timeouts[event, f]
+        return self.event_timeouts.get(event, self.timeout)
+
+    async def _watch(
+        self,
+        event: Hashable,
+        f: Callable[..., Any],
+        timeout: Optional[float],
+        call: Awaitable[Any],
+        threads: Optional[List[int]] = None,
+    ) -> Any:
+        # Handlers running in a thread or a worker process can't be
+        # interrupted: past their timeout, report them and keep waiting.
+        future = asyncio.ensure_future(call)
+        if timeout is not None:
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), timeout)
+            except asyncio.TimeoutError:
+                pass
+            stack = None
+            if threads:
+                frame = sys._current_frames().get(threads[0])
+                if frame is not None:
+                    stack = "".join(traceback.format_stack(frame))
+            self.timeouts[event] += 1
+            if self.error_handler is not None and event != "error":
+                await self.error_handler(
+                    HandlerTimeout(event, f, timeout, stack)
+                )
+        return await future
+
+    def _semaphores_for(self, event: Hashable) -> Sequence[asyncio.Semaphore]:
+        # The per event type slot is taken first, so a handler blocked on its
+        # own event type doesn't hold on to a global slot meanwhile.
+        semaphores = []
+        limit = self.event_concurrency.get(event)
+        if limit is not None:
+            semaphore = self._event_semaphores.get(event)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(limit)
+                self._event_semaphores[event] = semaphore
+            semaphores.append(semaphore)
+
+        if self.concurrency is not None:
+            if self._semaphore is None:
+                self._semaphore = asyncio.Semaphore(self.concurrency)
+            semaphores.append(self._semaphore)
+        return semaphores
@@ -0,0 +1,113 @@
+import json
+from typing import Any, Callable, Iterable, Optional
+
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
+
+JSONLoads = Callable[[bytes], Any]
+
+
+def default_json_loads() -> JSONLoads:
+    """
+    Return the fastest JSON decoder available, orjson if it's installed
+    """
+    if orjson is not None:
+        return orjson.loads
+    return json.loads
+
+
+def _json_dumps(data: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data).encode()
+
+
+_UNPARSED = object()
+
+
+class EventEnvelope:
+    """
+    Request body of an Events API request, parsed on first access
+
+    Only the fields needed for routing are exposed, and the body is decoded
+    once, when one of them or ``data`` is read. An envelope can also be
+    built from the decoded ``data`` alone, the body being encoded only when
+    it's read then.
+    """
+
+    __slots__ = ("_body", "_loads", "_data", "_size")
+
+    def __init__(
+        self,
+        body: Optional[bytes],
+        loads: Optional[JSONLoads] = None,
+        data: Any = None,
+        size: Optional[int] = None,
+    ):
+        # data is the body already decoded, if it was, and size the length
+        # of the payload as it was received
+        if body is None and data is None:
+            raise ValueError("Either body or data is required")
+        self._body = body
+        self._loads = loads if loads is not None else json.loads
+        self._data: Any = data if data is not None else _UNPARSED
+        self._size = size
+
+    @property
+    def body(self) -> bytes:
+        if self._body is None:
+            self._body = _json_dumps(self._data)
+        return self._body
+
+    @property
+    def size(self) -> int:
+        if self._size is None:
+            self._size = len(self.body)
+        return self._size
+
+    @property
+    def parsed(self) -> bool:
+        return self._data is not _UNPARSED
+
+    @property
+    def data(self) -> Any:
+        """
+        The decoded body, which raises ``ValueError`` when it isn't a JSON
+        object
+        """
+        if self._data is _UNPARSED:
+            data = self._loads(self.body)
+            if not isinstance(data, dict):
+                raise ValueError("Request body is not a JSON object")
+            self._data = data
+        return self._data
+
+    @property
+    def type(self) -> Optional[str]:
+        return self.data.get("type")
+
+    @property
+    def event_type(self) -> Optional[str]:
+        event = self.data.get("event")
+        if isinstance(event, dict):
+            return event.get("type")
+        return None
+
+    @property
+    def event_id(self) -> Optional[str]:
+        return self.data.get("event_id")
+
+    def mentions(self, names: Iterable[bytes]) -> bool:
+        """
+        Tell whether any of the JSON encoded strings in ``names`` occurs in
+        the raw body, without parsing it
+
+        A False answer guarantees that no value of the body equals one of
+        ``names``, as JSON encoders don't escape plain ASCII identifiers.
+        """
+        body = self.body
+        return any(name in body for name in names)
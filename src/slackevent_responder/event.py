@@ -0,0 +1,117 @@
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .envelope import default_json_loads
+
+
+_UNSET = object()
+
+
+class SlackEvent(Dict[str, Any]):
+    """
+    Events API payload passed to event handlers
+
+    Exposes the commonly used fields of the envelope and of the inner event,
+    and is still the payload dict, e.g.
+    ``event_data["event"]["item"]["channel"]``, for existing handlers.
+    """
+
+    __slots__ = ("_body", "_channel", "_user")
+
+    def __init__(self, data: Dict[str, Any], body: Optional[bytes] = None):
+        super().__init__(data)
+        # raw body the payload was parsed from, if given, pickled instead of
+        # the payload when the event is sent to another process. The app
+        # only gives it when handlers may run in worker processes.
+        self._body = body
+        self._channel: Any = _UNSET
+        self._user: Any = _UNSET
+
+    def __reduce__(self) -> Tuple[Callable[..., "SlackEvent"], Tuple[Any, ...]]:
+        if self._body is not None:
+            return _from_body, (self._body,)
+        return SlackEvent, (dict(self),)
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(type={self.type!r}, "
+            f"event_id={self.event_id!r})"
+        )
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        """
+        The payload, which is the event itself
+        """
+        return self
+
+    @property
+    def event(self) -> Dict[str, Any]:
+        """
+        The inner event, or an empty dict for payloads without one
+        """
+        event = self.get("event")
+        return event if isinstance(event, dict) else {}
+
+    @property
+    def team_id(self) -> Optional[str]:
+        return self.get("team_id")
+
+    @property
+    def api_app_id(self) -> Optional[str]:
+        return self.get("api_app_id")
+
+    @property
+    def event_id(self) -> Optional[str]:
+        return self.get("event_id")
+
+    @property
+    def event_time(self) -> Optional[int]:
+        return self.get("event_time")
+
+    @property
+    def type(self) -> Optional[str]:
+        """
+        Type of the inner event, e.g. ``"message"``
+        """
+        return self.event.get("type")
+
+    @property
+    def subtype(self) -> Optional[str]:
+        return self.event.get("subtype")
+
+    @property
+    def channel(self) -> Optional[str]:
+        """
+        ID of the channel the event happened in
+
+        Also resolved for events about an item, like ``reaction_added``, and
+        for events carrying a channel object, like ``channel_created``.
+        """
+        if self._channel is _UNSET:
+            event = self.event
+            channel = event.get("channel")
+            if channel is None:
+                item = event.get("item")
+                if isinstance(item, dict):
+                    channel = item.get("channel")
+            if isinstance(channel, dict):
+                channel = channel.get("id")
+            self._channel = channel
+        return self._channel
+
+    @property
+    def user(self) -> Optional[str]:
+        """
+        ID of the user the event is about, also for events carrying a user
+        object, like ``user_change``
+        """
+        if self._user is _UNSET:
+            user = self.event.get("user")
+            if isinstance(user, dict):
+                user = user.get("id")
+            self._user = user
+        return self._user
+
+
+def _from_body(body: bytes) -> SlackEvent:
+    return SlackEvent(default_json_loads()(body), body)
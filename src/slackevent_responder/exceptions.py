@@ -0,0 +1,41 @@
+from typing import Any, Callable, Hashable, Optional
+
+from .metrics import handler_name
+
+
+class SlackEventAppException(Exception):
+    """
+    Base exception for all errors raised by the SlackEventHandler library
+    """
+
+    def __init__(self, msg: str = None):
+        if msg is None:
+            # default error message
+            msg = "An error occurred in the SlackEventHandler library"
+        super().__init__(msg)
+
+
+class HandlerTimeout(SlackEventAppException):
+    """
+    An event handler ran for longer than its timeout
+
+    Async handlers are cancelled. Sync handlers can't be, they keep running
+    and are reported with ``stack``, the stack of their thread when the
+    timeout expired, or ``None`` if they were still waiting for one.
+    """
+
+    def __init__(
+        self,
+        event: Hashable,
+        handler: Callable[..., Any],
+        timeout: float,
+        stack: Optional[str] = None,
+    ):
+        self.event = event
+        self.handler = handler
+        self.timeout = timeout
+        self.stack = stack
+        super().__init__(
+            f"Handler {handler_name(handler)} for event {event!r} "
+            f"exceeded its timeout of {timeout}s"
+        )
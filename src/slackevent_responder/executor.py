@@ -0,0 +1,115 @@
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar, Union
+
+
+T = TypeVar("T")
+
+
+class HandlerExecutor:
+    """
+    Thread pool dedicated to synchronous event handlers
+
+    Keeps handler bursts away from the event loop's default executor, which
+    is shared with every other sync endpoint of the ASGI application, and
+    records how saturated the pool is and how long calls wait for a thread.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        thread_name_prefix: str = "slackevent-handler",
+    ):
+        if max_workers is None:
+            max_workers = min(32, (os.cpu_count() or 1) + 4)
+        if max_workers <= 0:
+            raise ValueError("max_workers must be greater than 0")
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=thread_name_prefix
+        )
+
+        # updated from both the event loop and the worker threads
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.pending = 0
+        self.active = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    @property
+    def saturation(self) -> float:
+        """
+        Ratio of busy threads to ``max_workers``
+        """
+        return self.active / self.max_workers
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        loop = asyncio.get_event_loop()
+        # Run in the caller's context, as starlette's run_in_threadpool does
+        child = functools.partial(func, *args, **kwargs)
+        context = contextvars.copy_context()
+        with self._lock:
+            self.submitted += 1
+            self.pending += 1
+        return await loop.run_in_executor(
+            self._executor,
+            self._call,
+            time.perf_counter(),
+            functools.partial(context.run, child),
+        )
+
+    def _call(self, submitted_at: float, func: Callable[[], T]) -> T:
+        wait_time = time.perf_counter() - submitted_at
+        with self._lock:
+            self.pending -= 1
+            self.active += 1
+            self.wait_time_total += wait_time
+            if wait_time > self.wait_time_max:
+                self.wait_time_max = wait_time
+        try:
+            return func()
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+
+    async def warm(self) -> None:
+        """
+        Start all the threads of the pool, which are otherwise started on
+        the first calls
+        """
+        loop = asyncio.get_event_loop()
+        # each call holds its thread until all threads have started
+        barrier = threading.Barrier(self.max_workers)
+        await asyncio.gather(
+            *(
+                loop.run_in_executor(self._executor, barrier.wait, 5)
+                for _ in range(self.max_workers)
+            )
+        )
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        with self._lock:
+            started = self.completed + self.active
+            return {
+                "max_workers": self.max_workers,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "pending": self.pending,
+                "active": self.active,
+                "saturation": self.saturation,
+                "wait_time_avg": (
+                    self.wait_time_total / started if started else 0.0
+                ),
+                "wait_time_max": self.wait_time_max,
+            }
@@ -0,0 +1,244 @@
+import time
+from bisect import bisect_left
+from collections import Counter
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Mapping,
+    Sequence,
+    Tuple,
+)
+
+
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# (metric name, labels, value)
+Sample = Tuple[str, Mapping[str, Any], float]
+# (metric name, type, help, samples)
+MetricFamily = Tuple[str, str, str, Iterable[Sample]]
+Collector = Callable[[], Iterable[MetricFamily]]
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed bucket upper bounds, in seconds
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        # the last count is for the implicit +Inf bucket
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name: str, labels: Mapping[str, Any]) -> List[Sample]:
+        samples: List[Sample] = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            samples.append(
+                (f"{name}_bucket", {**labels, "le": repr(bound)}, cumulative)
+            )
+        samples.append((f"{name}_bucket", {**labels, "le": "+Inf"}, self.count))
+        samples.append((f"{name}_sum", labels, self.sum))
+        samples.append((f"{name}_count", labels, self.count))
+        return samples
+
+
+def handler_name(f: Callable[..., Any]) -> str:
+    return "{}.{}".format(
+        getattr(f, "__module__", None) or "",
+        getattr(f, "__qualname__", None) or repr(f),
+    )
+
+
+class Metrics:
+    """
+    Latency histograms of the endpoint stages and of event handlers
+
+    Stages are timed by chaining ``start()`` and ``stage()``. Other
+    components register collectors to export their own counters along with
+    the histograms in the Prometheus text format.
+    """
+
+    enabled = True
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.stages: Dict[str, Histogram] = {}
+        self.handler_durations: Dict[Tuple[str, str], Histogram] = {}
+        self.handler_errors: "Counter[Tuple[str, str]]" = Counter()
+        self._collectors: List[Collector] = []
+
+    def start(self) -> float:
+        return time.perf_counter()
+
+    def stage(self, name: str, started: float) -> float:
+        """
+        Record the time elapsed since ``started`` for stage ``name``, and
+        return the current time to start the next stage from
+        """
+        now = time.perf_counter()
+        histogram = self.stages.get(name)
+        if histogram is None:
+            histogram = self.stages[name] = Histogram(self.buckets)
+        histogram.observe(now - started)
+        return now
+
+    def observe_handler(
+        self,
+        event: Hashable,
+        f: Callable[..., Any],
+        started: float,
+        error: bool = False,
+    ) -> None:
+        """
+        Record a call of handler ``f`` for ``event`` begun at ``started``
+        """
+        duration = time.perf_counter() - started
+        key = (str(event), handler_name(f))
+        histogram = self.handler_durations.get(key)
+        if histogram is None:
+            histogram = self.handler_durations[key] = Histogram(self.buckets)
+        histogram.observe(duration)
+        if error:
+            self.handler_errors[key] += 1
+
+    def add_collector(self, collector: Collector) -> None:
+        self._collectors.append(collector)
+
+    def collect(self) -> Iterable[MetricFamily]:
+        yield (
+            "slackevent_stage_duration_seconds",
+            "histogram",
+            "Time spent in each stage of the Slack event endpoint",
+            [
+                sample
+                for stage, histogram in sorted(self.stages.items())
+                for sample in histogram.samples(
+                    "slackevent_stage_duration_seconds", {"stage": stage}
+                )
+            ],
+        )
+        yield (
+            "slackevent_handler_duration_seconds",
+            "histogram",
+            "Duration of event handler calls",
+            [
+                sample
+                for (event, handler), histogram in sorted(
+                    self.handler_durations.items()
+                )
+                for sample in histogram.samples(
+                    "slackevent_handler_duration_seconds",
+                    {"event": event, "handler": handler},
+                )
+            ],
+        )
+        yield (
+            "slackevent_handler_errors_total",
+            "counter",
+            "Event handler calls which raised an exception",
+            [
+                (
+                    "slackevent_handler_errors_total",
+                    {"event": event, "handler": handler},
+                    count,
+                )
+                for (event, handler), count in sorted(
+                    self.handler_errors.items()
+                )
+            ],
+        )
+        for collector in self._collectors:
+            yield from collector()
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format
+        """
+        lines = []
+        for name, metric_type, help_text, samples in self.collect():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for sample_name, labels, value in samples:
+                lines.append(
+                    f"{sample_name}{_format_labels(labels)} {_format_value(value)}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+class NullMetrics(Metrics):
+    """
+    Metrics which record nothing, used when metrics are disabled
+    """
+
+    enabled = False
+
+    def start(self) -> float:
+        return 0.0
+
+    def stage(self, name: str, started: float) -> float:
+        return 0.0
+
+    def observe_handler(
+        self,
+        event: Hashable,
+        f: Callable[..., Any],
+        started: float,
+        error: bool = False,
+    ) -> None:
+        pass
+
+    def add_collector(self, collector: Collector) -> None:
+        pass
+
+
+def _format_labels(labels: Mapping[str, Any]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(
+            key,
+            str(value)
+            .replace("\\", "\\\\")
+            .replace("\n", "\\n")
+            .replace('"', '\\"'),
+        )
+        for key, value in labels.items()
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
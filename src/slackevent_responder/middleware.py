@@ -0,0 +1,128 @@
+import asyncio
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Collection,
+    Hashable,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from .event import SlackEvent
+from .routing import HandlerIndex
+
+
+BEFORE = "before"
+AFTER = "after"
+AROUND = "around"
+
+# Dispatcher.run like: (event, handlers, *args, **kwargs)
+Run = Callable[..., Awaitable[None]]
+
+
+async def _call(hook: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    result = hook(*args, **kwargs)
+    if asyncio.iscoroutine(result):
+        result = await result
+    return result
+
+
+class Middleware:
+    """
+    Hook run around the handlers of every event, or of ``events`` only
+
+    Hooks are called with the event type followed by the arguments of the
+    handlers. ``before`` hooks may return ``False`` to skip the handlers,
+    ``after`` hooks run once the handlers succeeded, and ``around`` hooks
+    get a ``call_next`` coroutine function, after the event type, to run
+    the handlers with. Sync hooks run on the event loop and must be quick.
+    """
+
+    __slots__ = ("kind", "hook", "events")
+
+    def __init__(
+        self,
+        kind: str,
+        hook: Callable[..., Any],
+        events: Optional[Collection[Hashable]] = None,
+    ):
+        if kind not in (BEFORE, AFTER, AROUND):
+            raise ValueError(f"Unknown middleware kind: {kind!r}")
+        self.kind = kind
+        self.hook = hook
+        # a single event type may be given as is, rather than in a list
+        if isinstance(events, str):
+            events = (events,)
+        self.events = frozenset(events) if events is not None else None
+
+    def applies(self, event: Hashable) -> bool:
+        return self.events is None or event in self.events
+
+    def wrap(self, run: Run) -> Run:
+        hook = self.hook
+
+        if self.kind == BEFORE:
+
+            async def before(
+                event: Hashable,
+                handlers: Sequence[Callable[..., Any]],
+                *args: Any,
+                **kwargs: Any,
+            ) -> None:
+                if await _call(hook, event, *args, **kwargs) is not False:
+                    await run(event, handlers, *args, **kwargs)
+
+            return before
+
+        if self.kind == AFTER:
+
+            async def after(
+                event: Hashable,
+                handlers: Sequence[Callable[..., Any]],
+                *args: Any,
+                **kwargs: Any,
+            ) -> None:
+                await run(event, handlers, *args, **kwargs)
+                await _call(hook, event, *args, **kwargs)
+
+            return after
+
+        async def around(
+            event: Hashable,
+            handlers: Sequence[Callable[..., Any]],
+            *args: Any,
+            **kwargs: Any,
+        ) -> None:
+            async def call_next() -> None:
+                await run(event, handlers, *args, **kwargs)
+
+            await _call(hook, event, call_next, *args, **kwargs)
+
+        return around
+
+
+class DispatchPlan:
+    """
+    Compiled dispatch of an event type: its handler index, and the
+    middleware chain wrapped around the dispatcher
+
+    Plans are immutable, and rebuilt when handlers or middleware change.
+    """
+
+    __slots__ = ("index", "run")
+
+    def __init__(
+        self, index: HandlerIndex, run: Run, middleware: Sequence[Middleware]
+    ):
+        self.index = index
+        # the first registered middleware is the outermost
+        for m in reversed(middleware):
+            run = m.wrap(run)
+        self.run = run
+
+    def match(self, args: Tuple[Any, ...]) -> Tuple[Callable[..., Any], ...]:
+        if args and isinstance(args[0], SlackEvent):
+            return self.index.match(args[0])
+        return self.index.handlers
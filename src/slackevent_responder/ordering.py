@@ -0,0 +1,82 @@
+import asyncio
+import operator
+from typing import Any, Callable, Dict, Hashable, Optional, Union
+
+from starlette.concurrency import run_in_threadpool
+
+from .executor import HandlerExecutor
+
+
+KeyFunc = Callable[[Any], Hashable]
+
+
+def key_func(key: Union[str, KeyFunc]) -> KeyFunc:
+    """
+    Key function for ``key``, a callable or the name of a ``SlackEvent``
+    attribute like ``"channel"`` or ``"team_id"``
+    """
+    if isinstance(key, str):
+        return operator.attrgetter(key)
+    return key
+
+
+class KeyedExecutor:
+    """
+    Runs calls sharing a key one at a time, in the order they were made
+
+    Calls with different keys run concurrently. Each key gets a shard
+    chaining its calls, which is evicted as soon as it has no call left.
+    """
+
+    def __init__(self, executor: Optional[HandlerExecutor] = None):
+        self.executor = executor
+        # completion of the last call of each shard, and its number of calls
+        self._tails: Dict[Hashable, "asyncio.Future[None]"] = {}
+        self._lengths: Dict[Hashable, int] = {}
+
+        self.evicted = 0
+
+    def queue_lengths(self) -> Dict[Hashable, int]:
+        """
+        Number of calls running or waiting in each shard
+        """
+        return dict(self._lengths)
+
+    async def run(
+        self, key: Hashable, f: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> Any:
+        previous = self._tails.get(key)
+        done: "asyncio.Future[None]" = asyncio.get_event_loop().create_future()
+        self._tails[key] = done
+        self._lengths[key] = self._lengths.get(key, 0) + 1
+        try:
+            if previous is not None:
+                # shielded, a cancelled call must not release the next one
+                # before its predecessor is done
+                await asyncio.shield(previous)
+            if asyncio.iscoroutinefunction(f):
+                return await f(*args, **kwargs)
+            elif self.executor is not None:
+                return await self.executor.run(f, *args, **kwargs)
+            else:
+                return await run_in_threadpool(f, *args, **kwargs)
+        finally:
+            self._lengths[key] -= 1
+            if previous is None or previous.done():
+                self._release(key, done)
+            else:
+                previous.add_done_callback(lambda _: self._release(key, done))
+
+    def _release(self, key: Hashable, done: "asyncio.Future[None]") -> None:
+        done.set_result(None)
+        if self._tails.get(key) is done:
+            del self._tails[key]
+            del self._lengths[key]
+            self.evicted += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "shards": len(self._lengths),
+            "evicted": self.evicted,
+            "max_queue_length": max(self._lengths.values(), default=0),
+        }
@@ -0,0 +1,112 @@
+import asyncio
+import gzip
+import json
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+class TrafficRecorder:
+    """
+    Records the verified requests of an app into a gzip compressed JSONL
+    archive, for ``slackevent_responder.replay`` to load test with
+
+    Each line holds the time a request was received and its raw body.
+    Records are written by a background thread, grouped like the appends
+    of ``EventLog``. Requests received while ``max_pending`` records are
+    waiting to be written are not recorded, and counted as ``dropped``.
+    """
+
+    def __init__(self, path: str, max_pending: int = 10000):
+        self.path = path
+        self.max_pending = max_pending
+
+        # the archive is written from a single thread
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="slackevent-recorder"
+        )
+        self._file: Optional[gzip.GzipFile] = None
+        self._pending: List[Tuple[float, bytes]] = []
+        self._flush_task: Optional["asyncio.Task[None]"] = None
+
+        self.recorded = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def record(self, body: bytes) -> None:
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        self._pending.append((time.time(), body))
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self._flush())
+
+    async def flush(self) -> None:
+        """
+        Wait for the records made so far to be written
+        """
+        while self._flush_task is not None and not self._flush_task.done():
+            await self._flush_task
+
+    async def close(self) -> None:
+        await self.flush()
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(self._executor, self._close)
+        self._executor.shutdown()
+
+    async def _flush(self) -> None:
+        loop = asyncio.get_event_loop()
+        while self._pending:
+            records, self._pending = self._pending, []
+            try:
+                await loop.run_in_executor(self._executor, self._write, records)
+            except Exception:
+                # recording is best effort, it must not fail the app
+                self.failed += len(records)
+
+    def _write(self, records: List[Tuple[float, bytes]]) -> None:
+        if self._file is None:
+            # appended as a new gzip member, so archives can be continued
+            self._file = gzip.GzipFile(self.path, "ab")
+        f = self._file
+        lines = b"".join(
+            json.dumps(
+                {"time": received_at, "body": body.decode(errors="replace")},
+                ensure_ascii=False,
+            ).encode()
+            + b"\n"
+            for received_at, body in records
+        )
+        f.write(lines)
+        # readable up to here, should the process die before closing
+        f.flush()
+        self.recorded += len(records)
+
+    def _close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "recorded": self.recorded,
+            "pending": len(self._pending),
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+def read_traffic(path: str) -> Iterator[Tuple[float, bytes]]:
+    """
+    Yield the (received time, body) records of an archive, in order
+
+    An archive cut short by a crash yields the records written before it.
+    """
+    with gzip.open(path, "rb") as f:
+        try:
+            for line in f:
+                record: Any = json.loads(line)
+                yield record["time"], record["body"].encode()
+        except (EOFError, zlib.error):
+            return
@@ -0,0 +1,286 @@
+"""
+Replay traffic recorded by a ``TrafficRecorder`` into a ``SlackEventApp``
+
+Requests are signed again with ``--signing-secret``, which the app under test
+must accept, and sent through the app's ASGI interface. They are sent at
+``--rate`` requests per second, or with their recorded spacing compressed
+``--speed`` times, or else as fast as ``--concurrency`` allows. Prints the
+throughput, ack and total latency percentiles, response statuses, handler
+error rate and the number of errors passed to the app's ``error`` handlers,
+as JSON.
+
+    python -m slackevent_responder.replay traffic.jsonl.gz myapp:slack_app \\
+        --signing-secret test-secret --speed 10
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import importlib
+import json
+import os
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from .application import SlackEventApp
+from .recorder import read_traffic
+from .signature import SIGNATURE_VERSION
+
+
+Headers = List[Tuple[bytes, bytes]]
+
+
+def load_app(spec: str) -> SlackEventApp:
+    """
+    Import the app named by ``spec``, like ``"package.module:attribute"``
+    """
+    module_name, _, attribute = spec.partition(":")
+    app: Any = importlib.import_module(module_name)
+    for name in (attribute or "app").split("."):
+        app = getattr(app, name)
+    return app
+
+
+def sign(signing_secret: str, body: bytes) -> Headers:
+    """
+    ASGI headers of a request carrying ``body``, signed with
+    ``signing_secret``
+    """
+    timestamp = str(int(time.time())).encode()
+    signature = hmac.new(
+        signing_secret.encode(),
+        SIGNATURE_VERSION + b":" + timestamp + b":" + body,
+        hashlib.sha256,
+    ).hexdigest()
+    return [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+        (b"x-slack-request-timestamp", timestamp),
+        (b"x-slack-signature", SIGNATURE_VERSION + b"=" + signature.encode()),
+    ]
+
+
+async def call(
+    app: Any, path: str, headers: Headers, body: bytes
+) -> Tuple[int, float, float, bool]:
+    """
+    Send one request to ``app``, return (status, ack latency, total latency,
+    whether the app raised)
+    """
+    request_sent = False
+    status = 0
+    acked_at = None
+
+    async def receive() -> Dict[str, Any]:
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return {"type": "http.disconnect"}
+
+    async def send(message: Dict[str, Any]) -> None:
+        nonlocal status, acked_at
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and not message.get(
+            "more_body", False
+        ):
+            acked_at = time.perf_counter()
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 8000),
+    }
+    raised = False
+    started = time.perf_counter()
+    try:
+        await app(scope, receive, send)
+    except Exception:
+        # raised by handlers after the response was sent, as a server would
+        # log it
+        raised = True
+    finished = time.perf_counter()
+    if acked_at is None:
+        acked_at = finished
+    return status, acked_at - started, finished - started, raised
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def schedule(
+    times: Sequence[float],
+    rate: Optional[float] = None,
+    speed: Optional[float] = None,
+) -> List[Optional[float]]:
+    """
+    Offsets in seconds from the start of the replay at which to send the
+    requests received at ``times``, None to send them right away
+    """
+    if rate is not None:
+        return [i / rate for i in range(len(times))]
+    if speed is not None and times:
+        return [(t - times[0]) / speed for t in times]
+    return [None] * len(times)
+
+
+async def replay(
+    app: SlackEventApp,
+    records: Sequence[Tuple[float, bytes]],
+    signing_secret: str,
+    rate: Optional[float] = None,
+    speed: Optional[float] = None,
+    concurrency: int = 100,
+    path: str = "/slack/events",
+) -> Dict[str, Any]:
+    """
+    Send the ``records`` of an archive to ``app``, and return a report
+
+    ``errors`` counts the exceptions passed to the ``error`` handlers, like
+    rejected requests and handler timeouts, and ``exceptions`` the requests
+    whose handlers raised, which ``handler_error_rate`` is based on. At
+    most ``concurrency`` requests are in flight at once. When the app
+    can't keep up with ``rate`` or ``speed``, requests are sent late and
+    ``max_lag_ms`` tells by how much.
+    """
+    errors = 0
+
+    async def count_error(e: BaseException) -> None:
+        nonlocal errors
+        errors += 1
+
+    app.on("error", count_error)
+    loop = asyncio.get_event_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    results: List[Tuple[int, float, float, bool]] = []
+    tasks: Set["asyncio.Task[None]"] = set()
+    max_lag = 0.0
+
+    async def send(body: bytes) -> None:
+        try:
+            results.append(
+                await call(app, path, sign(signing_secret, body), body)
+            )
+        finally:
+            semaphore.release()
+
+    offsets = schedule([t for t, _ in records], rate, speed)
+    started = loop.time()
+    try:
+        for offset, (_, body) in zip(offsets, records):
+            if offset is not None:
+                delay = offset - (loop.time() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            await semaphore.acquire()
+            if offset is not None:
+                max_lag = max(max_lag, loop.time() - started - offset)
+            task = asyncio.ensure_future(send(body))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        while tasks:
+            await asyncio.gather(*tasks)
+        elapsed = loop.time() - started
+    finally:
+        app.remove_handler("error", count_error)
+
+    exceptions = sum(raised for _, _, _, raised in results)
+    ack = [a for _, a, _, _ in results]
+    total = [t for _, _, t, _ in results]
+    report: Dict[str, Any] = {
+        "requests": len(results),
+        "duration_sec": elapsed,
+        "requests_per_sec": len(results) / elapsed if elapsed else 0.0,
+        "statuses": dict(Counter(status for status, _, _, _ in results)),
+        "errors": errors,
+        "exceptions": exceptions,
+        "handler_error_rate": exceptions / len(results) if results else 0.0,
+        "max_lag_ms": max_lag * 1000,
+    }
+    for q in (50, 90, 99):
+        report[f"ack_p{q}_ms"] = percentile(ack, q) * 1000
+        report[f"total_p{q}_ms"] = percentile(total, q) * 1000
+    return report
+
+
+async def run(app: SlackEventApp, args: argparse.Namespace) -> Dict[str, Any]:
+    records = list(read_traffic(args.archive))
+    if args.limit is not None:
+        records = records[: args.limit]
+    await app.startup()
+    try:
+        return await replay(
+            app,
+            records,
+            args.signing_secret,
+            rate=args.rate,
+            speed=args.speed,
+            concurrency=args.concurrency,
+            path=args.path,
+        )
+    finally:
+        await app.shutdown()
+
+
+def parse_args(argv: Optional[Sequence[str]]) -> argparse.Namespace:
+    assert __doc__ is not None
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("archive", help="archive written by TrafficRecorder")
+    parser.add_argument("app", help="app to replay into, like module:attr")
+    parser.add_argument(
+        "--signing-secret",
+        default=os.environ.get("SLACK_SIGNING_SECRET"),
+        help="secret to sign requests with, $SLACK_SIGNING_SECRET by default",
+    )
+    pace = parser.add_mutually_exclusive_group()
+    pace.add_argument("--rate", type=float, help="requests per second")
+    pace.add_argument(
+        "--speed", type=float, help="time compression of the recording"
+    )
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--limit", type=int, help="replay the first requests")
+    parser.add_argument("--path", default="/slack/events")
+    parser.add_argument("--output", help="write the report to this file")
+    args = parser.parse_args(argv)
+    if args.signing_secret is None:
+        parser.error("--signing-secret or $SLACK_SIGNING_SECRET is required")
+    for name in ("rate", "speed", "concurrency"):
+        value = getattr(args, name)
+        if value is not None and value <= 0:
+            parser.error(f"--{name} must be greater than 0")
+    return args
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    # the app may live in the working directory
+    sys.path.insert(0, os.getcwd())
+    app = load_app(args.app)
+    report = asyncio.run(run(app, args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+from itertools import product
+from operator import attrgetter
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from .event import SlackEvent
+
+
+class _Any:
+    def __repr__(self) -> str:
+        return "ANY"
+
+
+# Matches any value, the default of every filter
+ANY: Any = _Any()
+
+Values = Union[None, str, Iterable[Optional[str]]]
+
+# SlackEvent attributes matched by the indexed fields of HandlerFilter
+_FIELDS = tuple(
+    attrgetter(name) for name in ("subtype", "channel", "team_id", "api_app_id")
+)
+DIMS = tuple(range(len(_FIELDS)))
+
+
+def _values(values: Any) -> Optional[FrozenSet[Optional[str]]]:
+    if values is ANY:
+        return None
+    if values is None or isinstance(values, str):
+        return frozenset([values])
+    return frozenset(values)
+
+
+class HandlerFilter:
+    """
+    Declarative conditions an event must meet for a handler to be called
+
+    ``subtype``, ``channel``, ``team`` and ``app`` (the ``api_app_id`` of
+    the event) take a value or an iterable of values, and are matched
+    through the ``HandlerIndex``. ``subtype=None`` only matches events
+    without a subtype. ``exclude_bots`` skips messages posted by bots, and
+    ``text_prefix`` skips events whose text doesn't start with it.
+    """
+
+    __slots__ = (
+        "subtypes",
+        "channels",
+        "teams",
+        "apps",
+        "exclude_bots",
+        "text_prefix",
+    )
+
+    def __init__(
+        self,
+        subtype: Values = ANY,
+        channel: Values = ANY,
+        team: Values = ANY,
+        app: Values = ANY,
+        exclude_bots: bool = False,
+        text_prefix: Optional[str] = None,
+    ):
+        self.subtypes = _values(subtype)
+        self.channels = _values(channel)
+        self.teams = _values(team)
+        self.apps = _values(app)
+        self.exclude_bots = exclude_bots
+        self.text_prefix = text_prefix
+
+    @property
+    def is_empty(self) -> bool:
+        return (
+            self.subtypes is None
+            and self.channels is None
+            and self.teams is None
+            and self.apps is None
+            and not self.exclude_bots
+            and self.text_prefix is None
+        )
+
+    @property
+    def has_residual(self) -> bool:
+        return self.exclude_bots or self.text_prefix is not None
+
+    @property
+    def values(self) -> Tuple[Optional[FrozenSet[Optional[str]]], ...]:
+        """
+        Values matched for each indexed field, ``None`` for any value
+        """
+        return (self.subtypes, self.channels, self.teams, self.apps)
+
+    def keys(self, dims: Sequence[int] = DIMS) -> Iterable[Tuple[Any, ...]]:
+        """
+        Index keys the filter is registered under, on the ``dims`` fields
+        """
+        values = self.values
+        return product(*(values[dim] or (ANY,) for dim in dims))
+
+    def residual_match(self, event: SlackEvent) -> bool:
+        """
+        Check the conditions that can't be looked up in the index
+        """
+        inner = event.event
+        if self.exclude_bots and (
+            "bot_id" in inner or inner.get("subtype") == "bot_message"
+        ):
+            return False
+        if self.text_prefix is not None:
+            text = inner.get("text")
+            if not isinstance(text, str) or not text.startswith(
+                self.text_prefix
+            ):
+                return False
+        return True
+
+
+_NO_FILTER = HandlerFilter()
+
+Entry = Tuple[int, Callable[..., Any], HandlerFilter]
+Field = Callable[[SlackEvent], Optional[str]]
+
+
+class HandlerIndex:
+    """
+    Handlers of an event type, indexed on their subtype, channel, team and
+    app filters
+
+    Only the fields some handler filters on are indexed. Looking up the
+    handlers of an event costs two dict lookups per indexed field combined,
+    at most sixteen, whatever the number of registered handlers or apps,
+    plus the ``residual_match`` of the handlers found that filter on bots
+    or on the text.
+    """
+
+    __slots__ = ("handlers", "_buckets", "_fields", "_unfiltered")
+
+    def __init__(
+        self,
+        handlers: Sequence[
+            Tuple[Callable[..., Any], Optional[HandlerFilter]]
+        ] = (),
+    ):
+        self.handlers = tuple(f for f, _ in handlers)
+
+        dims = [
+            dim
+            for dim in DIMS
+            if any(
+                handler_filter is not None
+                and handler_filter.values[dim] is not None
+                for _, handler_filter in handlers
+            )
+        ]
+        self._fields: Tuple[Field, ...] = tuple(_FIELDS[dim] for dim in dims)
+
+        buckets: Dict[Tuple[Any, ...], List[Entry]] = {}
+        for seq, (f, handler_filter) in enumerate(handlers):
+            handler_filter = handler_filter or _NO_FILTER
+            for key in handler_filter.keys(dims):
+                buckets.setdefault(key, []).append((seq, f, handler_filter))
+        self._buckets = {key: tuple(bucket) for key, bucket in buckets.items()}
+
+        # Without any filter, every event gets all handlers
+        self._unfiltered = all(
+            handler_filter is None or handler_filter.is_empty
+            for _, handler_filter in handlers
+        )
+
+    def match(self, event: SlackEvent) -> Tuple[Callable[..., Any], ...]:
+        if self._unfiltered:
+            return self.handlers
+
+        buckets = self._buckets
+        found: List[Entry] = []
+        for key in product(*((field(event), ANY) for field in self._fields)):
+            bucket = buckets.get(key)
+            if bucket:
+                found.extend(bucket)
+        # keep the registration order across buckets
+        found.sort(key=lambda entry: entry[0])
+        return tuple(
+            f
+            for _, f, handler_filter in found
+            if not handler_filter.has_residual
+            or handler_filter.residual_match(event)
+        )
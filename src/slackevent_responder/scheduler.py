@@ -0,0 +1,121 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Hashable, Mapping, Optional, Sequence
+
+from .metrics import DEFAULT_BUCKETS, Histogram
+
+
+class PriorityScheduler:
+    """
+    Hands out ``concurrency`` handler slots by priority class
+
+    Event types are mapped to priority classes by ``priorities``, others
+    belong to ``default_priority``. When handlers are queued, slots go to
+    the classes in proportion to their ``weights`` (1 by default), so a
+    class of weight ``w`` gets at least ``w / sum(weights)`` of the slots
+    freed while it has handlers waiting, and is never starved. Within a
+    class, handlers start in arrival order.
+    """
+
+    def __init__(
+        self,
+        concurrency: int,
+        priorities: Optional[Mapping[Hashable, str]] = None,
+        weights: Optional[Mapping[str, float]] = None,
+        default_priority: str = "default",
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        if concurrency <= 0:
+            raise ValueError("concurrency must be greater than 0")
+        self.concurrency = concurrency
+        self.priorities = dict(priorities or {})
+        self.weights = dict(weights or {})
+        if any(weight <= 0 for weight in self.weights.values()):
+            raise ValueError("weights must be greater than 0")
+        self.default_priority = default_priority
+        self.buckets = tuple(buckets)
+
+        self.running = 0
+        self.waiting = 0
+        self._waiters: Dict[str, Deque["asyncio.Future[None]"]] = {}
+        # Stride scheduling: each class is charged 1 / weight per slot and
+        # the backlogged class with the lowest pass gets the next one
+        self._passes: Dict[str, float] = {}
+        self._virtual_time = 0.0
+
+        self.queue_delays: Dict[str, Histogram] = {}
+
+    def priority(self, event: Hashable) -> str:
+        return self.priorities.get(event, self.default_priority)
+
+    @property
+    def queued_by_priority(self) -> Dict[str, int]:
+        return {
+            priority: len(waiters)
+            for priority, waiters in self._waiters.items()
+            if waiters
+        }
+
+    async def acquire(self, event: Hashable) -> None:
+        priority = self.priority(event)
+        started = time.perf_counter()
+        if self.running < self.concurrency and not self.waiting:
+            self._grant(priority)
+        else:
+            waiters = self._waiters.get(priority)
+            if waiters is None:
+                waiters = self._waiters[priority] = deque()
+            if not waiters:
+                # a class which was idle doesn't get credit for that time
+                self._passes[priority] = max(
+                    self._passes.get(priority, 0.0), self._virtual_time
+                )
+            future: "asyncio.Future[None]" = (
+                asyncio.get_event_loop().create_future()
+            )
+            waiters.append(future)
+            self.waiting += 1
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # cancelled after being granted a slot, pass it on
+                    self.release()
+                else:
+                    waiters.remove(future)
+                    self.waiting -= 1
+                raise
+        self._observe(priority, time.perf_counter() - started)
+
+    def release(self) -> None:
+        self.running -= 1
+        while self.waiting and self.running < self.concurrency:
+            _, priority = min(
+                (self._passes[priority], priority)
+                for priority, waiters in self._waiters.items()
+                if waiters
+            )
+            future = self._waiters[priority].popleft()
+            self.waiting -= 1
+            self._grant(priority)
+            future.set_result(None)
+
+    def _grant(self, priority: str) -> None:
+        self.running += 1
+        start = max(self._passes.get(priority, 0.0), self._virtual_time)
+        self._virtual_time = start
+        self._passes[priority] = start + 1 / self.weights.get(priority, 1)
+
+    def _observe(self, priority: str, delay: float) -> None:
+        histogram = self.queue_delays.get(priority)
+        if histogram is None:
+            histogram = self.queue_delays[priority] = Histogram(self.buckets)
+        histogram.observe(delay)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "running": self.running,
+            "waiting": self.waiting,
+            "queued_by_priority": self.queued_by_priority,
+        }
@@ -0,0 +1,93 @@
+import hashlib
+import hmac
+from typing import Iterable, List, Tuple, Union
+
+
+SIGNATURE_VERSION = b"v0"
+
+
+class SignatureVerifier:
+    """
+    Verifies Slack request signatures against one or more signing secrets
+
+    The keyed HMAC state, already fed with the version prefix, is computed
+    once per secret and copied for each request. Several secrets can be
+    active at the same time, so a new secret can be added before the old one
+    is revoked on Slack's side and removed here.
+    """
+
+    def __init__(self, signing_secrets: Union[str, Iterable[str]]):
+        if isinstance(signing_secrets, str):
+            signing_secrets = [signing_secrets]
+        # (secret, state) pairs, replaced as a whole on every change so that
+        # concurrent verifications always see a consistent tuple
+        self._states: Tuple[Tuple[str, "hmac.HMAC"], ...] = ()
+        for secret in signing_secrets:
+            self.add_secret(secret)
+
+    @property
+    def secrets(self) -> List[str]:
+        return [secret for secret, _ in self._states]
+
+    def add_secret(self, signing_secret: str) -> None:
+        if signing_secret in self.secrets:
+            return
+        state = hmac.new(
+            signing_secret.encode(), SIGNATURE_VERSION + b":", hashlib.sha256
+        )
+        self._states = (*self._states, (signing_secret, state))
+
+    def remove_secret(self, signing_secret: str) -> None:
+        self._states = tuple(
+            (secret, state)
+            for secret, state in self._states
+            if secret != signing_secret
+        )
+
+    def start(self, timestamp: Union[str, bytes]) -> "Verification":
+        """
+        Start verifying a request whose body is read in chunks
+        """
+        if isinstance(timestamp, str):
+            timestamp = timestamp.encode()
+        return Verification(
+            [state.copy() for _, state in self._states], timestamp + b":"
+        )
+
+    def verify(
+        self,
+        timestamp: Union[str, bytes],
+        body: Union[str, bytes],
+        signature: Union[str, bytes],
+    ) -> bool:
+        if isinstance(body, str):
+            body = body.encode()
+        verification = self.start(timestamp)
+        verification.update(body)
+        return verification.verify(signature)
+
+
+class Verification:
+    """
+    Signature verification of one request, fed with its body chunk by chunk
+    """
+
+    __slots__ = ("_hashes",)
+
+    def __init__(self, hashes: List["hmac.HMAC"], timestamp_part: bytes):
+        for h in hashes:
+            h.update(timestamp_part)
+        self._hashes = hashes
+
+    def update(self, chunk: bytes) -> None:
+        for h in self._hashes:
+            h.update(chunk)
+
+    def verify(self, signature: Union[str, bytes]) -> bool:
+        if isinstance(signature, str):
+            signature = signature.encode()
+        for h in self._hashes:
+            request_hash = SIGNATURE_VERSION + b"=" + h.hexdigest().encode()
+            if hmac.compare_digest(request_hash, signature):
+                return True
+        return False
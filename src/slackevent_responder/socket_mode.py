@@ -0,0 +1,203 @@
+import asyncio
+import json
+import random
+import urllib.request
+from typing import Any, Awaitable, Callable, List, Optional, Set
+
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+
+from .application import SlackEventApp
+from .exceptions import SlackEventAppException
+
+
+try:
+    import websockets
+except ImportError:  # pragma: no cover
+    websockets = None  # type: ignore
+
+
+CONNECTIONS_OPEN_URL = "https://slack.com/api/apps.connections.open"
+
+
+class SocketModeClient:
+    """
+    Receives the events of a ``SlackEventApp`` over Socket Mode
+
+    Runs ``connections`` WebSocket connections at once, each reopened with
+    an exponential backoff when it fails, and right away when Slack asks
+    for it. Events go through ``SlackEventApp.receive()`` like those
+    received by its endpoint, and their envelope is acked before the
+    handlers run. Events the endpoint would have Slack retry, rejected by
+    admission control, failing to be logged or received while draining,
+    are left unacked for Slack to deliver them again.
+
+    ``open_url`` returns the URL to connect to, by calling
+    ``apps.connections.open`` with ``app_token`` by default. Connection
+    errors and exceptions raised by handlers are passed to the app's
+    ``error`` handlers. Requires the ``websockets`` package.
+    """
+
+    def __init__(
+        self,
+        app: SlackEventApp,
+        app_token: Optional[str] = None,
+        connections: int = 1,
+        open_url: Optional[Callable[[], Awaitable[str]]] = None,
+        backoff: float = 1.0,
+        max_backoff: float = 30.0,
+    ):
+        if websockets is None:
+            raise SlackEventAppException(
+                "Socket Mode requires the websockets package"
+            )
+        if connections <= 0:
+            raise ValueError("connections must be greater than 0")
+        if open_url is None and app_token is None:
+            raise ValueError("app_token is required to open connections")
+        self.app = app
+        self.app_token = app_token
+        self.connections = connections
+        self.open_url = open_url if open_url is not None else self._open_url
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self._connection_tasks: List["asyncio.Task[None]"] = []
+        self._handler_tasks: Set["asyncio.Task[None]"] = set()
+
+        self.connected = 0
+        self.connects = 0
+        self.received = 0
+        self.acked = 0
+
+    async def start(self) -> None:
+        for _ in range(self.connections - len(self._connection_tasks)):
+            self._connection_tasks.append(
+                asyncio.ensure_future(self._run_connection())
+            )
+
+    async def run(self) -> None:
+        """
+        Start the connections and receive events until cancelled
+        """
+        await self.start()
+        try:
+            await asyncio.gather(*self._connection_tasks)
+        finally:
+            await self.stop()
+
+    async def stop(self) -> None:
+        """
+        Close the connections, and wait for the handlers of received events
+        """
+        tasks, self._connection_tasks = self._connection_tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        while self._handler_tasks:
+            await asyncio.gather(*self._handler_tasks, return_exceptions=True)
+
+    async def _open_url(self) -> str:
+        return await run_in_threadpool(self._request_url)
+
+    def _request_url(self) -> str:
+        request = urllib.request.Request(
+            CONNECTIONS_OPEN_URL,
+            data=b"",
+            headers={
+                "Authorization": f"Bearer {self.app_token}",
+                "Content-Type": "application/x-www-form-urlencoded",
+            },
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=10) as response:
+            data = json.loads(response.read())
+        if not data.get("ok"):
+            raise SlackEventAppException(
+                f"apps.connections.open failed: {data.get('error')}"
+            )
+        return str(data["url"])
+
+    async def _run_connection(self) -> None:
+        attempt = 0
+        while True:
+            message_type = None
+            try:
+                url = await self.open_url()
+                async with websockets.connect(url) as websocket:
+                    self.connected += 1
+                    self.connects += 1
+                    try:
+                        async for message in websocket:
+                            message_type = await self._on_message(
+                                websocket, message
+                            )
+                            if message_type == "hello":
+                                attempt = 0
+                            elif message_type == "disconnect":
+                                break
+                    finally:
+                        self.connected -= 1
+                if message_type == "disconnect":
+                    # closed on Slack's request, reconnect right away
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await self.app.emit_error(e)
+
+            delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+            attempt += 1
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+    async def _on_message(self, websocket: Any, message: Any) -> Any:
+        app = self.app
+        envelope = app.json_loads(message)
+        message_type = envelope.get("type")
+        envelope_id = envelope.get("envelope_id")
+        if envelope_id is None:
+            return message_type
+        self.received += 1
+
+        payload = envelope.get("payload")
+        if message_type != "events_api" or not isinstance(payload, dict):
+            # slash commands and interactions have no handlers here
+            await self._ack(websocket, envelope_id)
+            return message_type
+
+        # Processed like a request to the endpoint, and left unacked for
+        # Slack to deliver it again when the endpoint would ask for a retry.
+        # The payload is only encoded again if something needs its body.
+        span = app.tracer.start_span(
+            "slack.socket_mode",
+            {"slack.retry_num": envelope.get("retry_attempt")},
+        )
+        tasks = None
+        try:
+            status, _, _, tasks = await app.receive(
+                None, payload, span, len(message)
+            )
+            admission = app.admission
+            if status < 500 and (
+                admission is None or status != admission.status_code
+            ):
+                await self._ack(websocket, envelope_id)
+        finally:
+            span.end()
+            # started even when the ack can't be sent, as the event was
+            # admitted, deduplicated and logged already
+            if tasks is not None:
+                task = asyncio.ensure_future(self._run_tasks(tasks))
+                self._handler_tasks.add(task)
+                task.add_done_callback(self._handler_tasks.discard)
+        return message_type
+
+    async def _ack(self, websocket: Any, envelope_id: str) -> None:
+        await websocket.send(json.dumps({"envelope_id": envelope_id}))
+        self.acked += 1
+
+    async def _run_tasks(self, tasks: BackgroundTask) -> None:
+        try:
+            await tasks()
+        except Exception as e:
+            await self.app.emit_error(e)
@@ -0,0 +1,209 @@
+import contextvars
+import random
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+_current_span: "contextvars.ContextVar[Optional[Span]]" = (
+    contextvars.ContextVar("slackevent_current_span", default=None)
+)
+
+
+def current_span() -> Optional["Span"]:
+    """
+    Span of the request or handler being run, in handler threads too
+    """
+    return _current_span.get()
+
+
+class Span:
+    """
+    Timed operation of a trace, with attributes, exported once ended
+
+    Times are seconds since the epoch. ``stage()`` records consecutive
+    child spans the way ``Metrics.stage()`` records stage durations.
+    """
+
+    __slots__ = (
+        "tracer",
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "start_time",
+        "end_time",
+        "attributes",
+        "error",
+    )
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        parent: Optional["Span"] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+        start_time: Optional[float] = None,
+    ):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id: str
+        self.parent_id: Optional[str]
+        if parent is not None:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+        else:
+            self.trace_id = "%032x" % random.getrandbits(128)
+            self.parent_id = None
+        self.span_id: str = "%016x" % random.getrandbits(64)
+        self.start_time = start_time if start_time is not None else time.time()
+        self.end_time: Optional[float] = None
+        self.attributes: Dict[str, Any] = {}
+        if parent is not None:
+            for key in tracer.propagated:
+                if key in parent.attributes:
+                    self.attributes[key] = parent.attributes[key]
+        if attributes:
+            self.attributes.update(attributes)
+        self.error: Optional[str] = None
+
+    @property
+    def duration(self) -> Optional[float]:
+        if self.end_time is None:
+            return None
+        return self.end_time - self.start_time
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, e: BaseException) -> None:
+        self.error = repr(e)
+
+    def stage(self, name: str, started: Optional[float] = None) -> float:
+        """
+        Record a child span ``name`` from ``started``, or the start of this
+        span, until now, and return the current time to start the next
+        stage from
+        """
+        if started is None:
+            started = self.start_time
+        child = Span(self.tracer, name, self, start_time=started)
+        child.end()
+        assert child.end_time is not None
+        return child.end_time
+
+    def activate(self) -> Any:
+        """
+        Make this span the current one, until ``deactivate()`` is called
+        with the returned token
+        """
+        return _current_span.set(self)
+
+    def deactivate(self, token: Any) -> None:
+        _current_span.reset(token)
+
+    def end(self) -> None:
+        if self.end_time is None:
+            self.end_time = time.time()
+            self.tracer.export(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+    def __repr__(self) -> str:
+        return f"Span(name={self.name!r}, span_id={self.span_id!r})"
+
+
+class Tracer:
+    """
+    Creates the spans of requests, their stages and event handlers, and
+    passes them to ``exporter`` once ended
+
+    The span of a request is the parent of the spans of its handlers, which
+    find it through a context variable, also in handler threads. Child
+    spans copy the ``propagated`` attributes of their parent, like the
+    Slack event ID and retry number. Exceptions raised by the exporter are
+    counted as ``export_errors``.
+    """
+
+    enabled = True
+    propagated = ("slack.event_id", "slack.retry_num")
+
+    def __init__(self, exporter: Callable[[Span], Any]):
+        self.exporter = exporter
+        self.export_errors = 0
+
+    def start_span(
+        self,
+        name: str,
+        attributes: Optional[Dict[str, Any]] = None,
+        parent: Optional[Span] = None,
+    ) -> Span:
+        """
+        Start a span, child of ``parent`` or else of the current span
+        """
+        if parent is None:
+            parent = _current_span.get()
+        return Span(self, name, parent, attributes)
+
+    def export(self, span: Span) -> None:
+        try:
+            self.exporter(span)
+        except Exception:
+            self.export_errors += 1
+
+
+class _NullSpan(Span):
+    __slots__ = ()
+
+    def __init__(self) -> None:
+        pass
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def record_error(self, e: BaseException) -> None:
+        pass
+
+    def stage(self, name: str, started: Optional[float] = None) -> float:
+        return 0.0
+
+    def activate(self) -> Any:
+        return None
+
+    def deactivate(self, token: Any) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+NULL_SPAN: Span = _NullSpan()
+
+
+class NullTracer(Tracer):
+    """
+    Tracer which records nothing, used when tracing is disabled
+    """
+
+    enabled = False
+
+    def __init__(self) -> None:
+        self.exporter = lambda span: None
+        self.export_errors = 0
+
+    def start_span(
+        self,
+        name: str,
+        attributes: Optional[Dict[str, Any]] = None,
+        parent: Optional[Span] = None,
+    ) -> Span:
+        return NULL_SPAN
@@ -0,0 +1,168 @@
+import asyncio
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional, Tuple
+
+from starlette.background import BackgroundTask
+
+
+class EventLog:
+    """
+    Durable local log of acked events, stored in SQLite
+
+    Events are appended before they are acked and removed once their
+    handlers finished, so the events left in the log at startup are those
+    a previous process acked but didn't handle. Appends and removals made
+    while a commit is running are grouped into the next transaction, with
+    up to ``batch_size`` appends each.
+    """
+
+    def __init__(
+        self, path: str, batch_size: int = 256, synchronous: str = "FULL"
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.synchronous = synchronous
+
+        # sqlite connections must stay on a single thread
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="slackevent-wal"
+        )
+        self._connection: Optional[sqlite3.Connection] = None
+        self._appends: List[Tuple[bytes, "asyncio.Future[int]"]] = []
+        self._done: List[int] = []
+        self._flush_task: Optional["asyncio.Task[None]"] = None
+
+        self.commits = 0
+        self.appended = 0
+        self.completed = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(f"PRAGMA synchronous={self.synchronous}")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "received_at REAL NOT NULL, "
+                "body BLOB NOT NULL)"
+            )
+            self._connection = connection
+        return self._connection
+
+    async def _run(self, func: Any, *args: Any) -> Any:
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def append(self, body: bytes) -> int:
+        """
+        Durably store ``body``, and return its ID in the log
+        """
+        future: "asyncio.Future[int]" = asyncio.get_event_loop().create_future()
+        self._appends.append((body, future))
+        self._schedule_flush()
+        return await future
+
+    def mark_done(self, log_id: int) -> None:
+        """
+        Remove an event from the log, with the next commit
+        """
+        self._done.append(log_id)
+        self._schedule_flush()
+
+    def track(self, task: BackgroundTask, log_id: int) -> BackgroundTask:
+        """
+        Wrap the handlers of a logged event to mark it done once they finish
+        """
+        return BackgroundTask(self._run_task, task, log_id)
+
+    async def _run_task(self, task: BackgroundTask, log_id: int) -> None:
+        try:
+            await task()
+        except asyncio.CancelledError:
+            # abandoned at shutdown, left in the log to be replayed
+            raise
+        except BaseException:
+            # a failing handler is not retried, that's the error event's job
+            self.mark_done(log_id)
+            raise
+        else:
+            self.mark_done(log_id)
+
+    def _schedule_flush(self) -> None:
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self._flush())
+
+    async def _flush(self) -> None:
+        while self._appends or self._done:
+            appends = self._appends[: self.batch_size]
+            del self._appends[: len(appends)]
+            done, self._done = self._done, []
+            try:
+                ids = await self._run(
+                    self._write, [body for body, _ in appends], done
+                )
+            except Exception as e:
+                # Removals are lost with the failed transaction, those events
+                # will be replayed: handling is at-least-once anyway.
+                for _, future in appends:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), log_id in zip(appends, ids):
+                if not future.done():
+                    future.set_result(log_id)
+
+    def _write(self, bodies: List[bytes], done: List[int]) -> List[int]:
+        connection = self._connect()
+        now = time.time()
+        ids = []
+        connection.execute("BEGIN")
+        try:
+            for body in bodies:
+                cursor = connection.execute(
+                    "INSERT INTO events (received_at, body) VALUES (?, ?)",
+                    (now, body),
+                )
+                assert cursor.lastrowid is not None
+                ids.append(cursor.lastrowid)
+            if done:
+                connection.executemany(
+                    "DELETE FROM events WHERE id = ?", [(i,) for i in done]
+                )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        self.commits += 1
+        self.appended += len(bodies)
+        self.completed += len(done)
+        return ids
+
+    async def unfinished(self) -> List[Tuple[int, bytes]]:
+        """
+        Return the (ID, body) of logged events not marked done, oldest first
+        """
+        return await self._run(self._read_unfinished)
+
+    def _read_unfinished(self) -> List[Tuple[int, bytes]]:
+        cursor = self._connect().execute(
+            "SELECT id, body FROM events ORDER BY id"
+        )
+        return [(log_id, bytes(body)) for log_id, body in cursor]
+
+    async def flush(self) -> None:
+        if self._flush_task is not None:
+            await self._flush_task
+
+    async def close(self) -> None:
+        await self.flush()
+        await self._run(self._close)
+        self._executor.shutdown(wait=True)
+
+    def _close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
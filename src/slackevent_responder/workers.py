@@ -0,0 +1,92 @@
+import asyncio
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+def _call_handler(f: Callable[..., Any], args: Any, kwargs: Any) -> None:
+    # Runs in the worker process. SlackEvent arguments were pickled as their
+    # raw body and have been parsed again on the way in.
+    if asyncio.iscoroutinefunction(f):
+        asyncio.run(f(*args, **kwargs))
+    else:
+        f(*args, **kwargs)
+
+
+class ProcessWorkerPool:
+    """
+    Pool of worker processes running event handlers off the ASGI process
+
+    Keeps CPU heavy handlers from competing for the GIL with request
+    verification and acks. Handlers are sent to the workers by reference,
+    so they must be importable, module level functions; the others, like
+    ``once()`` wrappers, keep running in the ASGI process. ``SlackEvent``
+    arguments travel as the request body they were parsed from.
+    """
+
+    def __init__(
+        self, processes: Optional[int] = None, mp_context: Optional[str] = None
+    ):
+        context = (
+            multiprocessing.get_context(mp_context)
+            if mp_context is not None
+            else None
+        )
+        if processes is None:
+            processes = os.cpu_count() or 1
+        self.processes = processes
+        self._executor = ProcessPoolExecutor(
+            max_workers=processes, mp_context=context
+        )
+        self._picklable: Dict[Callable[..., Any], bool] = {}
+
+        self.submitted = 0
+        self.failed = 0
+
+    def accepts(self, f: Callable[..., Any]) -> bool:
+        """
+        Tell whether ``f`` can be sent to the worker processes
+        """
+        picklable = self._picklable.get(f)
+        if picklable is None:
+            try:
+                pickle.dumps(f)
+                picklable = True
+            except Exception:
+                picklable = False
+            self._picklable[f] = picklable
+        return picklable
+
+    async def run(
+        self, f: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> None:
+        loop = asyncio.get_event_loop()
+        self.submitted += 1
+        try:
+            await loop.run_in_executor(
+                self._executor, _call_handler, f, args, kwargs
+            )
+        except Exception:
+            self.failed += 1
+            raise
+
+    async def warm(self) -> None:
+        """
+        Start the worker processes, which are otherwise started on the
+        first calls
+        """
+        loop = asyncio.get_event_loop()
+        await asyncio.gather(
+            *(
+                loop.run_in_executor(self._executor, os.getpid)
+                for _ in range(self.processes)
+            )
+        )
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    def stats(self) -> Dict[str, int]:
+        return {"submitted": self.submitted, "failed": self.failed}
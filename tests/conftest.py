@@ -25,10 +25,14 @@ def slack_event_path():
     return "/slack/events"
 
 
-@pytest.fixture(scope="function")
-def app(signing_secret, slack_event_path):
+@pytest.fixture(
+    scope="function", params=[False, True], ids=["starlette", "raw_asgi"]
+)
+def app(request, signing_secret, slack_event_path):
     app = SlackEventApp(
-        slack_signing_secret=signing_secret, path=slack_event_path
+        slack_signing_secret=signing_secret,
+        path=slack_event_path,
+        raw_asgi=request.param,
     )
     return app
 
@@ -14,6 +14,13 @@ def create_signature(signing_secret, timestamp, data):
     return request_signature
 
 
+def create_headers(signing_secret, timestamp, data):
+    return {
+        "X-Slack-Request-Timestamp": timestamp,
+        "X-Slack-Signature": create_signature(signing_secret, timestamp, data),
+    }
+
+
 def load_event_fixture(event, as_string=True):
     filename = f"tests/data/{event}.json"
     with open(filename) as json_data:
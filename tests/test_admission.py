@@ -0,0 +1,212 @@
+import asyncio
+import json
+import time
+
+import pytest
+from freezegun import freeze_time
+from starlette.background import BackgroundTask
+from starlette.testclient import TestClient
+
+from slackevent_responder import (
+    DROP,
+    REJECT,
+    AdmissionController,
+    SlackEventApp,
+)
+
+from .helpers.helpers import create_headers
+
+
+class TestAdmissionController:
+    def test_admit_under_high_water_marks(self):
+        # setup
+        admission = AdmissionController(
+            max_pending_events=2, max_pending_bytes=100
+        )
+
+        # run
+        result = admission.admit("message", 10)
+
+        # validate
+        assert result is None
+        assert admission.pending_events == 1
+        assert admission.pending_bytes == 10
+
+    def test_shed_on_pending_events(self):
+        # setup
+        admission = AdmissionController(
+            max_pending_events=1, event_policies={"message": DROP}
+        )
+        admission.admit("message", 10)
+
+        # run
+        dropped = admission.admit("message", 10)
+        rejected = admission.admit("app_mention", 10)
+
+        # validate
+        assert dropped == DROP
+        assert rejected == REJECT
+        assert admission.stats() == {
+            "pending_events": 1,
+            "pending_bytes": 10,
+            "admitted": {"message": 1},
+            "rejected": {"app_mention": 1},
+            "dropped": {"message": 1},
+        }
+
+    def test_shed_on_pending_bytes(self):
+        # setup
+        admission = AdmissionController(max_pending_bytes=100)
+        admission.admit("message", 100)
+
+        # run
+        result = admission.admit("message", 1)
+
+        # validate
+        assert result == REJECT
+
+    def test_track_releases(self):
+        # setup
+        admission = AdmissionController(max_pending_events=1)
+        admission.admit("message", 10)
+
+        async def handler():
+            raise RuntimeError("boom")
+
+        # run
+        task = admission.track(BackgroundTask(handler), 10)
+        with pytest.raises(RuntimeError):
+            asyncio.run(task())
+
+        # validate
+        assert admission.pending_events == 0
+        assert admission.pending_bytes == 0
+        assert admission.admit("message", 10) is None
+
+    def test_unknown_policy(self):
+        with pytest.raises(ValueError):
+            AdmissionController(event_policies={"message": "ignore"})
+
+
+class TestEndpoint:
+    @freeze_time("2013-08-14")
+    @pytest.mark.parametrize(
+        "policy,status_code,text",
+        [(REJECT, 503, "Too many pending events"), (DROP, 200, "")],
+    )
+    def test_shed(
+        self,
+        signing_secret,
+        slack_event_path,
+        reaction_event_fixture,
+        policy,
+        status_code,
+        text,
+    ):
+        # setup
+        admission = AdmissionController(max_pending_events=1, policy=policy)
+        app = SlackEventApp(
+            slack_signing_secret=signing_secret, admission=admission
+        )
+        client = TestClient(app)
+        data = json.dumps(reaction_event_fixture)
+        headers = create_headers(signing_secret, str(int(time.time())), data)
+        event_type = reaction_event_fixture["event"]["type"]
+        # an event whose handlers are still running
+        admission.admit(event_type, 100)
+
+        CALLED = False
+
+        @app.on(event_type)
+        def handler(event_data):
+            nonlocal CALLED
+            CALLED = True
+
+        # run
+        response = client.post(slack_event_path, data=data, headers=headers)
+
+        # validate
+        assert response.status_code == status_code
+        assert response.text == text
+        assert CALLED is False
+        assert admission.pending_events == 1
+
+    @freeze_time("2013-08-14")
+    def test_release_after_handlers(
+        self, signing_secret, slack_event_path, reaction_event_fixture
+    ):
+        # setup
+        admission = AdmissionController(max_pending_events=1)
+        app = SlackEventApp(
+            slack_signing_secret=signing_secret, admission=admission
+        )
+        client = TestClient(app)
+        data = json.dumps(reaction_event_fixture)
+        headers = create_headers(signing_secret, str(int(time.time())), data)
+
+        PENDING = None
+
+        @app.on(reaction_event_fixture["event"]["type"])
+        def handler(event_data):
+            nonlocal PENDING
+            PENDING = admission.pending_events
+
+        # run
+        responses = [
+            client.post(slack_event_path, data=data, headers=headers)
+            for _ in range(2)
+        ]
+
+        # validate
+        assert [r.status_code for r in responses] == [200, 200]
+        assert PENDING == 1
+        assert admission.pending_events == 0
+        assert admission.admitted[reaction_event_fixture["event"]["type"]] == 2
+
+    @pytest.mark.parametrize("raw_asgi", [False, True])
+    @freeze_time("2013-08-14")
+    def test_release_when_ack_fails(
+        self, signing_secret, slack_event_path, reaction_event_fixture, raw_asgi
+    ):
+        # setup
+        admission = AdmissionController(max_pending_events=1)
+        app = SlackEventApp(
+            slack_signing_secret=signing_secret,
+            admission=admission,
+            raw_asgi=raw_asgi,
+        )
+        body = json.dumps(reaction_event_fixture).encode()
+        headers = create_headers(
+            signing_secret, str(int(time.time())), body.decode()
+        )
+        CALLED = []
+
+        @app.on(reaction_event_fixture["event"]["type"])
+        async def handler(event_data):
+            CALLED.append(event_data)
+
+        scope = {
+            "type": "http",
+            "method": "POST",
+            "path": slack_event_path,
+            "root_path": "",
+            "query_string": b"",
+            "headers": [
+                (k.lower().encode(), v.encode()) for k, v in headers.items()
+            ],
+        }
+
+        async def receive():
+            return {"type": "http.request", "body": body}
+
+        async def send(message):
+            # the client went away before the ack
+            raise OSError("Connection reset")
+
+        # run
+        with pytest.raises(OSError):
+            asyncio.run(app(scope, receive, send))
+
+        # validate
+        assert len(CALLED) == 1
+        assert admission.pending_events == 0
@@ -0,0 +1,207 @@
+import asyncio
+import time
+
+import pytest
+
+from slackevent_responder import (
+    Dispatcher,
+    EventBatcher,
+    Metrics,
+    SlackEvent,
+    SlackEventApp,
+)
+
+
+def test_flush_on_max_size():
+    # setup
+    BATCHES = []
+
+    async def handler(events):
+        BATCHES.append(events)
+
+    batcher = EventBatcher(handler, max_size=2, max_wait=10)
+
+    async def run():
+        await asyncio.gather(*(batcher.add(i) for i in range(4)))
+
+    # run
+    started = time.perf_counter()
+    asyncio.run(run())
+
+    # validate
+    assert time.perf_counter() - started < 1
+    assert BATCHES == [[0, 1], [2, 3]]
+    assert batcher.stats() == {
+        "events": 4,
+        "batches": 2,
+        "failed": 0,
+        "pending": 0,
+    }
+
+
+def test_flush_on_max_wait():
+    # setup
+    BATCHES = []
+
+    def handler(events):
+        BATCHES.append(events)
+
+    batcher = EventBatcher(handler, max_size=10, max_wait=0.05)
+
+    async def run():
+        await asyncio.gather(batcher.add(0), batcher.add(1))
+        await batcher.add(2)
+
+    # run
+    asyncio.run(run())
+
+    # validate
+    assert BATCHES == [[0, 1], [2]]
+    assert batcher.sizes.count == 2
+    assert batcher.sizes.sum == 3
+
+
+def test_error_raised_once_per_batch():
+    # setup
+    async def handler(events):
+        raise ValueError(len(events))
+
+    batcher = EventBatcher(handler, max_size=3, max_wait=10)
+
+    async def run():
+        return await asyncio.gather(
+            *(batcher.add(i) for i in range(3)), return_exceptions=True
+        )
+
+    # run
+    results = asyncio.run(run())
+
+    # validate
+    assert isinstance(results[0], ValueError)
+    assert results[1:] == [None, None]
+    assert batcher.failed == 1
+
+
+def test_flush():
+    # setup
+    BATCHES = []
+
+    async def handler(events):
+        BATCHES.append(events)
+
+    batcher = EventBatcher(handler, max_size=10, max_wait=10)
+
+    async def run():
+        task = asyncio.ensure_future(batcher.add(0))
+        await asyncio.sleep(0)
+        await batcher.flush()
+        await task
+
+    # run
+    asyncio.run(run())
+
+    # validate
+    assert BATCHES == [[0]]
+
+
+def test_invalid_max_size():
+    with pytest.raises(ValueError):
+        EventBatcher(lambda events: None, max_size=0)
+
+
+def make_event(channel):
+    return SlackEvent(
+        {"event": {"type": "reaction_added", "item": {"channel": channel}}}
+    )
+
+
+def test_app_on_batch(signing_secret):
+    # setup
+    app = SlackEventApp(slack_signing_secret=signing_secret, metrics=Metrics())
+    BATCHES = []
+
+    @app.on_batch("reaction_added", max_size=2, max_wait=10, channel="C1")
+    def handler(events):
+        BATCHES.append([event.channel for event in events])
+
+    async def run():
+        await asyncio.gather(
+            *(
+                app._tasks_from_event("reaction_added", make_event(channel))()
+                for channel in ("C1", "C2", "C1")
+            )
+        )
+
+    # run
+    asyncio.run(run())
+
+    # validate
+    assert BATCHES == [["C1", "C1"]]
+    assert app.handlers("reaction_added") == [handler]
+    assert (
+        'slackevent_batch_size_bucket{event="reaction_added",'
+        f'handler="{__name__}.test_app_on_batch.<locals>.handler",le="2"}} 1'
+    ) in app.metrics.render()
+
+
+def test_app_batch_wait_outside_slots(signing_secret):
+    # setup
+    app = SlackEventApp(
+        slack_signing_secret=signing_secret,
+        dispatcher=Dispatcher(concurrency=1, timeout=0.05),
+        metrics=Metrics(),
+    )
+    BATCHES = []
+    ERRORS = []
+
+    @app.on_batch("reaction_added", max_size=2, max_wait=0.2)
+    def handler(events):
+        BATCHES.append(len(events))
+
+    @app.on("error")
+    def on_error(e):
+        ERRORS.append(e)
+
+    async def run():
+        await asyncio.gather(
+            *(
+                app._tasks_from_event("reaction_added", make_event(channel))()
+                for channel in ("C1", "C2")
+            )
+        )
+
+    # run
+    asyncio.run(run())
+    app.remove_handler("reaction_added", handler)
+
+    # validate
+    # both events were batched within the single slot, and none timed out
+    assert BATCHES == [2]
+    assert ERRORS == []
+    assert not app._batchers
+    assert not app.dispatcher.slotless_handlers
+    assert "slackevent_batch_size" not in app.metrics.render()
+
+
+def test_app_flush_on_shutdown(signing_secret):
+    # setup
+    app = SlackEventApp(slack_signing_secret=signing_secret)
+    BATCHES = []
+
+    @app.on_batch("reaction_added", max_size=10, max_wait=10)
+    async def handler(events):
+        BATCHES.append(len(events))
+
+    async def run():
+        tasks = asyncio.ensure_future(
+            app._tasks_from_event("reaction_added", make_event("C1"))()
+        )
+        await asyncio.sleep(0)
+        await app.shutdown()
+        await tasks
+
+    # run
+    asyncio.run(run())
+
+    # validate
+    assert BATCHES == [1]
@@ -0,0 +1,276 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from freezegun import freeze_time
+from starlette.testclient import TestClient
+
+from slackevent_responder import LookupCache, Metrics, SlackEventApp
+
+from .helpers.helpers import create_headers
+
+
+def post_event(client, signing_secret, path, event):
+    data = json.dumps({"type": "event_callback", "event": event})
+    timestamp = str(int(time.time()))
+    return client.post(
+        path, data=data, headers=create_headers(signing_secret, timestamp, data)
+    )
+
+
+def test_hits_and_expiry():
+    # setup
+    cache = LookupCache(ttl=60)
+    calls = []
+
+    def loader(user):
+        calls.append(user)
+        return {"id": user, "name": f"name-{len(calls)}"}
+
+    # run
+    with freeze_time("2013-08-14 00:00:00") as frozen:
+        first = cache.get_sync(("users.info", "U1"), loader, "U1")
+        second = cache.get_sync(("users.info", "U1"), loader, "U1")
+        frozen.tick(61)
+        third = cache.get_sync(("users.info", "U1"), loader, "U1")
+
+    # validate
+    assert first == second == {"id": "U1", "name": "name-1"}
+    assert third == {"id": "U1", "name": "name-2"}
+    assert calls == ["U1", "U1"]
+    assert cache.hits == {"users.info": 1}
+    assert cache.misses == {"users.info": 2}
+    assert cache.evictions == 1
+    assert cache.hit_rate == pytest.approx(1 / 3)
+
+
+def test_lru_eviction():
+    # setup
+    cache = LookupCache(max_size=2)
+
+    # run
+    cache.get_sync("a", lambda: 1)
+    cache.get_sync("b", lambda: 2)
+    cache.get_sync("a", lambda: 0)
+    cache.get_sync("c", lambda: 3)
+
+    # validate
+    assert len(cache) == 2
+    assert cache.get_sync("a", lambda: 0) == 1
+    assert cache.get_sync("b", lambda: 0) == 0
+    assert cache.evictions == 2
+
+
+def test_invalid_max_size():
+    with pytest.raises(ValueError):
+        LookupCache(max_size=0)
+
+
+def test_single_flight_async_and_threads():
+    # setup
+    cache = LookupCache()
+    calls = []
+    loading = threading.Event()
+    release = threading.Event()
+
+    def loader(user):
+        calls.append(user)
+        loading.set()
+        release.wait(5)
+        return user.lower()
+
+    thread_results = []
+
+    def in_thread():
+        thread_results.append(
+            cache.get_sync(("users.info", "U1"), loader, "U1")
+        )
+
+    async def run():
+        first = asyncio.ensure_future(
+            cache.get(("users.info", "U1"), loader, "U1")
+        )
+        await asyncio.get_event_loop().run_in_executor(None, loading.wait, 5)
+        others = [
+            asyncio.ensure_future(cache.get(("users.info", "U1"), loader, "U1"))
+            for _ in range(10)
+        ]
+        threads = [threading.Thread(target=in_thread) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        await asyncio.sleep(0.05)
+        release.set()
+        results = await asyncio.gather(first, *others)
+        for thread in threads:
+            thread.join(5)
+        return results
+
+    # run
+    results = asyncio.run(run())
+
+    # validate
+    assert calls == ["U1"]
+    assert results == ["u1"] * 11
+    assert thread_results == ["u1"] * 3
+
+
+def test_async_loader_failure_not_cached():
+    # setup
+    cache = LookupCache()
+    calls = []
+
+    async def loader():
+        calls.append(None)
+        await asyncio.sleep(0.01)
+        if len(calls) == 1:
+            raise RuntimeError("ratelimited")
+        return "ok"
+
+    async def run():
+        failed = await asyncio.gather(
+            cache.get("key", loader),
+            cache.get("key", loader),
+            return_exceptions=True,
+        )
+        return failed, await cache.get("key", loader)
+
+    # run
+    failed, result = asyncio.run(run())
+
+    # validate
+    assert [type(e) for e in failed] == [RuntimeError, RuntimeError]
+    assert result == "ok"
+    assert len(calls) == 2
+    assert len(cache) == 1
+
+
+def test_cancelled_waiter_doesnt_cancel_load():
+    # setup
+    cache = LookupCache()
+
+    async def loader():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def run():
+        waiter = asyncio.ensure_future(cache.get("key", loader))
+        other = asyncio.ensure_future(cache.get("key", loader))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        loading = len(cache._tasks)
+        return loading, await other
+
+    # run
+    loading, result = asyncio.run(run())
+
+    # validate
+    assert loading == 1
+    assert result == "ok"
+    assert len(cache) == 1
+    assert not cache._tasks
+
+
+def test_invalidated_while_loading():
+    # setup
+    cache = LookupCache()
+    key = ("users.info", "U1")
+
+    def loader():
+        # the user changed while their profile was being fetched
+        cache.invalidate(key)
+        return "stale"
+
+    # run
+    result = cache.get_sync(key, loader)
+
+    # validate
+    assert result == "stale"
+    assert len(cache) == 0
+    assert cache.get_sync(key, lambda: "fresh") == "fresh"
+
+
+def test_invalidate_event():
+    # setup
+    cache = LookupCache(
+        invalidations={"team_rename": lambda event: [("team.info", "T1")]}
+    )
+    for key in (
+        ("users.info", "U1"),
+        ("users.info", "U2"),
+        ("conversations.info", "C1"),
+        ("team.info", "T1"),
+    ):
+        cache.get_sync(key, lambda: "value")
+
+    class Event:
+        def __init__(self, event):
+            self.event = event
+
+    # run
+    cache.invalidate_event("user_change", Event({"user": {"id": "U1"}}))
+    cache.invalidate_event("channel_rename", Event({"channel": {"id": "C1"}}))
+    cache.invalidate_event("team_rename", Event({}))
+    cache.invalidate_event("message", Event({"user": "U2"}))
+
+    # validate
+    assert len(cache) == 1
+    assert cache.invalidated == 3
+    assert cache.get_sync(("users.info", "U2"), lambda: "new") == "value"
+
+
+@freeze_time("2013-08-14")
+def test_app_invalidates_before_handlers(signing_secret, slack_event_path):
+    # setup
+    cache = LookupCache()
+    app = SlackEventApp(
+        slack_signing_secret=signing_secret,
+        cache=cache,
+        metrics=Metrics(),
+        metrics_path="/metrics",
+        lazy_parse=True,
+    )
+    cache.get_sync(("users.info", "U1"), lambda: {"name": "old"})
+    cache.get_sync(("conversations.info", "C1"), lambda: {"name": "old"})
+    seen = []
+
+    @app.on("user_change")
+    def on_user_change(event):
+        seen.append(
+            cache.get_sync(
+                ("users.info", "U1"), lambda: event.event["user"]["profile"]
+            )
+        )
+
+    client = TestClient(app)
+
+    # run
+    post_event(
+        client,
+        signing_secret,
+        slack_event_path,
+        {
+            "type": "user_change",
+            "user": {"id": "U1", "profile": {"name": "new"}},
+        },
+    )
+    # no handler, still parsed for its invalidation
+    post_event(
+        client,
+        signing_secret,
+        slack_event_path,
+        {"type": "channel_rename", "channel": {"id": "C1", "name": "new"}},
+    )
+    text = client.get("/metrics").text
+
+    # validate
+    assert seen == [{"name": "new"}]
+    assert len(cache) == 1
+    assert (
+        cache.get_sync(("conversations.info", "C1"), lambda: "reloaded")
+        == "reloaded"
+    )
+    assert 'slackevent_cache_misses_total{namespace="users.info"} 2' in text
+    assert "slackevent_cache_invalidated 2" in text
+    assert "slackevent_cache_size 1" in text
@@ -0,0 +1,100 @@
+import json
+import time
+
+import pytest
+from freezegun import freeze_time
+from starlette.testclient import TestClient
+
+from slackevent_responder import DedupCache, SlackEventApp
+
+from .helpers.helpers import create_headers
+
+
+class TestDedupCache:
+    def test_seen(self):
+        # setup
+        cache = DedupCache(max_size=10)
+
+        # run
+        first = cache.seen("Ev1")
+        second = cache.seen("Ev1")
+
+        # validate
+        assert first is False
+        assert second is True
+        assert cache.stats() == {
+            "size": 1,
+            "hits": 1,
+            "misses": 1,
+            "evictions": 0,
+        }
+
+    def test_lru_eviction(self):
+        # setup
+        cache = DedupCache(max_size=2)
+        cache.seen("Ev1")
+        cache.seen("Ev2")
+        # refresh Ev1 so Ev2 becomes the least recently used entry
+        cache.seen("Ev1")
+
+        # run
+        cache.seen("Ev3")
+
+        # validate
+        assert "Ev1" in cache
+        assert "Ev2" not in cache
+        assert "Ev3" in cache
+        assert cache.evictions == 1
+
+    def test_ttl_expiry(self):
+        # setup
+        with freeze_time("2013-08-14") as frozen:
+            cache = DedupCache(max_size=10, ttl=60)
+            cache.seen("Ev1")
+
+            # run
+            frozen.tick(61)
+            result = cache.seen("Ev1")
+
+        # validate
+        assert result is False
+        assert cache.misses == 2
+        assert cache.evictions == 1
+
+    def test_invalid_size(self):
+        with pytest.raises(ValueError):
+            DedupCache(max_size=0)
+
+
+@freeze_time("2013-08-14")
+def test_endpoint_acks_duplicate(
+    signing_secret, slack_event_path, reaction_event_fixture
+):
+    # setup
+    cache = DedupCache()
+    app = SlackEventApp(slack_signing_secret=signing_secret, dedup_cache=cache)
+    client = TestClient(app)
+    json_data = reaction_event_fixture
+    data = json.dumps(json_data)
+    headers = create_headers(signing_secret, str(int(time.time())), data)
+    headers["X-Slack-Retry-Num"] = "1"
+    headers["X-Slack-Retry-Reason"] = "http_timeout"
+
+    CALLS = 0
+
+    @app.on(json_data["event"]["type"])
+    def handler(event_data):
+        nonlocal CALLS
+        CALLS += 1
+
+    # run
+    responses = [
+        client.post(slack_event_path, data=data, headers=headers)
+        for _ in range(3)
+    ]
+
+    # validate
+    assert [r.status_code for r in responses] == [200, 200, 200]
+    assert CALLS == 1
+    assert cache.hits == 2
+    assert cache.misses == 1
@@ -0,0 +1,237 @@
+import asyncio
+import time
+
+import pytest
+
+from slackevent_responder import (
+    Dispatcher,
+    HandlerTimeout,
+    SlackEventApp,
+    SlackEventAppException,
+)
+
+
+def test_run_concurrently():
+    # setup
+    dispatcher = Dispatcher()
+    running = 0
+    max_running = 0
+
+    async def handler(event_data):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.05)
+        running -= 1
+
+    # run
+    started = time.perf_counter()
+    asyncio.run(dispatcher.run("message", [handler] * 3, {}))
+    elapsed = time.perf_counter() - started
+
+    # validate
+    assert max_running == 3
+    assert elapsed < 0.15
+
+
+def test_run_sync_and_async():
+    # setup
+    dispatcher = Dispatcher()
+    CALLED = []
+
+    def sync_handler(event_data):
+        CALLED.append("sync")
+
+    async def async_handler(event_data):
+        CALLED.append("async")
+
+    # run
+    asyncio.run(dispatcher.run("message", [sync_handler, async_handler], {}))
+
+    # validate
+    assert sorted(CALLED) == ["async", "sync"]
+
+
+def test_global_concurrency():
+    # setup
+    dispatcher = Dispatcher(concurrency=2)
+    STATS = []
+
+    async def handler(event_data):
+        await asyncio.sleep(0.01)
+        STATS.append(dispatcher.stats())
+
+    # run
+    asyncio.run(dispatcher.run("message", [handler] * 4, {}))
+
+    # validate
+    assert max(s["in_flight"] for s in STATS) == 2
+    assert STATS[0]["queue_depth"] == 2
+    assert STATS[0]["queued_by_event"] == {"message": 2}
+    assert dispatcher.stats()["in_flight"] == 0
+    assert dispatcher.stats()["queue_depth"] == 0
+
+
+def test_event_concurrency():
+    # setup
+    dispatcher = Dispatcher(event_concurrency={"message": 1})
+    RUNNING = {"message": 0, "reaction_added": 0}
+    MAX_RUNNING = {"message": 0, "reaction_added": 0}
+
+    def make_handler(event):
+        async def handler(event_data):
+            RUNNING[event] += 1
+            MAX_RUNNING[event] = max(MAX_RUNNING[event], RUNNING[event])
+            await asyncio.sleep(0.01)
+            RUNNING[event] -= 1
+
+        return handler
+
+    async def run():
+        await asyncio.gather(
+            dispatcher.run("message", [make_handler("message")] * 3, {}),
+            dispatcher.run(
+                "reaction_added", [make_handler("reaction_added")] * 3, {}
+            ),
+        )
+
+    # run
+    asyncio.run(run())
+
+    # validate
+    assert MAX_RUNNING == {"message": 1, "reaction_added": 3}
+
+
+def test_exception_after_all_handlers():
+    # setup
+    dispatcher = Dispatcher()
+    CALLED = []
+
+    async def failing(event_data):
+        raise RuntimeError("boom")
+
+    async def handler(event_data):
+        await asyncio.sleep(0.01)
+        CALLED.append(event_data)
+
+    # run
+    with pytest.raises(RuntimeError):
+        asyncio.run(dispatcher.run("message", [failing, handler], {}))
+
+    # validate
+    assert CALLED == [{}]
+
+
+def test_async_handler_timeout():
+    # setup
+    dispatcher = Dispatcher(timeout=0.01)
+    ERRORS = []
+    CALLED = []
+
+    async def error_handler(e):
+        ERRORS.append(e)
+
+    async def slow_handler(event_data):
+        await asyncio.sleep(10)
+        CALLED.append("slow")
+
+    async def handler(event_data):
+        CALLED.append("fast")
+
+    dispatcher.error_handler = error_handler
+
+    # run
+    started = time.perf_counter()
+    asyncio.run(dispatcher.run("message", [slow_handler, handler], {}))
+
+    # validate
+    assert time.perf_counter() - started < 1
+    assert CALLED == ["fast"]
+    assert len(ERRORS) == 1
+    assert isinstance(ERRORS[0], HandlerTimeout)
+    assert isinstance(ERRORS[0], SlackEventAppException)
+    assert ERRORS[0].handler is slow_handler
+    assert ERRORS[0].stack is None
+    assert dispatcher.timeouts == {"message": 1}
+
+
+def test_timeout_without_error_handler():
+    # setup
+    dispatcher = Dispatcher(event_timeouts={"message": 0.01})
+
+    async def slow_handler(event_data):
+        await asyncio.sleep(10)
+
+    # run
+    with pytest.raises(HandlerTimeout):
+        asyncio.run(dispatcher.run("message", [slow_handler], {}))
+
+
+def test_sync_handler_watchdog():
+    # setup
+    dispatcher = Dispatcher(timeout=10)
+    ERRORS = []
+    CALLED = []
+
+    async def error_handler(e):
+        ERRORS.append(e)
+
+    def slow_handler(event_data):
+        time.sleep(0.1)
+        CALLED.append("slow")
+
+    dispatcher.error_handler = error_handler
+    dispatcher.handler_timeouts["message", slow_handler] = 0.01
+
+    # run
+    asyncio.run(dispatcher.run("message", [slow_handler], {}))
+
+    # validate
+    # sync handlers are reported, and keep running
+    assert CALLED == ["slow"]
+    assert len(ERRORS) == 1
+    assert ERRORS[0].timeout == 0.01
+    assert "in slow_handler" in ERRORS[0].stack
+    assert "time.sleep(0.1)" in ERRORS[0].stack
+    dispatcher.shutdown()
+
+
+def test_timeout_priority():
+    # setup
+    dispatcher = Dispatcher(timeout=3, event_timeouts={"message": 2})
+
+    def handler(event_data):
+        pass
+
+    dispatcher.handler_timeouts["message", handler] = 1
+
+    # validate
+    assert dispatcher.timeout_for("message", handler) == 1
+    assert dispatcher.timeout_for("message", print) == 2
+    assert dispatcher.timeout_for("reaction_added", handler) == 3
+
+
+def test_app_timeout(signing_secret):
+    # setup
+    app = SlackEventApp(slack_signing_secret=signing_secret)
+    ERRORS = []
+
+    @app.on("message", timeout=0.01)
+    async def slow_handler(event_data):
+        await asyncio.sleep(10)
+
+    @app.on("error")
+    def error_handler(e):
+        ERRORS.append(e)
+
+    # run
+    asyncio.run(app._tasks_from_event("message", {})())
+    app.remove_handler("message", slow_handler)
+
+    # validate
+    assert [e.handler for e in ERRORS] == [slow_handler]
+    assert str(ERRORS[0]) == (
+        f"Handler {__name__}.test_app_timeout.<locals>.slow_handler "
+        "for event 'message' exceeded its timeout of 0.01s"
+    )
+    assert app.dispatcher.handler_timeouts == {}
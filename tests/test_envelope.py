@@ -0,0 +1,207 @@
+import json
+import time
+
+import orjson
+import pytest
+from freezegun import freeze_time
+from starlette.testclient import TestClient
+
+from slackevent_responder import EventEnvelope, SlackEventApp
+from slackevent_responder.envelope import default_json_loads
+
+from .helpers.helpers import create_headers
+
+
+def test_default_json_loads():
+    assert default_json_loads() is orjson.loads
+
+
+class TestEventEnvelope:
+    def test_parse_on_access(self, reaction_event_fixture):
+        # setup
+        body = json.dumps(reaction_event_fixture).encode()
+
+        # run
+        envelope = EventEnvelope(body)
+
+        # validate
+        assert envelope.parsed is False
+        assert envelope.type == "event_callback"
+        assert envelope.parsed is True
+        assert envelope.event_type == "reaction_added"
+        assert envelope.event_id == reaction_event_fixture["event_id"]
+        assert envelope.data == reaction_event_fixture
+
+    def test_no_event(self, url_challenge_fixture):
+        # setup
+        envelope = EventEnvelope(json.dumps(url_challenge_fixture).encode())
+
+        # validate
+        assert envelope.type == "url_verification"
+        assert envelope.event_type is None
+        assert envelope.event_id is None
+
+    def test_mentions(self, reaction_event_fixture):
+        # setup
+        envelope = EventEnvelope(json.dumps(reaction_event_fixture).encode())
+
+        # validate
+        assert envelope.mentions([b'"message"', b'"reaction_added"'])
+        assert not envelope.mentions([b'"app_mention"'])
+        assert envelope.parsed is False
+
+    def test_not_an_object(self):
+        # setup
+        envelope = EventEnvelope(b'["event_callback"]')
+
+        # validate
+        with pytest.raises(ValueError):
+            envelope.event_type
+
+    def test_encode_on_access(self, reaction_event_fixture):
+        # setup
+        envelope = EventEnvelope(None, data=reaction_event_fixture, size=42)
+
+        # validate
+        assert envelope.parsed is True
+        assert envelope.event_type == "reaction_added"
+        assert envelope.size == 42
+        assert envelope._body is None
+        assert json.loads(envelope.body) == reaction_event_fixture
+
+    def test_size_of_body(self, reaction_event_fixture):
+        # setup
+        body = json.dumps(reaction_event_fixture).encode()
+
+        # validate
+        assert EventEnvelope(body).size == len(body)
+
+
+class TestEndpoint:
+    def _post(self, app, signing_secret, slack_event_path, json_data):
+        client = TestClient(app)
+        data = json.dumps(json_data)
+        headers = create_headers(signing_secret, str(int(time.time())), data)
+        return client.post(slack_event_path, data=data, headers=headers)
+
+    @freeze_time("2013-08-14")
+    def test_invalid_body(self, signing_secret, slack_event_path):
+        # setup
+        app = SlackEventApp(slack_signing_secret=signing_secret)
+        ERRORS = []
+
+        @app.on("error")
+        def error_handler(e):
+            ERRORS.append(str(e))
+
+        client = TestClient(app)
+        timestamp = str(int(time.time()))
+
+        # run
+        responses = [
+            client.post(
+                slack_event_path,
+                data=data,
+                headers=create_headers(signing_secret, timestamp, data),
+            )
+            for data in ("not json", '["event_callback"]', "42")
+        ]
+
+        # validate
+        assert [r.status_code for r in responses] == [400, 400, 400]
+        assert ERRORS == ["Invalid request body"] * 3
+
+    @freeze_time("2013-08-14")
+    def test_custom_json_loads(
+        self, signing_secret, slack_event_path, reaction_event_fixture
+    ):
+        # setup
+        PARSED = []
+
+        def loads(body):
+            PARSED.append(body)
+            return json.loads(body)
+
+        app = SlackEventApp(
+            slack_signing_secret=signing_secret, json_loads=loads
+        )
+
+        # run
+        response = self._post(
+            app, signing_secret, slack_event_path, reaction_event_fixture
+        )
+
+        # validate
+        assert response.status_code == 200
+        assert len(PARSED) == 1
+
+    @freeze_time("2013-08-14")
+    def test_lazy_parse_without_handler(
+        self, signing_secret, slack_event_path, reaction_event_fixture
+    ):
+        # setup
+        PARSED = []
+
+        def loads(body):
+            PARSED.append(body)
+            return json.loads(body)
+
+        app = SlackEventApp(
+            slack_signing_secret=signing_secret,
+            json_loads=loads,
+            lazy_parse=True,
+        )
+
+        @app.on("app_mention")
+        def handler(event_data):
+            pass
+
+        # run
+        response = self._post(
+            app, signing_secret, slack_event_path, reaction_event_fixture
+        )
+
+        # validate
+        assert response.status_code == 200
+        assert PARSED == []
+
+    @freeze_time("2013-08-14")
+    def test_lazy_parse_with_handler(
+        self, signing_secret, slack_event_path, reaction_event_fixture
+    ):
+        # setup
+        app = SlackEventApp(
+            slack_signing_secret=signing_secret, lazy_parse=True
+        )
+        EVENT_DATA_IN_HANDLER = None
+
+        @app.on("reaction_added")
+        def handler(event_data):
+            nonlocal EVENT_DATA_IN_HANDLER
+            EVENT_DATA_IN_HANDLER = event_data
+
+        # run
+        response = self._post(
+            app, signing_secret, slack_event_path, reaction_event_fixture
+        )
+
+        # validate
+        assert response.status_code == 200
+        assert EVENT_DATA_IN_HANDLER == reaction_event_fixture
+
+    @freeze_time("2013-08-14")
+    def test_lazy_parse_challenge(
+        self, signing_secret, slack_event_path, url_challenge_fixture
+    ):
+        # setup
+        app = SlackEventApp(
+            slack_signing_secret=signing_secret, lazy_parse=True
+        )
+
+        # run
+        response = self._post(
+            app, signing_secret, slack_event_path, url_challenge_fixture
+        )
+
+        # validate
+        assert response.text == url_challenge_fixture["challenge"]
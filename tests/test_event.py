@@ -0,0 +1,113 @@
+import json
+import time
+
+import pytest
+from freezegun import freeze_time
+from starlette.testclient import TestClient
+
+from slackevent_responder import SlackEvent
+
+from .helpers.helpers import create_headers
+
+
+class TestSlackEvent:
+    def test_fields(self, reaction_event_fixture):
+        # run
+        event = SlackEvent(reaction_event_fixture)
+
+        # validate
+        assert event.team_id == "T0JFD6M53"
+        assert event.api_app_id == "A28SCUES3"
+        assert event.event_id == "Ev0PV52K21"
+        assert event.event_time == 1477958240
+        assert event.type == "reaction_added"
+        assert event.subtype is None
+        assert event.channel == "D2AQCJCQ2"
+        assert event.user == "U27FFLNF4"
+        assert event.event is reaction_event_fixture["event"]
+        assert event.data is event
+
+    def test_dict_access(self, reaction_event_fixture):
+        # run
+        event = SlackEvent(reaction_event_fixture)
+
+        # validate
+        assert event["event"]["item"]["channel"] == "D2AQCJCQ2"
+        assert event.get("missing") is None
+        assert "event" in event
+        assert set(event.keys()) == set(reaction_event_fixture.keys())
+        assert len(event) == len(reaction_event_fixture)
+        assert event == reaction_event_fixture
+        assert reaction_event_fixture == event
+        with pytest.raises(KeyError):
+            event["missing"]
+
+    def test_plain_dict(self, reaction_event_fixture):
+        # setup
+        event = SlackEvent(reaction_event_fixture)
+
+        # run
+        event["handled"] = True
+
+        # validate
+        assert isinstance(event, dict)
+        assert json.loads(json.dumps(event))["handled"] is True
+        assert "handled" not in reaction_event_fixture
+
+    def test_channel_and_user_objects(self):
+        # run
+        event = SlackEvent(
+            {
+                "event": {
+                    "type": "channel_created",
+                    "channel": {"id": "C024BE91L", "name": "fun"},
+                    "user": {"id": "U024BE7LH"},
+                }
+            }
+        )
+
+        # validate
+        assert event.channel == "C024BE91L"
+        assert event.user == "U024BE7LH"
+
+    def test_no_event(self, url_challenge_fixture):
+        # run
+        event = SlackEvent(url_challenge_fixture)
+
+        # validate
+        assert event.event == {}
+        assert event.type is None
+        assert event.channel is None
+        assert event.user is None
+
+    def test_slots(self, reaction_event_fixture):
+        # setup
+        event = SlackEvent(reaction_event_fixture)
+
+        # validate
+        assert not hasattr(event, "__dict__")
+
+
+@freeze_time("2013-08-14")
+def test_handler_receives_slack_event(
+    app, signing_secret, slack_event_path, reaction_event_fixture
+):
+    # setup
+    client = TestClient(app)
+    data = json.dumps(reaction_event_fixture)
+    headers = create_headers(signing_secret, str(int(time.time())), data)
+    EVENT_IN_HANDLER = None
+
+    @app.on("reaction_added")
+    def handler(event):
+        nonlocal EVENT_IN_HANDLER
+        EVENT_IN_HANDLER = event
+
+    # run
+    client.post(slack_event_path, data=data, headers=headers)
+
+    # validate
+    assert isinstance(EVENT_IN_HANDLER, SlackEvent)
+    assert EVENT_IN_HANDLER.channel == "D2AQCJCQ2"
+    # the raw body is only kept for worker processes
+    assert EVENT_IN_HANDLER._body is None
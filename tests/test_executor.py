@@ -0,0 +1,115 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from starlette.testclient import TestClient
+
+from slackevent_responder import Dispatcher, HandlerExecutor, SlackEventApp
+
+
+def test_run_in_dedicated_thread():
+    # setup
+    executor = HandlerExecutor(max_workers=1, thread_name_prefix="test-pool")
+
+    # run
+    thread_name = asyncio.run(
+        executor.run(lambda: threading.current_thread().name)
+    )
+
+    # validate
+    assert thread_name.startswith("test-pool")
+    stats = executor.stats()
+    assert stats["submitted"] == 1
+    assert stats["completed"] == 1
+    assert stats["pending"] == 0
+    assert stats["active"] == 0
+    executor.shutdown()
+
+
+def test_saturation_and_wait_time():
+    # setup
+    executor = HandlerExecutor(max_workers=1)
+    SATURATION = []
+
+    def handler():
+        SATURATION.append(executor.saturation)
+        time.sleep(0.02)
+
+    async def run():
+        await asyncio.gather(executor.run(handler), executor.run(handler))
+
+    # run
+    asyncio.run(run())
+
+    # validate
+    assert SATURATION == [1.0, 1.0]
+    stats = executor.stats()
+    assert stats["wait_time_max"] >= 0.01
+    assert stats["saturation"] == 0.0
+    executor.shutdown()
+
+
+def test_invalid_max_workers():
+    with pytest.raises(ValueError):
+        HandlerExecutor(max_workers=0)
+
+
+def test_event_executors():
+    # setup
+    default = HandlerExecutor(max_workers=1, thread_name_prefix="default")
+    reactions = HandlerExecutor(max_workers=1, thread_name_prefix="reaction")
+    dispatcher = Dispatcher(
+        executor=default, event_executors={"reaction_added": reactions}
+    )
+    THREADS = {}
+
+    def handler(event_data):
+        THREADS[event_data["type"]] = threading.current_thread().name
+
+    async def run():
+        await dispatcher.run("message", [handler], {"type": "message"})
+        await dispatcher.run(
+            "reaction_added", [handler], {"type": "reaction_added"}
+        )
+
+    # run
+    asyncio.run(run())
+
+    # validate
+    assert THREADS["message"].startswith("default")
+    assert THREADS["reaction_added"].startswith("reaction")
+    assert set(dispatcher.executor_stats()) == {"default", "reaction_added"}
+    dispatcher.shutdown()
+
+
+def test_shutdown_with_app(signing_secret):
+    # setup
+    executor = HandlerExecutor(max_workers=1)
+    app = SlackEventApp(
+        slack_signing_secret=signing_secret,
+        dispatcher=Dispatcher(executor=executor),
+    )
+
+    # run
+    # TestClient lifespan needs a current loop, asyncio.run unsets it
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    with TestClient(app):
+        pass
+
+    # validate
+    with pytest.raises(RuntimeError):
+        asyncio.run(executor.run(lambda: None))
+
+
+def test_warm():
+    # setup
+    executor = HandlerExecutor(max_workers=3)
+
+    # run
+    asyncio.run(executor.warm())
+
+    # validate
+    assert len(executor._executor._threads) == 3
+    assert executor.stats()["submitted"] == 0
+    executor.shutdown()
@@ -0,0 +1,152 @@
+import asyncio
+import json
+import time
+
+import pytest
+from freezegun import freeze_time
+from starlette.testclient import TestClient
+
+from slackevent_responder import (
+    AdmissionController,
+    DedupCache,
+    Dispatcher,
+    Metrics,
+    NullMetrics,
+    SlackEventApp,
+)
+from slackevent_responder.metrics import Histogram
+
+from .helpers.helpers import create_headers
+
+
+def test_histogram():
+    # setup
+    histogram = Histogram(buckets=(0.1, 1.0))
+
+    # run
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+
+    # validate
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(2.65)
+    assert histogram.samples("h", {"stage": "parse"}) == [
+        ("h_bucket", {"stage": "parse", "le": "0.1"}, 2),
+        ("h_bucket", {"stage": "parse", "le": "1.0"}, 3),
+        ("h_bucket", {"stage": "parse", "le": "+Inf"}, 4),
+        ("h_sum", {"stage": "parse"}, pytest.approx(2.65)),
+        ("h_count", {"stage": "parse"}, 4),
+    ]
+
+
+def test_null_metrics():
+    # setup
+    metrics = NullMetrics()
+
+    # run
+    started = metrics.stage("parse", metrics.start())
+    metrics.observe_handler("message", test_null_metrics, started, error=True)
+
+    # validate
+    assert metrics.stages == {}
+    assert metrics.handler_durations == {}
+    assert metrics.handler_errors == {}
+
+
+def test_handler_metrics():
+    # setup
+    metrics = Metrics()
+    dispatcher = Dispatcher(metrics=metrics)
+
+    def handler(event_data):
+        pass
+
+    async def failing(event_data):
+        raise RuntimeError("boom")
+
+    # run
+    with pytest.raises(RuntimeError):
+        asyncio.run(dispatcher.run("message", [handler, failing], {}))
+
+    # validate
+    prefix = f"{__name__}.test_handler_metrics.<locals>"
+    assert metrics.handler_durations["message", f"{prefix}.handler"].count == 1
+    assert metrics.handler_durations["message", f"{prefix}.failing"].count == 1
+    assert metrics.handler_errors == {("message", f"{prefix}.failing"): 1}
+
+
+@freeze_time("2013-08-14")
+def test_metrics_endpoint(
+    signing_secret, slack_event_path, reaction_event_fixture
+):
+    # setup
+    app = SlackEventApp(
+        slack_signing_secret=signing_secret,
+        metrics=Metrics(),
+        metrics_path="/metrics",
+        dedup_cache=DedupCache(),
+        admission=AdmissionController(max_pending_events=10),
+    )
+    client = TestClient(app)
+    data = json.dumps(reaction_event_fixture)
+    headers = create_headers(signing_secret, str(int(time.time())), data)
+
+    @app.once("reaction_added")
+    def handler(event_data):
+        pass
+
+    # run
+    client.post(slack_event_path, data=data, headers=headers)
+    response = client.get("/metrics")
+
+    # validate
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    for stage in ("read_body", "verify", "parse", "dispatch"):
+        assert (
+            f'slackevent_stage_duration_seconds_count{{stage="{stage}"}} 1'
+            in text
+        )
+    assert (
+        'slackevent_handler_duration_seconds_count{event="reaction_added",'
+        f'handler="{__name__}.test_metrics_endpoint.<locals>.handler"}} 1'
+    ) in text
+    assert "# TYPE slackevent_handler_errors_total counter" in text
+    assert 'slackevent_executor_saturation{executor="default"} 0' in text
+    assert "slackevent_dedup_misses 1" in text
+    assert "slackevent_admission_pending_events 0" in text
+
+
+def test_no_metrics_route(app):
+    # setup
+    client = TestClient(app)
+
+    # run
+    response = client.get("/metrics")
+
+    # validate
+    assert response.status_code == 404
+    assert isinstance(app.metrics, NullMetrics)
+
+
+def test_dispatcher_metrics(signing_secret):
+    # setup
+    metrics = Metrics()
+
+    # run
+    app = SlackEventApp(
+        slack_signing_secret=signing_secret,
+        dispatcher=Dispatcher(metrics=metrics),
+    )
+
+    # validate
+    assert app.metrics is metrics
+    assert app.dispatcher.metrics is metrics
+    with pytest.raises(ValueError):
+        SlackEventApp(
+            slack_signing_secret=signing_secret,
+            dispatcher=Dispatcher(metrics=metrics),
+            metrics=Metrics(),
+        )
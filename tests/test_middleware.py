@@ -0,0 +1,173 @@
+import asyncio
+
+import pytest
+
+from slackevent_responder import SlackEvent, SlackEventApp
+
+
+@pytest.fixture
+def app(signing_secret):
+    return SlackEventApp(slack_signing_secret=signing_secret)
+
+
+def run_event(app, event_type, *args):
+    asyncio.run(app._tasks_from_event(event_type, *args)())
+
+
+def test_order(app):
+    # setup
+    CALLS = []
+
+    @app.before
+    def before(event_type, event):
+        CALLS.append(("before", event_type))
+
+    @app.around
+    async def around(event_type, call_next, event):
+        CALLS.append("around in")
+        await call_next()
+        CALLS.append("around out")
+
+    @app.after()
+    async def after(event_type, event):
+        CALLS.append("after")
+
+    @app.on("message")
+    def handler(event):
+        CALLS.append("handler")
+
+    # run
+    run_event(app, "message", SlackEvent({"event": {"type": "message"}}))
+
+    # validate
+    # the first registered middleware is the outermost
+    assert CALLS == [
+        ("before", "message"),
+        "around in",
+        "handler",
+        "after",
+        "around out",
+    ]
+
+
+def test_before_skips_handlers(app):
+    # setup
+    CALLS = []
+
+    @app.before
+    def only_team(event_type, event):
+        return event.team_id == "T1"
+
+    @app.on("message")
+    def handler(event):
+        CALLS.append(event.team_id)
+
+    # run
+    for team in ("T1", "T2"):
+        run_event(app, "message", SlackEvent({"team_id": team, "event": {}}))
+
+    # validate
+    assert CALLS == ["T1"]
+
+
+def test_events_and_removal(app):
+    # setup
+    CALLS = []
+
+    @app.before(events=["reaction_added"])
+    def before(event_type, event):
+        CALLS.append("before")
+
+    @app.on("message")
+    @app.on("reaction_added")
+    def handler(event):
+        CALLS.append("handler")
+
+    # run
+    run_event(app, "message", SlackEvent({}))
+    run_event(app, "reaction_added", SlackEvent({}))
+    app.remove_middleware(before)
+    run_event(app, "reaction_added", SlackEvent({}))
+
+    # validate
+    assert CALLS == ["handler", "before", "handler", "handler"]
+
+
+def test_single_event(app):
+    # setup
+    CALLS = []
+
+    @app.before(events="message")
+    def before(event_type, event):
+        CALLS.append(event_type)
+
+    @app.on("message")
+    @app.on("m")
+    def handler(event):
+        pass
+
+    # run
+    run_event(app, "m", SlackEvent({}))
+    run_event(app, "message", SlackEvent({}))
+
+    # validate
+    assert CALLS == ["message"]
+
+
+def test_after_not_run_on_error(app):
+    # setup
+    CALLS = []
+
+    @app.after
+    def after(event_type, event):
+        CALLS.append("after")
+
+    @app.on("message")
+    def handler(event):
+        raise ValueError()
+
+    # run
+    with pytest.raises(ValueError):
+        run_event(app, "message", SlackEvent({}))
+
+    # validate
+    assert CALLS == []
+
+
+def test_no_registry_growth(app):
+    # setup
+    @app.before
+    def before(event_type, event):
+        raise AssertionError("no handlers to run")
+
+    # run
+    for i in range(10):
+        run_event(app, f"unknown_{i}", SlackEvent({}))
+    handlers = app.handlers("unknown_0")
+
+    # validate
+    assert handlers == []
+    assert app._handlers == {}
+    assert app._plans == {}
+
+
+def test_plans_copy_on_write(app):
+    # setup
+    def handler(event):
+        pass
+
+    app.on("message", handler)
+    plans = app._plans
+    plan = plans["message"]
+
+    # run
+    app.on("reaction_added", handler)
+    app.remove_handler("message", handler)
+
+    # validate
+    assert plans == {"message": plan}
+    assert set(app._plans) == {"reaction_added"}
+    assert app._get_routing_names() == (
+        b'"reaction_added"',
+        b'"url_verification"',
+    )
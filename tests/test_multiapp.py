@@ -0,0 +1,164 @@
+import json
+import time
+
+from freezegun import freeze_time
+from starlette.testclient import TestClient
+
+from slackevent_responder import SlackEventApp
+
+from .helpers.helpers import create_headers
+
+
+def event_body(api_app_id, text="hi"):
+    return json.dumps(
+        {
+            "type": "event_callback",
+            "api_app_id": api_app_id,
+            "team_id": "T1",
+            "event": {"type": "message", "channel": "C1", "text": text},
+        }
+    )
+
+
+def post(client, secret, data, path="/slack/events"):
+    timestamp = str(int(time.time()))
+    return client.post(
+        path, data=data, headers=create_headers(secret, timestamp, data)
+    )
+
+
+@freeze_time("2013-08-14")
+def test_secret_by_api_app_id():
+    # setup
+    app = SlackEventApp(
+        slack_signing_secret="default-secret",
+        apps={"A1": "secret-1", "A2": ["secret-2", "next-secret-2"]},
+    )
+    received = []
+
+    @app.on("message", app="A1")
+    def on_a1(event):
+        received.append(("A1", event.event["text"]))
+
+    @app.on("message", app="A2")
+    def on_a2(event):
+        received.append(("A2", event.event["text"]))
+
+    client = TestClient(app)
+
+    # run
+    statuses = [
+        post(client, "secret-1", event_body("A1", "one")).status_code,
+        post(client, "next-secret-2", event_body("A2", "two")).status_code,
+        post(client, "secret-2", event_body("A1", "forged")).status_code,
+        post(client, "default-secret", event_body("A3")).status_code,
+        post(client, "secret-1", event_body("A3")).status_code,
+    ]
+
+    # validate
+    assert statuses == [200, 200, 403, 200, 403]
+    assert received == [("A1", "one"), ("A2", "two")]
+
+
+@freeze_time("2013-08-14")
+def test_secret_by_path():
+    # setup
+    app = SlackEventApp(slack_signing_secret=[], apps={"A1": "secret-1"})
+    client = TestClient(app)
+    challenge = json.dumps({"type": "url_verification", "challenge": "c"})
+
+    # run
+    responses = [
+        post(client, "secret-1", challenge, "/slack/events/A1"),
+        post(client, "secret-1", challenge),
+        post(client, "secret-1", event_body("A1"), "/slack/events/A2"),
+        post(client, "secret-1", event_body("A2"), "/slack/events/A1"),
+        post(client, "other-secret", challenge),
+    ]
+
+    # validate
+    assert [r.status_code for r in responses] == [200, 200, 404, 403, 403]
+    assert responses[0].text == "c"
+
+
+@freeze_time("2013-08-14")
+def test_duplicate_api_app_id():
+    # setup
+    app = SlackEventApp(
+        slack_signing_secret=[], apps={"A1": "secret-1", "A2": "secret-2"}
+    )
+    client = TestClient(app)
+    # json.loads keeps the last value of duplicated keys
+    data = event_body("A2").replace('"api_app_id"', '"api_app_id": "A1", &')
+    data = data.replace("&", '"api_app_id"', 1)
+
+    # run
+    response = post(client, "secret-1", data)
+
+    # validate
+    assert response.status_code == 403
+
+
+@freeze_time("2013-08-14")
+def test_add_and_remove_app():
+    # setup
+    app = SlackEventApp(slack_signing_secret=[])
+    client = TestClient(app)
+
+    # run & validate
+    assert post(client, "secret-1", event_body("A1")).status_code == 403
+
+    app.add_app("A1", "secret-1")
+    assert post(client, "secret-1", event_body("A1")).status_code == 200
+
+    app.add_app("A1", "new-secret-1")
+    assert post(client, "secret-1", event_body("A1")).status_code == 200
+    assert post(client, "new-secret-1", event_body("A1")).status_code == 200
+
+    app.remove_app("A1")
+    assert post(client, "new-secret-1", event_body("A1")).status_code == 403
+    response = post(
+        client, "new-secret-1", event_body("A1"), "/slack/events/A1"
+    )
+    assert response.status_code == 404
+
+
+@freeze_time("2013-08-14")
+def test_nested_api_app_id():
+    # setup
+    app = SlackEventApp(
+        slack_signing_secret="default-secret", apps={"AHOSTED": "secret-1"}
+    )
+    received = []
+
+    @app.on("message")
+    def handler(event):
+        received.append(event.api_app_id)
+
+    client = TestClient(app)
+
+    def body(api_app_id, nested):
+        return json.dumps(
+            {
+                "type": "event_callback",
+                "event": {
+                    "type": "message",
+                    "files": [{"api_app_id": nested}],
+                },
+                "api_app_id": api_app_id,
+            }
+        )
+
+    # run
+    statuses = [
+        # the default secret mustn't sign the events of a hosted app
+        post(client, "default-secret", body("AHOSTED", "AOTHER")).status_code,
+        # nor the secret of a hosted app named further down the body
+        post(client, "secret-1", body("AOTHER", "AHOSTED")).status_code,
+        post(client, "secret-1", body("AHOSTED", "AOTHER")).status_code,
+        post(client, "default-secret", body("AOTHER", "AHOSTED")).status_code,
+    ]
+
+    # validate
+    assert statuses == [403, 403, 200, 200]
+    assert received == ["AHOSTED", "AOTHER"]
@@ -0,0 +1,248 @@
+import asyncio
+import random
+import time
+
+from slackevent_responder import (
+    Dispatcher,
+    KeyedExecutor,
+    Metrics,
+    SlackEvent,
+    SlackEventApp,
+)
+
+
+def test_serial_per_key():
+    # setup
+    keyed = KeyedExecutor()
+    CALLS = []
+    running = {}
+
+    async def handler(key, i):
+        assert not running.get(key)
+        running[key] = True
+        await asyncio.sleep(random.random() / 100)
+        CALLS.append((key, i))
+        running[key] = False
+
+    async def run():
+        await asyncio.gather(
+            *(keyed.run(i % 2, handler, i % 2, i) for i in range(10))
+        )
+
+    # run
+    asyncio.run(run())
+
+    # validate
+    assert [i for key, i in CALLS if key == 0] == [0, 2, 4, 6, 8]
+    assert [i for key, i in CALLS if key == 1] == [1, 3, 5, 7, 9]
+
+
+def test_parallel_across_keys():
+    # setup
+    keyed = KeyedExecutor()
+    LENGTHS = []
+
+    async def handler(i):
+        await asyncio.sleep(0.01)
+        LENGTHS.append(keyed.queue_lengths())
+
+    async def run():
+        await asyncio.gather(*(keyed.run(i % 3, handler, i) for i in range(6)))
+
+    # run
+    asyncio.run(run())
+
+    # validate
+    assert LENGTHS[:3] == [
+        {0: 2, 1: 2, 2: 2},
+        {0: 1, 1: 2, 2: 2},
+        {0: 1, 1: 1, 2: 2},
+    ]
+    assert keyed.queue_lengths() == {}
+    assert keyed.stats() == {"shards": 0, "evicted": 3, "max_queue_length": 0}
+
+
+def test_sync_handler_and_errors():
+    # setup
+    keyed = KeyedExecutor()
+    CALLS = []
+
+    def handler(i):
+        if i == 0:
+            raise ValueError(i)
+        CALLS.append(i)
+
+    async def run():
+        return await asyncio.gather(
+            *(keyed.run("key", handler, i) for i in range(3)),
+            return_exceptions=True,
+        )
+
+    # run
+    results = asyncio.run(run())
+
+    # validate
+    assert isinstance(results[0], ValueError)
+    assert CALLS == [1, 2]
+
+
+def test_cancelled_call_keeps_order():
+    # setup
+    keyed = KeyedExecutor()
+    CALLS = []
+
+    async def handler(i):
+        await asyncio.sleep(0.02)
+        CALLS.append(i)
+
+    async def run():
+        first = asyncio.ensure_future(keyed.run("key", handler, 0))
+        second = asyncio.ensure_future(keyed.run("key", handler, 1))
+        third = asyncio.ensure_future(keyed.run("key", handler, 2))
+        await asyncio.sleep(0.01)
+        second.cancel()
+        await asyncio.gather(first, third, return_exceptions=True)
+
+    # run
+    asyncio.run(run())
+
+    # validate
+    assert CALLS == [0, 2]
+    assert keyed.queue_lengths() == {}
+
+
+def test_app_on_key(signing_secret):
+    # setup
+    app = SlackEventApp(slack_signing_secret=signing_secret, metrics=Metrics())
+    CALLS = []
+    METRICS = []
+
+    @app.on("message", key="channel")
+    async def handler(event):
+        await asyncio.sleep(random.random() / 100)
+        METRICS.append(app.metrics.render())
+        CALLS.append((event.channel, event.event["ts"]))
+
+    async def run():
+        await asyncio.gather(
+            *(
+                app._tasks_from_event(
+                    "message",
+                    SlackEvent(
+                        {"event": {"type": "message", "channel": c, "ts": i}}
+                    ),
+                )()
+                for i, c in enumerate(["C1", "C2", "C1", "C2", "C1"])
+            )
+        )
+
+    # run
+    asyncio.run(run())
+
+    # validate
+    assert [ts for channel, ts in CALLS if channel == "C1"] == [0, 2, 4]
+    assert [ts for channel, ts in CALLS if channel == "C2"] == [1, 3]
+    assert app.handlers("message") == [handler]
+    assert (
+        'slackevent_ordered_queue_length{event="message",'
+        f'handler="{__name__}.test_app_on_key.<locals>.handler",key="C1"}} 3'
+    ) in METRICS[0]
+
+    # run
+    app.remove_all_handlers("message")
+
+    # validate
+    assert not app._keyed
+    assert not app.dispatcher.handler_keys
+    assert "slackevent_ordered" not in app.metrics.render()
+
+
+def test_app_on_key_timeout(signing_secret):
+    # setup
+    app = SlackEventApp(slack_signing_secret=signing_secret)
+    CALLS = []
+    ERRORS = []
+
+    @app.on("message", key="channel", timeout=0.15)
+    def slow(event):
+        CALLS.append(("slow", event.event["ts"]))
+        time.sleep(0.2)
+        CALLS.append(("slow done", event.event["ts"]))
+
+    @app.on("reaction_added", key="channel", timeout=0.15)
+    async def queued(event):
+        # past the timeout with the wait for the call before it
+        await asyncio.sleep(0.1)
+        CALLS.append(("queued", event.event["ts"]))
+
+    @app.on("error")
+    def error_handler(e):
+        ERRORS.append(e)
+
+    def event(event_type, ts):
+        return SlackEvent(
+            {"event": {"type": event_type, "channel": "C1", "ts": ts}}
+        )
+
+    async def run():
+        await asyncio.gather(
+            *(
+                app._tasks_from_event(event_type, event(event_type, ts))()
+                for event_type in ("message", "reaction_added")
+                for ts in (0, 1)
+            )
+        )
+
+    # run
+    asyncio.run(run())
+
+    # validate
+    assert [c for c in CALLS if c[0] != "queued"] == [
+        ("slow", 0),
+        ("slow done", 0),
+        ("slow", 1),
+        ("slow done", 1),
+    ]
+    assert [c for c in CALLS if c[0] == "queued"] == [
+        ("queued", 0),
+        ("queued", 1),
+    ]
+    assert [e.handler for e in ERRORS] == [slow, slow]
+    assert all(e.stack for e in ERRORS)
+
+
+def test_app_on_key_waits_outside_concurrency_slots(signing_secret):
+    # setup
+    app = SlackEventApp(
+        slack_signing_secret=signing_secret,
+        dispatcher=Dispatcher(concurrency=2),
+    )
+    STARTS = []
+
+    @app.on("message", key="channel")
+    async def handler(event):
+        STARTS.append((event.channel, time.perf_counter()))
+        await asyncio.sleep(0.1)
+
+    def message(channel):
+        return SlackEvent(
+            {"event": {"type": "message", "channel": channel, "ts": "1"}}
+        )
+
+    async def run():
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(
+                app._tasks_from_event("message", message(channel))()
+                for channel in ("A", "A", "B")
+            )
+        )
+        return started
+
+    # run
+    started = asyncio.run(run())
+
+    # validate
+    assert [channel for channel, _ in STARTS] == ["A", "B", "A"]
+    # B took the slot left free by the queued A call
+    assert STARTS[1][1] - started < 0.05
@@ -0,0 +1,129 @@
+import json
+import time
+
+import pytest
+from freezegun import freeze_time
+from starlette.testclient import TestClient
+
+from slackevent_responder import SlackEventApp, Tracer
+
+from .helpers.helpers import create_headers
+
+
+def requests(signing_secret):
+    event = json.dumps(
+        {
+            "type": "event_callback",
+            "event_id": "Ev1",
+            "event": {"type": "message", "text": "hi"},
+        }
+    )
+    app_event = event.replace('"Ev1"', '"Ev2", "api_app_id": "A1"')
+    challenge = json.dumps({"type": "url_verification", "challenge": "c"})
+    timestamp = str(int(time.time()))
+    return (
+        [
+            ("POST", "/slack/events", event, signing_secret),
+            ("POST", "/slack/events", event, "wrong-secret"),
+            ("POST", "/slack/events", challenge, signing_secret),
+            ("POST", "/slack/events", "{}", signing_secret),
+            ("POST", "/slack/events", app_event, "app-secret"),
+            ("POST", "/slack/events/A1", app_event, "app-secret"),
+            ("POST", "/slack/events/A2", app_event, "app-secret"),
+            ("POST", "/slack/events/A1/x", app_event, "app-secret"),
+            ("GET", "/slack/events", "", signing_secret),
+            ("PUT", "/slack/events", "", signing_secret),
+        ],
+        timestamp,
+    )
+
+
+def make_app(signing_secret, raw_asgi, spans):
+    app = SlackEventApp(
+        slack_signing_secret=signing_secret,
+        raw_asgi=raw_asgi,
+        tracer=Tracer(spans.append),
+    )
+    app.add_app("A1", "app-secret")
+    handled = []
+
+    @app.on("message")
+    def handler(event):
+        handled.append(event.event_id)
+
+    return app, handled
+
+
+@freeze_time("2013-08-14")
+def test_same_replies(signing_secret):
+    # setup
+    results = {}
+    for raw_asgi in (False, True):
+        spans = []
+        app, handled = make_app(signing_secret, raw_asgi, spans)
+        client = TestClient(app)
+        reqs, timestamp = requests(signing_secret)
+
+        # run
+        responses = [
+            client.request(
+                method,
+                path,
+                data=data,
+                headers=create_headers(secret, timestamp, data),
+            )
+            for method, path, data, secret in reqs
+        ]
+        results[raw_asgi] = (
+            [
+                (
+                    r.status_code,
+                    # Starlette leaves the content length of acks out
+                    sorted(
+                        (key, value)
+                        for key, value in r.headers.items()
+                        if key != "content-length"
+                    ),
+                    r.content,
+                )
+                for r in responses
+            ],
+            handled,
+            sorted(span.name for span in spans),
+        )
+
+    # validate
+    assert results[True] == results[False]
+    replies, handled, _ = results[True]
+    assert [status for status, _, _ in replies] == [
+        200,
+        403,
+        200,
+        403,
+        200,
+        200,
+        404,
+        404,
+        404,
+        405,
+    ]
+    assert handled == ["Ev1", "Ev2", "Ev2"]
+    assert responses[0].headers["content-length"] == "0"
+
+
+@pytest.mark.parametrize("path", ["/slack/events", "/slack/events/"])
+def test_raw_asgi_only_takes_events(signing_secret, path):
+    # setup
+    app = SlackEventApp(
+        slack_signing_secret=signing_secret,
+        slack_event_path=path,
+        raw_asgi=True,
+        metrics_path="/metrics",
+    )
+    client = TestClient(app)
+
+    # run
+    response = client.get("/metrics")
+
+    # validate
+    assert response.status_code == 200
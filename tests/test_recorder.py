@@ -0,0 +1,170 @@
+import asyncio
+import gzip
+import json
+import time
+
+import pytest
+from freezegun import freeze_time
+from starlette.testclient import TestClient
+
+from slackevent_responder import SlackEventApp, TrafficRecorder
+from slackevent_responder.recorder import read_traffic
+from slackevent_responder.replay import replay, schedule
+
+from .helpers.helpers import create_headers
+
+
+@pytest.fixture
+def archive_path(tmp_path):
+    return str(tmp_path / "traffic.jsonl.gz")
+
+
+def event_body(i):
+    return json.dumps(
+        {
+            "type": "event_callback",
+            "event_id": f"Ev{i}",
+            "event": {"type": "message", "text": f"message {i}"},
+        }
+    ).encode()
+
+
+class TestTrafficRecorder:
+    def test_record_and_read(self, archive_path):
+        # setup
+        recorder = TrafficRecorder(archive_path)
+        bodies = [event_body(i) for i in range(3)]
+
+        async def run():
+            for body in bodies:
+                recorder.record(body)
+            await recorder.close()
+
+        # run
+        asyncio.run(run())
+        records = list(read_traffic(archive_path))
+
+        # validate
+        assert [body for _, body in records] == bodies
+        assert recorder.recorded == 3
+
+    def test_continue_archive(self, archive_path):
+        # setup
+        async def run(body):
+            recorder = TrafficRecorder(archive_path)
+            recorder.record(body)
+            await recorder.close()
+
+        # run
+        asyncio.run(run(event_body(1)))
+        asyncio.run(run(event_body(2)))
+
+        # validate
+        assert [body for _, body in read_traffic(archive_path)] == [
+            event_body(1),
+            event_body(2),
+        ]
+
+    def test_read_truncated_archive(self, archive_path):
+        # setup
+        recorder = TrafficRecorder(archive_path)
+
+        async def run():
+            recorder.record(event_body(1))
+            await recorder.flush()
+
+        asyncio.run(run())
+
+        # run
+        # not closed, like when the process was killed
+        records = list(read_traffic(archive_path))
+
+        # validate
+        assert [body for _, body in records] == [event_body(1)]
+
+    def test_max_pending(self, archive_path):
+        # setup
+        recorder = TrafficRecorder(archive_path, max_pending=2)
+
+        async def run():
+            for i in range(5):
+                recorder.record(event_body(i))
+            await recorder.close()
+
+        # run
+        asyncio.run(run())
+
+        # validate
+        assert recorder.recorded == 2
+        assert recorder.dropped == 3
+
+    @freeze_time("2013-08-14")
+    def test_app_records_verified_requests(
+        self, archive_path, signing_secret, slack_event_path
+    ):
+        # setup
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        recorder = TrafficRecorder(archive_path)
+        app = SlackEventApp(
+            slack_signing_secret=signing_secret, recorder=recorder
+        )
+        timestamp = str(int(time.time()))
+        data = event_body(1).decode()
+
+        # run
+        with TestClient(app) as client:
+            client.post(
+                slack_event_path,
+                data=data,
+                headers=create_headers(signing_secret, timestamp, data),
+            )
+            client.post(
+                slack_event_path,
+                data=data,
+                headers=create_headers("wrong-secret", timestamp, data),
+            )
+
+        # validate
+        with gzip.open(archive_path) as f:
+            lines = [json.loads(line) for line in f]
+        assert [line["body"] for line in lines] == [data]
+
+
+class TestReplay:
+    def test_schedule(self):
+        # run & validate
+        assert schedule([10.0, 11.0, 14.0]) == [None, None, None]
+        assert schedule([10.0, 11.0, 14.0], rate=2) == [0.0, 0.5, 1.0]
+        assert schedule([10.0, 11.0, 14.0], speed=2) == [0.0, 0.5, 2.0]
+
+    def test_replay(self):
+        # setup
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        app = SlackEventApp(slack_signing_secret="test-secret")
+        handled = []
+
+        @app.on("message")
+        async def handler(event):
+            handled.append(event.event_id)
+            if event.event_id == "Ev3":
+                raise ValueError("failed")
+
+        records = [(100.0 + i * 0.01, event_body(i)) for i in range(5)]
+        records.append((101.0, b'{"event": "invalid"}'))
+
+        # run
+        report = asyncio.get_event_loop().run_until_complete(
+            replay(app, records, "test-secret", speed=10, concurrency=2)
+        )
+
+        # validate
+        assert sorted(handled) == ["Ev0", "Ev1", "Ev2", "Ev3", "Ev4"]
+        assert report["requests"] == 6
+        assert report["statuses"] == {200: 5, 403: 1}
+        # the request without event
+        assert report["errors"] == 1
+        assert report["exceptions"] == 1
+        assert report["handler_error_rate"] == pytest.approx(1 / 6)
+        assert report["duration_sec"] >= 0.1
+        assert report["ack_p50_ms"] <= report["total_p99_ms"]
+        assert app.handlers("error") == []
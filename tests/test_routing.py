@@ -0,0 +1,177 @@
+import asyncio
+
+import pytest
+
+from slackevent_responder import HandlerFilter, SlackEvent
+from slackevent_responder.routing import HandlerIndex
+
+
+def message(**fields):
+    event = {"type": "message", "channel": "C1", "text": "hi there"}
+    event.update(fields)
+    return SlackEvent({"team_id": "T1", "api_app_id": "A1", "event": event})
+
+
+def handler_a(event):
+    pass
+
+
+def handler_b(event):
+    pass
+
+
+def handler_c(event):
+    pass
+
+
+class TestHandlerIndex:
+    def test_unfiltered(self):
+        # setup
+        index = HandlerIndex([(handler_a, None), (handler_b, HandlerFilter())])
+
+        # validate
+        assert index.match(message()) == (handler_a, handler_b)
+        assert index.handlers == (handler_a, handler_b)
+
+    @pytest.mark.parametrize(
+        "handler_filter,event,expected",
+        [
+            (HandlerFilter(subtype=None), message(), True),
+            (
+                HandlerFilter(subtype=None),
+                message(subtype="message_changed"),
+                False,
+            ),
+            (
+                HandlerFilter(subtype=["message_changed", "message_deleted"]),
+                message(subtype="message_deleted"),
+                True,
+            ),
+            (HandlerFilter(channel="C1"), message(), True),
+            (HandlerFilter(channel="C2"), message(), False),
+            (HandlerFilter(team="T1"), message(), True),
+            (HandlerFilter(team="T2"), message(), False),
+            (HandlerFilter(app="A1"), message(), True),
+            (HandlerFilter(app="A2"), message(), False),
+            (HandlerFilter(exclude_bots=True), message(), True),
+            (HandlerFilter(exclude_bots=True), message(bot_id="B1"), False),
+            (
+                HandlerFilter(exclude_bots=True),
+                message(subtype="bot_message"),
+                False,
+            ),
+            (HandlerFilter(text_prefix="hi"), message(), True),
+            (HandlerFilter(text_prefix="!cmd"), message(), False),
+            (HandlerFilter(text_prefix="hi"), message(text=None), False),
+            (
+                HandlerFilter(subtype=None, channel="C1", team="T1"),
+                message(),
+                True,
+            ),
+            (
+                HandlerFilter(subtype=None, channel="C1", team="T2"),
+                message(),
+                False,
+            ),
+        ],
+    )
+    def test_filter(self, handler_filter, event, expected):
+        # setup
+        index = HandlerIndex([(handler_a, handler_filter)])
+
+        # run
+        result = index.match(event)
+
+        # validate
+        assert result == ((handler_a,) if expected else ())
+
+    def test_registration_order(self):
+        # setup
+        index = HandlerIndex(
+            [
+                (handler_a, HandlerFilter(team="T1")),
+                (handler_b, None),
+                (handler_c, HandlerFilter(channel="C1")),
+            ]
+        )
+
+        # run
+        result = index.match(message())
+
+        # validate
+        assert result == (handler_a, handler_b, handler_c)
+
+
+class TestApp:
+    def test_on_with_filters(self, app):
+        # setup
+        CALLED = set()
+
+        @app.on("message", subtype=None, exclude_bots=True)
+        def human(event):
+            CALLED.add("human")
+
+        @app.on("message", channel="C1")
+        def in_c1(event):
+            CALLED.add("in_c1")
+
+        @app.once("message", text_prefix="!deploy")
+        def deploy(event):
+            CALLED.add("deploy")
+
+        # run
+        results = []
+        for event in [
+            message(channel="C2"),
+            message(bot_id="B1"),
+            message(text="!deploy now"),
+            message(text="!deploy again"),
+        ]:
+            CALLED.clear()
+            asyncio.run(app._tasks_from_event("message", event)())
+            results.append(set(CALLED))
+
+        # validate
+        assert results == [
+            {"human"},
+            {"in_c1"},
+            {"human", "in_c1", "deploy"},
+            {"human", "in_c1"},
+        ]
+        assert app.handlers("message") == [human, in_c1]
+
+    def test_same_handler_on_multiple_events(self, app):
+        # setup
+        CALLED = []
+
+        def handler(event):
+            CALLED.append(event.type)
+
+        app.on("message", handler, channel="C2")
+        app.on("app_mention", handler)
+
+        # run
+        asyncio.run(app._tasks_from_event("message", message())())
+        asyncio.run(
+            app._tasks_from_event(
+                "app_mention", SlackEvent({"event": {"type": "app_mention"}})
+            )()
+        )
+
+        # validate
+        assert CALLED == ["app_mention"]
+
+    def test_remove_filtered_handler(self, app):
+        # setup
+        CALLED = []
+
+        @app.on("message", channel="C1")
+        def handler(event):
+            CALLED.append(event)
+
+        # run
+        app.remove_handler("message", handler)
+        asyncio.run(app._tasks_from_event("message", message())())
+
+        # validate
+        assert CALLED == []
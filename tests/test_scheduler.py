@@ -0,0 +1,138 @@
+import asyncio
+
+import pytest
+
+from slackevent_responder import (
+    Dispatcher,
+    Metrics,
+    PriorityScheduler,
+    SlackEventApp,
+)
+
+
+def test_priority_weights():
+    # setup
+    scheduler = PriorityScheduler(
+        1,
+        priorities={"app_mention": "interactive"},
+        weights={"interactive": 3},
+    )
+    dispatcher = Dispatcher(scheduler=scheduler)
+    STARTED = []
+
+    async def handler(event_data):
+        STARTED.append(event_data)
+        await asyncio.sleep(0)
+
+    async def run():
+        # messages queued first, then mentions
+        await asyncio.gather(
+            *(
+                dispatcher.run("message", [handler], "message")
+                for _ in range(8)
+            ),
+            *(
+                dispatcher.run("app_mention", [handler], "app_mention")
+                for _ in range(6)
+            ),
+        )
+
+    # run
+    asyncio.run(run())
+
+    # validate
+    # 3 mentions for each message while both are queued
+    assert STARTED == [
+        "message",
+        *["app_mention"] * 3,
+        "message",
+        *["app_mention"] * 3,
+        *["message"] * 6,
+    ]
+    assert scheduler.stats() == {
+        "running": 0,
+        "waiting": 0,
+        "queued_by_priority": {},
+    }
+    assert scheduler.queue_delays["interactive"].count == 6
+    assert scheduler.queue_delays["default"].count == 8
+
+
+def test_concurrency():
+    # setup
+    scheduler = PriorityScheduler(2)
+    dispatcher = Dispatcher(scheduler=scheduler)
+    running = 0
+    max_running = 0
+
+    async def handler(event_data):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    # run
+    asyncio.run(dispatcher.run("message", [handler] * 5, {}))
+
+    # validate
+    assert max_running == 2
+    assert scheduler.running == 0
+
+
+def test_cancelled_waiter():
+    # setup
+    scheduler = PriorityScheduler(1)
+
+    async def run():
+        await scheduler.acquire("message")
+        waiter = asyncio.ensure_future(scheduler.acquire("message"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        scheduler.release()
+
+    # run
+    asyncio.run(run())
+
+    # validate
+    assert scheduler.stats() == {
+        "running": 0,
+        "waiting": 0,
+        "queued_by_priority": {},
+    }
+
+
+def test_invalid():
+    with pytest.raises(ValueError):
+        PriorityScheduler(0)
+    with pytest.raises(ValueError):
+        PriorityScheduler(1, weights={"default": 0})
+    with pytest.raises(ValueError):
+        Dispatcher(concurrency=1, scheduler=PriorityScheduler(1))
+
+
+def test_metrics(signing_secret):
+    # setup
+    app = SlackEventApp(
+        slack_signing_secret=signing_secret,
+        dispatcher=Dispatcher(
+            scheduler=PriorityScheduler(
+                1, priorities={"app_mention": "interactive"}
+            )
+        ),
+        metrics=Metrics(),
+    )
+
+    @app.on("app_mention")
+    async def handler(event_data):
+        pass
+
+    # run
+    asyncio.run(app._tasks_from_event("app_mention", {})())
+
+    # validate
+    assert (
+        'slackevent_scheduler_queue_delay_seconds_count{priority="interactive"} 1'
+        in app.metrics.render()
+    )
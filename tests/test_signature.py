@@ -0,0 +1,206 @@
+import asyncio
+import json
+import time
+
+import pytest
+from freezegun import freeze_time
+from starlette.testclient import TestClient
+
+from slackevent_responder import SignatureVerifier, SlackEventApp
+
+from .helpers.helpers import create_headers, create_signature
+
+
+def test_verify(verify_signatures_fixture):
+    # setup
+    (
+        expected,
+        signing_secret,
+        timestamp,
+        data,
+        signature,
+    ) = verify_signatures_fixture
+    verifier = SignatureVerifier(signing_secret)
+
+    # run
+    result_str = verifier.verify(timestamp, data, signature)
+    result_bytes = verifier.verify(
+        timestamp.encode(), data.encode(), signature.encode()
+    )
+
+    # validate
+    assert result_str == expected
+    assert result_bytes == expected
+
+
+def test_verify_repeatedly(signing_secret):
+    # setup
+    verifier = SignatureVerifier(signing_secret)
+    signatures = [
+        (
+            str(ts),
+            f"body{ts}",
+            create_signature(signing_secret, str(ts), f"body{ts}"),
+        )
+        for ts in range(3)
+    ]
+
+    # run
+    results = [verifier.verify(*args) for args in signatures * 2]
+
+    # validate
+    assert all(results)
+
+
+def test_secret_rotation():
+    # setup
+    verifier = SignatureVerifier(["old-secret"])
+    old_signature = create_signature("old-secret", "1", "body")
+    new_signature = create_signature("new-secret", "1", "body")
+
+    # run & validate
+    assert verifier.verify("1", "body", old_signature)
+    assert not verifier.verify("1", "body", new_signature)
+
+    verifier.add_secret("new-secret")
+    assert verifier.secrets == ["old-secret", "new-secret"]
+    assert verifier.verify("1", "body", old_signature)
+    assert verifier.verify("1", "body", new_signature)
+
+    verifier.remove_secret("old-secret")
+    assert verifier.secrets == ["new-secret"]
+    assert not verifier.verify("1", "body", old_signature)
+    assert verifier.verify("1", "body", new_signature)
+
+
+@freeze_time("2013-08-14")
+def test_endpoint_with_multiple_secrets(
+    signing_secret, slack_event_path, reaction_event_fixture
+):
+    # setup
+    app = SlackEventApp(slack_signing_secret=["next-secret", signing_secret])
+    client = TestClient(app)
+    timestamp = str(int(time.time()))
+    data = json.dumps(reaction_event_fixture)
+
+    # run
+    responses = [
+        client.post(
+            slack_event_path,
+            data=data,
+            headers=create_headers(secret, timestamp, data),
+        )
+        for secret in (signing_secret, "next-secret", "unknown-secret")
+    ]
+
+    # validate
+    assert [r.status_code for r in responses] == [200, 200, 403]
+
+
+def test_incremental_verification():
+    # setup
+    verifier = SignatureVerifier(["old-secret", "new-secret"])
+    body = "x" * 100
+    signature = create_signature("new-secret", "1", body)
+
+    # run
+    verification = verifier.start("1")
+    for start in range(0, len(body), 7):
+        end = start + 7
+        verification.update(body[start:end].encode())
+
+    # validate
+    assert verification.verify(signature)
+    assert not verifier.start("2").verify(signature)
+
+
+def stream_request(app, headers, chunks, path="/slack/events"):
+    """
+    Send a request whose body is received in ``chunks``, return the status
+    and the number of chunks the app read
+    """
+    received = 0
+    status = None
+
+    async def receive():
+        nonlocal received
+        received += 1
+        if received <= len(chunks):
+            return {
+                "type": "http.request",
+                "body": chunks[received - 1],
+                "more_body": received < len(chunks),
+            }
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": path,
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (key.lower().encode(), value.encode())
+            for key, value in headers.items()
+        ],
+    }
+    asyncio.run(app(scope, receive, send))
+    return status, received
+
+
+@freeze_time("2013-08-14")
+@pytest.mark.parametrize("raw_asgi", [False, True])
+def test_streamed_body(signing_secret, reaction_event_fixture, raw_asgi):
+    # setup
+    app = SlackEventApp(
+        slack_signing_secret=signing_secret,
+        max_body_size=1000,
+        raw_asgi=raw_asgi,
+    )
+    timestamp = str(int(time.time()))
+    data = json.dumps(reaction_event_fixture)
+    headers = create_headers(signing_secret, timestamp, data)
+    chunks = [data[start:][:10].encode() for start in range(0, len(data), 10)]
+
+    # run
+    status, received = stream_request(app, headers, chunks)
+
+    # validate
+    assert status == 200
+    assert received == len(chunks)
+
+
+@freeze_time("2013-08-14")
+@pytest.mark.parametrize("raw_asgi", [False, True])
+def test_max_body_size(signing_secret, raw_asgi):
+    # setup
+    app = SlackEventApp(
+        slack_signing_secret=signing_secret,
+        max_body_size=25,
+        raw_asgi=raw_asgi,
+    )
+    ERRORS = []
+    timestamp = str(int(time.time()))
+    data = "x" * 100
+    headers = create_headers(signing_secret, timestamp, data)
+
+    @app.on("error")
+    def error_handler(e):
+        ERRORS.append(str(e))
+
+    # run
+    streamed = stream_request(app, headers, [b"x" * 10] * 10)
+    announced = stream_request(
+        app, {**headers, "Content-Length": "100"}, [b"x" * 10] * 10
+    )
+
+    # validate
+    # rejected as soon as the limit is crossed
+    assert streamed == (413, 3)
+    assert announced == (413, 0)
+    assert ERRORS == ["Request body too large"] * 2
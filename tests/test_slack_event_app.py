@@ -1,10 +1,16 @@
+import asyncio
 import json
 import time
 
 from freezegun import freeze_time
 from starlette.testclient import TestClient
 
-from slackevent_responder import SlackEventApp
+from slackevent_responder import (
+    Dispatcher,
+    HandlerExecutor,
+    SlackEvent,
+    SlackEventApp,
+)
 
 from .helpers.helpers import create_signature
 
@@ -421,3 +427,110 @@ class TestEventHandler:
 
         # validate
         assert EVENT_DATA_IN_HANDLER == json_data
+
+
+class TestLifespan:
+    def test_warm_on_startup(self, signing_secret):
+        # setup
+        executor = HandlerExecutor(max_workers=2)
+        app = SlackEventApp(
+            slack_signing_secret=signing_secret,
+            dispatcher=Dispatcher(executor=executor),
+        )
+        app.on("message", lambda event_data: None)
+
+        # run
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        with TestClient(app):
+            threads = len(executor._executor._threads)
+
+        # validate
+        assert threads == 2
+
+    def test_drain(self, signing_secret):
+        # setup
+        app = SlackEventApp(slack_signing_secret=signing_secret)
+        CALLED = []
+
+        @app.on("message")
+        async def handler(event_data):
+            await asyncio.sleep(event_data["event"]["sleep"])
+            CALLED.append(event_data.event_id)
+
+        def make_task(event_id, sleep):
+            event = SlackEvent(
+                {"event_id": event_id, "event": {"sleep": sleep}}
+            )
+            return app._track(app._tasks_from_event("message", event), event)
+
+        async def run():
+            tasks = [
+                asyncio.ensure_future(make_task("Ev1", 0.01)()),
+                asyncio.ensure_future(make_task("Ev2", 10)()),
+            ]
+            await asyncio.sleep(0)
+            abandoned = await app.drain(0.1)
+            await asyncio.gather(*tasks, return_exceptions=True)
+            return abandoned
+
+        # run
+        abandoned = asyncio.run(run())
+
+        # validate
+        assert app.draining
+        assert CALLED == ["Ev1"]
+        assert [event.event_id for event in abandoned] == ["Ev2"]
+        assert app._running == {}
+
+    def test_abandoned_on_shutdown(self, signing_secret):
+        # setup
+        app = SlackEventApp(
+            slack_signing_secret=signing_secret, drain_timeout=0
+        )
+        ERRORS = []
+
+        @app.on("message")
+        async def handler(event_data):
+            await asyncio.sleep(10)
+
+        @app.on("error")
+        def error_handler(e):
+            ERRORS.append(e)
+
+        async def run():
+            event = SlackEvent({"event_id": "Ev1", "event": {}})
+            tasks = app._track(app._tasks_from_event("message", event), event)
+            task = asyncio.ensure_future(tasks())
+            await asyncio.sleep(0)
+            await app.shutdown()
+            await asyncio.gather(task, return_exceptions=True)
+
+        # run
+        asyncio.run(run())
+
+        # validate
+        assert [str(e) for e in ERRORS] == [
+            "Abandoned the handlers of 1 events at shutdown: Ev1"
+        ]
+
+    @freeze_time("2013-08-14")
+    def test_reject_while_draining(
+        self, app, signing_secret, slack_event_path, reaction_event_fixture
+    ):
+        # setup
+        client = TestClient(app)
+        timestamp = str(int(time.time()))
+        data = json.dumps(reaction_event_fixture)
+        headers = {
+            "X-Slack-Request-Timestamp": timestamp,
+            "X-Slack-Signature": create_signature(
+                signing_secret, timestamp, data
+            ),
+        }
+        app.draining = True
+
+        # run
+        response = client.post(slack_event_path, data=data, headers=headers)
+
+        # validate
+        assert response.status_code == 503
@@ -0,0 +1,290 @@
+import asyncio
+import json
+
+import pytest
+
+from slackevent_responder import (
+    DROP,
+    AdmissionController,
+    DedupCache,
+    EventLog,
+    Metrics,
+    SlackEventApp,
+    SocketModeClient,
+)
+from slackevent_responder import envelope as envelope_module
+
+
+websockets = pytest.importorskip("websockets")
+
+
+def envelope(envelope_id, event_id, event_type="reaction_added"):
+    return json.dumps(
+        {
+            "envelope_id": envelope_id,
+            "type": "events_api",
+            "accepts_response_payload": False,
+            "payload": {
+                "type": "event_callback",
+                "event_id": event_id,
+                "event": {"type": event_type},
+            },
+        }
+    )
+
+
+class StandInServer:
+    """
+    Local stand-in for the Socket Mode endpoint, sending ``messages`` to
+    each connection after a hello
+    """
+
+    def __init__(self, messages=(), disconnect=False):
+        self.messages = list(messages)
+        self.disconnect = disconnect
+        self.connections = 0
+        self.acks = []
+
+    async def handler(self, websocket):
+        self.connections += 1
+        await websocket.send(json.dumps({"type": "hello"}))
+        for message in self.messages:
+            await websocket.send(message)
+        if self.disconnect:
+            await websocket.send(
+                json.dumps({"type": "disconnect", "reason": "warning"})
+            )
+        async for message in websocket:
+            self.acks.append(json.loads(message)["envelope_id"])
+
+    async def __aenter__(self):
+        self.server = await websockets.serve(self.handler, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        self.url = f"ws://127.0.0.1:{port}"
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+async def wait_for(condition, timeout=2):
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("timed out")
+
+
+def test_dispatch_and_ack(signing_secret, monkeypatch):
+    # setup
+    ENCODED = []
+
+    def json_dumps(data):
+        ENCODED.append(data)
+        return json.dumps(data).encode()
+
+    monkeypatch.setattr(envelope_module, "_json_dumps", json_dumps)
+    metrics = Metrics()
+    app = SlackEventApp(
+        slack_signing_secret=signing_secret,
+        dedup_cache=DedupCache(),
+        metrics=metrics,
+    )
+    CALLED = []
+
+    @app.on("reaction_added")
+    async def handler(event):
+        CALLED.append(event.event_id)
+
+    async def run():
+        messages = [envelope("1", "Ev1"), envelope("2", "Ev1")]
+        async with StandInServer(messages) as server:
+
+            async def open_url():
+                return server.url
+
+            client = SocketModeClient(app, open_url=open_url, connections=2)
+            await client.start()
+            await wait_for(lambda: len(server.acks) == 4)
+            await client.stop()
+        return server, client
+
+    # run
+    server, client = asyncio.run(run())
+
+    # validate
+    assert server.connections == 2
+    assert sorted(server.acks) == ["1", "1", "2", "2"]
+    # the second delivery of each connection is a duplicate
+    assert CALLED == ["Ev1"]
+    assert metrics.stages["parse"].count == 4
+    assert metrics.stages["dispatch"].count == 1
+    assert client.received == 4
+    assert client.connected == 0
+    # no body was needed without a recorder, event log or process pool
+    assert ENCODED == []
+
+
+def test_reconnect(signing_secret):
+    # setup
+    app = SlackEventApp(slack_signing_secret=signing_secret)
+    ERRORS = []
+    attempts = 0
+
+    @app.on("error")
+    def error_handler(e):
+        ERRORS.append(e)
+
+    async def run():
+        async with StandInServer(disconnect=True) as server:
+
+            async def open_url():
+                nonlocal attempts
+                attempts += 1
+                if attempts == 1:
+                    raise ConnectionError("unavailable")
+                return server.url
+
+            client = SocketModeClient(app, open_url=open_url, backoff=0.01)
+            await client.start()
+            # counted by the client once connected, after the server
+            await wait_for(lambda: client.connects >= 3)
+            await client.stop()
+        return client
+
+    # run
+    client = asyncio.run(run())
+
+    # validate
+    assert [str(e) for e in ERRORS] == ["unavailable"]
+    assert client.connects >= 3
+
+
+def test_admission(signing_secret):
+    # setup
+    app = SlackEventApp(
+        slack_signing_secret=signing_secret,
+        admission=AdmissionController(
+            max_pending_events=0, event_policies={"reaction_added": DROP}
+        ),
+    )
+    CALLED = []
+
+    @app.on("reaction_added")
+    @app.on("message")
+    def handler(event):
+        CALLED.append(event)
+
+    async def run():
+        messages = [envelope("1", "Ev1"), envelope("2", "Ev2", "message")]
+        async with StandInServer(messages) as server:
+
+            async def open_url():
+                return server.url
+
+            client = SocketModeClient(app, open_url=open_url)
+            await client.start()
+            await wait_for(lambda: client.received == 2)
+            await asyncio.sleep(0.05)
+            await client.stop()
+        return server
+
+    # run
+    server = asyncio.run(run())
+
+    # validate
+    assert CALLED == []
+    # rejected events are left for Slack to deliver again
+    assert server.acks == ["1"]
+
+
+def test_redelivery_after_failed_append(signing_secret, tmp_path):
+    # setup
+    event_log = EventLog(str(tmp_path / "events.db"))
+    append = event_log.append
+    failures = [OSError("disk full")]
+
+    async def flaky_append(body):
+        if failures:
+            raise failures.pop()
+        return await append(body)
+
+    event_log.append = flaky_append
+    app = SlackEventApp(
+        slack_signing_secret=signing_secret,
+        event_log=event_log,
+        dedup_cache=DedupCache(),
+    )
+    CALLED = []
+    ERRORS = []
+
+    @app.on("reaction_added")
+    def handler(event):
+        CALLED.append(event.event_id)
+
+    @app.on("error")
+    def error_handler(e):
+        ERRORS.append(e)
+
+    async def run():
+        # Slack delivers the unacked envelope again
+        messages = [envelope("1", "Ev1"), envelope("1", "Ev1")]
+        async with StandInServer(messages) as server:
+
+            async def open_url():
+                return server.url
+
+            client = SocketModeClient(app, open_url=open_url)
+            await client.start()
+            await wait_for(lambda: CALLED)
+            await client.stop()
+        await event_log.close()
+        return server
+
+    # run
+    server = asyncio.run(run())
+
+    # validate
+    assert server.acks == ["1"]
+    assert CALLED == ["Ev1"]
+    assert [str(e) for e in ERRORS] == ["disk full"]
+
+
+def test_handler_errors(signing_secret):
+    # setup
+    app = SlackEventApp(slack_signing_secret=signing_secret)
+    ERRORS = []
+
+    @app.on("reaction_added")
+    def handler(event):
+        raise ValueError(event.event_id)
+
+    @app.on("error")
+    def error_handler(e):
+        ERRORS.append(e)
+
+    async def run():
+        async with StandInServer([envelope("1", "Ev1")]) as server:
+
+            async def open_url():
+                return server.url
+
+            client = SocketModeClient(app, open_url=open_url)
+            await client.start()
+            await wait_for(lambda: ERRORS)
+            await client.stop()
+
+    # run
+    asyncio.run(run())
+
+    # validate
+    assert [str(e) for e in ERRORS] == ["Ev1"]
+
+
+def test_invalid(signing_secret):
+    app = SlackEventApp(slack_signing_secret=signing_secret)
+    with pytest.raises(ValueError):
+        SocketModeClient(app, "xapp-token", connections=0)
+    with pytest.raises(ValueError):
+        SocketModeClient(app)
@@ -0,0 +1,179 @@
+import asyncio
+import json
+import time
+
+import pytest
+from freezegun import freeze_time
+from starlette.testclient import TestClient
+
+from slackevent_responder import Dispatcher, SlackEventApp, Tracer
+from slackevent_responder.tracing import current_span
+
+from .helpers.helpers import create_headers
+
+
+def post_event(client, signing_secret, path, headers=None):
+    data = json.dumps(
+        {
+            "type": "event_callback",
+            "event_id": "Ev1",
+            "event": {"type": "message", "text": "hi"},
+        }
+    )
+    timestamp = str(int(time.time()))
+    return client.post(
+        path,
+        data=data,
+        headers={
+            **create_headers(signing_secret, timestamp, data),
+            **(headers or {}),
+        },
+    )
+
+
+@freeze_time("2013-08-14")
+def test_request_and_handler_spans(signing_secret, slack_event_path):
+    # setup
+    spans = []
+    app = SlackEventApp(
+        slack_signing_secret=signing_secret, tracer=Tracer(spans.append)
+    )
+    current = {}
+
+    @app.on("message")
+    def in_thread(event):
+        current["sync"] = current_span()
+
+    @app.on("message")
+    async def on_loop(event):
+        current["async"] = current_span()
+        raise ValueError("failed")
+
+    client = TestClient(app, raise_server_exceptions=False)
+
+    # run
+    post_event(
+        client,
+        signing_secret,
+        slack_event_path,
+        {"X-Slack-Retry-Num": "2", "X-Slack-Retry-Reason": "http_timeout"},
+    )
+
+    # validate
+    by_name = {}
+    for span in spans:
+        by_name.setdefault(span.name, []).append(span)
+    (request,) = by_name["slack.request"]
+    assert request.parent_id is None
+    assert request.attributes["slack.event_id"] == "Ev1"
+    assert request.attributes["slack.retry_num"] == 2
+    assert request.attributes["slack.retry_reason"] == "http_timeout"
+    assert request.attributes["http.status_code"] == 200
+    for stage in ("read_body", "verify", "parse", "dispatch"):
+        (stage_span,) = by_name[stage]
+        assert stage_span.parent_id == request.span_id
+        assert stage_span.start_time >= request.start_time
+
+    handlers = {
+        span.attributes["slack.handler"].rsplit(".", 1)[1]: span
+        for span in by_name["slack.handler"]
+    }
+    assert handlers.keys() == {"in_thread", "on_loop"}
+    for name, span in handlers.items():
+        assert span.trace_id == request.trace_id
+        assert span.parent_id == request.span_id
+        assert span.attributes["slack.event_id"] == "Ev1"
+        assert span.attributes["slack.retry_num"] == 2
+        assert span.attributes["slack.event_type"] == "message"
+    assert current == {
+        "sync": handlers["in_thread"],
+        "async": handlers["on_loop"],
+    }
+    assert handlers["in_thread"].error is None
+    assert handlers["on_loop"].error == "ValueError('failed')"
+
+
+@freeze_time("2013-08-14")
+def test_no_tracer(signing_secret, slack_event_path):
+    # setup
+    app = SlackEventApp(slack_signing_secret=signing_secret)
+    current = []
+
+    @app.on("message")
+    def handler(event):
+        current.append(current_span())
+
+    client = TestClient(app)
+
+    # run
+    response = post_event(client, signing_secret, slack_event_path)
+
+    # validate
+    assert response.status_code == 200
+    assert current == [None]
+
+
+def test_dispatcher_tracer(signing_secret):
+    # setup
+    tracer = Tracer(lambda span: None)
+
+    # run
+    app = SlackEventApp(
+        slack_signing_secret=signing_secret,
+        dispatcher=Dispatcher(tracer=tracer),
+    )
+
+    # validate
+    assert app.tracer is tracer
+    with pytest.raises(ValueError):
+        SlackEventApp(
+            slack_signing_secret=signing_secret,
+            dispatcher=Dispatcher(tracer=tracer),
+            tracer=Tracer(lambda span: None),
+        )
+
+
+@freeze_time("2013-08-14")
+def test_failing_exporter(signing_secret, slack_event_path):
+    # setup
+    def exporter(span):
+        raise RuntimeError("collector down")
+
+    tracer = Tracer(exporter)
+    app = SlackEventApp(slack_signing_secret=signing_secret, tracer=tracer)
+    app.on("message", lambda event: None)
+    client = TestClient(app)
+
+    # run
+    response = post_event(client, signing_secret, slack_event_path)
+
+    # validate
+    assert response.status_code == 200
+    # the request, its 4 stages and the handler
+    assert tracer.export_errors == 6
+
+
+def test_span_outside_request():
+    # setup
+    spans = []
+    tracer = Tracer(spans.append)
+
+    async def run():
+        parent = tracer.start_span("job", {"slack.event_id": "Ev1"})
+        token = parent.activate()
+        child = tracer.start_span("step", {"step": 1})
+        parent.deactivate(token)
+        child.end()
+        parent.end()
+        return parent, child, tracer.start_span("other")
+
+    # run
+    parent, child, other = asyncio.run(run())
+
+    # validate
+    assert spans == [child, parent]
+    assert child.parent_id == parent.span_id
+    assert child.attributes == {"slack.event_id": "Ev1", "step": 1}
+    assert other.parent_id is None
+    assert other.trace_id != parent.trace_id
+    assert child.duration is not None and child.duration >= 0
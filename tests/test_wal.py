@@ -0,0 +1,303 @@
+import asyncio
+import json
+import time
+
+import pytest
+from freezegun import freeze_time
+from starlette.background import BackgroundTask
+from starlette.testclient import TestClient
+
+from slackevent_responder import DedupCache, EventLog, SlackEventApp
+
+from .helpers.helpers import create_headers
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    return str(tmp_path / "events.db")
+
+
+class TestEventLog:
+    def test_append_and_mark_done(self, log_path):
+        # setup
+        event_log = EventLog(log_path)
+
+        async def run():
+            ids = await asyncio.gather(
+                event_log.append(b"first"),
+                event_log.append(b"second"),
+                event_log.append(b"third"),
+            )
+            event_log.mark_done(ids[1])
+            await event_log.flush()
+            unfinished = await event_log.unfinished()
+            await event_log.close()
+            return ids, unfinished
+
+        # run
+        ids, unfinished = asyncio.run(run())
+
+        # validate
+        assert len(set(ids)) == 3
+        assert unfinished == [(ids[0], b"first"), (ids[2], b"third")]
+
+    def test_group_commit(self, log_path):
+        # setup
+        event_log = EventLog(log_path, batch_size=10)
+
+        async def run():
+            await asyncio.gather(*(event_log.append(b"x") for _ in range(25)))
+            await event_log.close()
+
+        # run
+        asyncio.run(run())
+
+        # validate
+        assert event_log.appended == 25
+        # the first append is committed alone, the others are grouped
+        assert event_log.commits <= 4
+
+    def test_survives_reopen(self, log_path):
+        # setup
+        async def write():
+            event_log = EventLog(log_path)
+            log_id = await event_log.append(b"body")
+            await event_log.close()
+            return log_id
+
+        async def read():
+            event_log = EventLog(log_path)
+            unfinished = await event_log.unfinished()
+            await event_log.close()
+            return unfinished
+
+        # run
+        log_id = asyncio.run(write())
+        unfinished = asyncio.run(read())
+
+        # validate
+        assert unfinished == [(log_id, b"body")]
+
+    def test_track_marks_done_on_error(self, log_path):
+        # setup
+        event_log = EventLog(log_path)
+
+        async def handler():
+            raise RuntimeError("boom")
+
+        async def run():
+            log_id = await event_log.append(b"body")
+            with pytest.raises(RuntimeError):
+                await event_log.track(BackgroundTask(handler), log_id)()
+            await event_log.flush()
+            unfinished = await event_log.unfinished()
+            await event_log.close()
+            return unfinished
+
+        # run
+        unfinished = asyncio.run(run())
+
+        # validate
+        assert unfinished == []
+
+    def test_track_keeps_cancelled(self, log_path):
+        # setup
+        event_log = EventLog(log_path)
+
+        async def handler():
+            await asyncio.sleep(10)
+
+        async def run():
+            log_id = await event_log.append(b"body")
+            task = asyncio.ensure_future(
+                event_log.track(BackgroundTask(handler), log_id)()
+            )
+            await asyncio.sleep(0)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await event_log.flush()
+            unfinished = await event_log.unfinished()
+            await event_log.close()
+            return unfinished
+
+        # run
+        unfinished = asyncio.run(run())
+
+        # validate
+        assert unfinished == [(1, b"body")]
+
+
+class TestApp:
+    @freeze_time("2013-08-14")
+    def test_endpoint_logs_until_handled(
+        self, signing_secret, slack_event_path, reaction_event_fixture, log_path
+    ):
+        # setup
+        event_log = EventLog(log_path)
+        app = SlackEventApp(
+            slack_signing_secret=signing_secret, event_log=event_log
+        )
+        data = json.dumps(reaction_event_fixture)
+        headers = create_headers(signing_secret, str(int(time.time())), data)
+        UNFINISHED_IN_HANDLER = None
+
+        @app.on("reaction_added")
+        async def handler(event):
+            nonlocal UNFINISHED_IN_HANDLER
+            UNFINISHED_IN_HANDLER = await event_log.unfinished()
+
+        # run
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        with TestClient(app) as client:
+            response = client.post(slack_event_path, data=data, headers=headers)
+
+        # validate
+        assert response.status_code == 200
+        assert [body for _, body in UNFINISHED_IN_HANDLER] == [data.encode()]
+        assert asyncio.run(EventLog(log_path).unfinished()) == []
+
+    @freeze_time("2013-08-14")
+    def test_retry_after_failed_append(
+        self, signing_secret, slack_event_path, reaction_event_fixture, log_path
+    ):
+        # setup
+        event_log = EventLog(log_path)
+        append = event_log.append
+        failures = [OSError("disk full")]
+
+        async def flaky_append(body):
+            if failures:
+                raise failures.pop()
+            return await append(body)
+
+        event_log.append = flaky_append
+        app = SlackEventApp(
+            slack_signing_secret=signing_secret,
+            event_log=event_log,
+            dedup_cache=DedupCache(),
+        )
+        data = json.dumps(reaction_event_fixture)
+        headers = create_headers(signing_secret, str(int(time.time())), data)
+        HANDLED = []
+
+        @app.on("reaction_added")
+        def handler(event):
+            HANDLED.append(event)
+
+        # run
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        with TestClient(app, raise_server_exceptions=False) as client:
+            failed = client.post(slack_event_path, data=data, headers=headers)
+            retried = client.post(
+                slack_event_path,
+                data=data,
+                headers={**headers, "X-Slack-Retry-Num": "1"},
+            )
+
+        # validate
+        assert failed.status_code == 500
+        assert retried.status_code == 200
+        assert HANDLED == [reaction_event_fixture]
+
+    def test_replay_on_startup(
+        self, signing_secret, reaction_event_fixture, log_path
+    ):
+        # setup
+        data = json.dumps(reaction_event_fixture).encode()
+
+        async def crash():
+            event_log = EventLog(log_path)
+            await event_log.append(data)
+            await event_log.close()
+
+        asyncio.run(crash())
+
+        dedup_cache = DedupCache()
+        app = SlackEventApp(
+            slack_signing_secret=signing_secret,
+            event_log=EventLog(log_path),
+            dedup_cache=dedup_cache,
+        )
+        REPLAYED = []
+
+        @app.on("reaction_added")
+        def handler(event):
+            REPLAYED.append(event)
+
+        # run
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        with TestClient(app):
+            pass
+
+        # validate
+        assert REPLAYED == [reaction_event_fixture]
+        assert reaction_event_fixture["event_id"] in dedup_cache
+        assert asyncio.run(EventLog(log_path).unfinished()) == []
+
+    def test_replay_in_background(
+        self, signing_secret, reaction_event_fixture, log_path
+    ):
+        # setup
+        data = json.dumps(reaction_event_fixture).encode()
+
+        async def crash():
+            event_log = EventLog(log_path)
+            await event_log.append(data)
+            await event_log.close()
+
+        asyncio.run(crash())
+        event_log = EventLog(log_path)
+        app = SlackEventApp(
+            slack_signing_secret=signing_secret, event_log=event_log
+        )
+        STARTED = []
+
+        @app.on("reaction_added")
+        async def hung(event):
+            STARTED.append(event)
+            await asyncio.sleep(60)
+
+        async def run():
+            await asyncio.wait_for(app.startup(), 1)
+            await asyncio.sleep(0.01)
+            REPLAYING.extend(app._background)
+            abandoned = await app.drain(0.05)
+            await event_log.close()
+            return abandoned
+
+        # run
+        REPLAYING = []
+        abandoned = asyncio.run(run())
+
+        # validate
+        assert len(REPLAYING) == 1
+        assert not app._background
+        assert STARTED == [reaction_event_fixture]
+        assert abandoned == [reaction_event_fixture]
+        assert asyncio.run(EventLog(log_path).unfinished()) == [(1, data)]
+
+    def test_replay_errors(self, signing_secret, log_path):
+        # setup
+        async def crash():
+            event_log = EventLog(log_path)
+            await event_log.append(b"not json")
+            await event_log.close()
+
+        asyncio.run(crash())
+        app = SlackEventApp(
+            slack_signing_secret=signing_secret, event_log=EventLog(log_path)
+        )
+        ERRORS = []
+
+        @app.on("error")
+        def error_handler(e):
+            ERRORS.append(e)
+
+        # run
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        with TestClient(app):
+            pass
+
+        # validate
+        assert len(ERRORS) == 1
+        assert isinstance(ERRORS[0], ValueError)
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import os
+import pickle
+import time
+
+import pytest
+from freezegun import freeze_time
+from starlette.testclient import TestClient
+
+from slackevent_responder import (
+    Dispatcher,
+    ProcessWorkerPool,
+    SlackEvent,
+    SlackEventApp,
+)
+
+from .helpers.helpers import create_headers
+
+
+# Handlers sent to worker processes must be importable
+
+
+def record_pid(event):
+    with open(event["event"]["path"], "a") as f:
+        f.write(f"{os.getpid()}\n")
+
+
+async def async_record_pid(event):
+    record_pid(event)
+
+
+def fail(event):
+    raise ValueError(event["event"]["path"])
+
+
+@pytest.fixture
+def pool():
+    pool = ProcessWorkerPool(processes=2)
+    yield pool
+    pool.shutdown()
+
+
+def make_event(path):
+    data = {"type": "event_callback", "event": {"type": "test", "path": path}}
+    return SlackEvent(data, json.dumps(data).encode())
+
+
+def read_pids(path):
+    with open(path) as f:
+        return [int(line) for line in f]
+
+
+def test_slack_event_pickles_body():
+    # setup
+    data = {"event": {"type": "test"}}
+    body = json.dumps(data).encode()
+
+    # run
+    with_body = pickle.loads(pickle.dumps(SlackEvent(data, body)))
+    without_body = pickle.loads(pickle.dumps(SlackEvent(data)))
+
+    # validate
+    assert with_body == data
+    assert without_body == data
+    assert body in pickle.dumps(SlackEvent(data, body))
+
+
+def test_accepts(pool):
+    def local_handler(event):
+        pass
+
+    assert pool.accepts(record_pid)
+    assert not pool.accepts(local_handler)
+
+
+def test_run_in_worker_processes(pool, tmp_path):
+    # setup
+    path = str(tmp_path / "pids")
+    dispatcher = Dispatcher(process_pool=pool)
+
+    # run
+    asyncio.run(
+        dispatcher.run("test", [record_pid, async_record_pid], make_event(path))
+    )
+
+    # validate
+    pids = read_pids(path)
+    assert len(pids) == 2
+    assert os.getpid() not in pids
+    assert pool.stats() == {"submitted": 2, "failed": 0}
+
+
+def test_errors_to_error_handler(pool, tmp_path):
+    # setup
+    dispatcher = Dispatcher(process_pool=pool)
+    ERRORS = []
+
+    async def error_handler(e):
+        ERRORS.append(e)
+
+    dispatcher.error_handler = error_handler
+
+    # run
+    asyncio.run(dispatcher.run("test", [fail], make_event("path")))
+
+    # validate
+    assert len(ERRORS) == 1
+    assert isinstance(ERRORS[0], ValueError)
+    assert str(ERRORS[0]) == "path"
+    assert pool.stats() == {"submitted": 1, "failed": 1}
+
+
+@freeze_time("2013-08-14")
+def test_app(pool, signing_secret, slack_event_path, tmp_path):
+    # setup
+    app = SlackEventApp(
+        slack_signing_secret=signing_secret,
+        dispatcher=Dispatcher(process_pool=pool),
+    )
+    client = TestClient(app)
+    path = str(tmp_path / "pids")
+    data = json.dumps(
+        {"type": "event_callback", "event": {"type": "test", "path": path}}
+    )
+    headers = create_headers(signing_secret, str(int(time.time())), data)
+    app.on("test", record_pid)
+    app.on("test", fail)
+    ONCE_PIDS = []
+    BODIES = []
+    ERRORS = []
+
+    @app.once("test")
+    def once_handler(event):
+        ONCE_PIDS.append(os.getpid())
+        BODIES.append(event._body)
+
+    @app.on("error")
+    def error_handler(e):
+        ERRORS.append(e)
+
+    # run
+    response = client.post(slack_event_path, data=data, headers=headers)
+
+    # validate
+    assert response.status_code == 200
+    assert len(read_pids(path)) == 1
+    assert read_pids(path) != [os.getpid()]
+    assert ONCE_PIDS == [os.getpid()]
+    assert BODIES == [data.encode()]
+    assert [str(e) for e in ERRORS] == [path]